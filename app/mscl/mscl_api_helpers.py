@@ -41,9 +41,23 @@ def map_export_storage_error(err_text: str) -> tuple[int, str]:
     return 500, message
 
 
+def wants_async_response(args: Mapping[str, Any], headers: Mapping[str, Any], default: bool = False) -> bool:
+    """Whether a job request should answer 202 instead of waiting for the result.
+
+    An explicit ``?async=`` wins, then ``Prefer: respond-async``, then ``default``.
+    """
+    raw = args.get("async")
+    if raw is not None and str(raw).strip() != "":
+        return str(raw).strip().lower() in ("1", "true", "yes", "on")
+    if "respond-async" in str(headers.get("Prefer") or "").lower():
+        return True
+    return bool(default)
+
+
 __all__ = [
     "EXPORT_STORAGE_TRANSIENT_HINT",
     "cached_node_snapshot",
     "map_export_storage_error",
     "parse_raw_node_id",
+    "wants_async_response",
 ]
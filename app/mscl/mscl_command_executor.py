@@ -0,0 +1,207 @@
+import heapq
+import itertools
+import threading
+import time
+import uuid
+
+try:
+    from mscl_op_lock import PRIORITY_INTERACTIVE
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_op_lock import PRIORITY_INTERACTIVE
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class CommandQueueFull(RuntimeError):
+    status_code = 503
+
+
+class CommandJob:
+    """One submitted radio operation; ``fn(job)`` runs on the executor thread."""
+
+    def __init__(self, name, fn, *, node_id=None, priority=PRIORITY_INTERACTIVE, now_fn=time.time):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = str(name)
+        self.node_id = node_id
+        self.priority = int(priority)
+        self.status = JOB_QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_ts = now_fn()
+        self.started_ts = None
+        self.finished_ts = None
+        self._fn = fn
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def set_progress(self, **fields):
+        self.progress = {**self.progress, **fields}
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "node_id": self.node_id,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "created_ts": self.created_ts,
+            "started_ts": self.started_ts,
+            "finished_ts": self.finished_ts,
+        }
+
+
+class CommandExecutor:
+    """Single thread that runs BaseStation operations submitted as jobs.
+
+    Jobs run one at a time under ``lock.tagged(job.name, job.priority)``,
+    better priority classes first and FIFO within a class. A long job calls
+    ``preempt_point()`` at safe points to run queued jobs of a better class
+    inline and to let request threads waiting on the lock in. Jobs for a node
+    a running job is working on are never run inline (e.g. a clear-storage
+    under an open datalog download); they wait until that job finished.
+    """
+
+    def __init__(
+        self,
+        *,
+        lock,
+        log_func,
+        metric_inc,
+        metric_set,
+        max_queued=32,
+        keep_finished=64,
+        finished_ttl_sec=900.0,
+        now_fn=time.time,
+    ):
+        self._lock = lock
+        self._log = log_func
+        self._metric_inc = metric_inc
+        self._metric_set = metric_set
+        self.max_queued = max(1, int(max_queued))
+        self.keep_finished = max(1, int(keep_finished))
+        self.finished_ttl_sec = max(1.0, float(finished_ttl_sec))
+        self._now_fn = now_fn
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._running = []
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="mscl-command-executor", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, fn, *, node_id=None, priority=PRIORITY_INTERACTIVE):
+        job = CommandJob(name, fn, node_id=node_id, priority=priority, now_fn=self._now_fn)
+        with self._cond:
+            if len(self._queue) >= self.max_queued:
+                self._metric_inc("command_jobs_rejected")
+                raise CommandQueueFull(f"Command queue full ({len(self._queue)} jobs waiting)")
+            self._prune_locked()
+            self._jobs[job.id] = job
+            heapq.heappush(self._queue, (job.priority, next(self._seq), job))
+            self._metric_inc("command_jobs_submitted")
+            self._metric_set("command_jobs_queued", len(self._queue))
+            self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(str(job_id))
+
+    def jobs(self):
+        with self._cond:
+            return sorted(self._jobs.values(), key=lambda j: j.created_ts)
+
+    def preempt_point(self):
+        """Run queued jobs of a better class than the current one, then yield the lock."""
+        if threading.current_thread() is not self._thread or not self._running:
+            return False
+        ran = False
+        while True:
+            with self._cond:
+                job = self._pop_preemptible_locked()
+                if job is None:
+                    break
+                self._metric_set("command_jobs_queued", len(self._queue))
+            self._metric_inc("command_jobs_preempted")
+            self._execute(job)
+            ran = True
+        return self._lock.yield_if_preempted() or ran
+
+    def _pop_preemptible_locked(self):
+        busy_nodes = {j.node_id for j in self._running if j.node_id is not None}
+        for entry in sorted(self._queue):
+            if entry[0] >= self._running[-1].priority:
+                return None
+            job = entry[2]
+            if job.node_id is not None and job.node_id in busy_nodes:
+                continue
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            return job
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                _prio, _seq, job = heapq.heappop(self._queue)
+                self._metric_set("command_jobs_queued", len(self._queue))
+            self._execute(job)
+
+    def _execute(self, job):
+        job.status = JOB_RUNNING
+        job.started_ts = self._now_fn()
+        self._running.append(job)
+        self._metric_set("command_jobs_running", len(self._running))
+        try:
+            with self._lock.tagged(job.name, job.priority):
+                job.result = job._fn(job)
+            job.status = JOB_DONE
+            self._metric_inc("command_jobs_done")
+        except Exception as e:
+            job.error = str(e)
+            job.status = JOB_FAILED
+            self._metric_inc("command_jobs_failed")
+            self._log(f"[mscl-web] [JOB] {job.name} id={job.id} node_id={job.node_id} failed: {e}")
+        finally:
+            job.finished_ts = self._now_fn()
+            self._running.pop()
+            self._metric_set("command_jobs_running", len(self._running))
+            job._done.set()
+
+    def _prune_locked(self):
+        now = self._now_fn()
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.finished_ts)
+        excess = len(finished) - self.keep_finished + 1
+        for i, job in enumerate(finished):
+            if i < excess or now - job.finished_ts > self.finished_ttl_sec:
+                del self._jobs[job.id]
+
+
+__all__ = [
+    "CommandExecutor",
+    "CommandJob",
+    "CommandQueueFull",
+    "JOB_DONE",
+    "JOB_FAILED",
+    "JOB_QUEUED",
+    "JOB_RUNNING",
+]
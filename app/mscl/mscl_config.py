@@ -2,7 +2,7 @@ import logging
 import time
 import threading
 
-from flask import Flask, render_template, request, jsonify, send_file, Response  # type: ignore
+from flask import Flask, render_template, request, jsonify, Response, copy_current_request_context, g  # type: ignore
 
 from mscl_constants import (
     COMM_PROTOCOL_MAP,
@@ -30,9 +30,11 @@ from mscl_constants import (
     _wt,
 )
 from mscl_stream_helpers import (
+    DatapointAccessorCache as _DatapointAccessorCache,
     coerce_logged_sweeps as _coerce_logged_sweeps,
     logged_sweep_rows as _logged_sweep_rows,
     ns_to_iso_utc as _ns_to_iso_utc,
+    packet_time_ns as _packet_time_ns,
     point_channel as _point_channel,
     point_time_ns as _point_time_ns,
     point_value as _point_value,
@@ -45,7 +47,7 @@ from mscl_rate_helpers import (
     sample_rate_label as _sample_rate_label_impl,
 )
 from mscl_export_helpers import (
-    filter_rows_by_host_window,
+    iter_rows_in_host_window,
     parse_iso_utc_to_ns,
     resolve_export_time_window,
 )
@@ -62,8 +64,9 @@ from mscl_sampling_service import (
     start_sampling_via_sync_network as start_sampling_via_sync_network_service,
 )
 from mscl_sampling_run_service import start_sampling_run as start_sampling_run_service
-from mscl_status_service import build_status_payload
+from mscl_status_service import BaseInfoCache, build_status_payload
 from mscl_health_service import build_health_payload
+from mscl_state_snapshot import SnapshotPublisher, capture_state_snapshot
 from mscl_export_request_helpers import ExportRequestValidationError, parse_export_storage_request
 from mscl_write_config_service import build_write_config
 from mscl_write_cache_service import update_write_cache
@@ -73,36 +76,80 @@ from mscl_tx_power_helpers import normalize_tx_power
 from mscl_write_payload_helpers import normalize_write_payload
 from mscl_write_apply_service import apply_write_connected
 from mscl_utils import sample_rate_text_to_hz
-from mscl_api_helpers import cached_node_snapshot, map_export_storage_error
-from mscl_export_storage_service import execute_export_storage_connected
+from mscl_api_helpers import cached_node_snapshot, map_export_storage_error, wants_async_response
+from mscl_export_storage_service import build_export_response, execute_export_storage_connected, export_rows_view
+from mscl_export_store import ExportStore
+from mscl_session_cache import SessionCache
+from mscl_harvest_service import (
+    HarvestCursorFile,
+    load_persisted_harvest_cursor as load_persisted_harvest_cursor_service,
+    persist_harvest_cursor as persist_harvest_cursor_service,
+)
+from mscl_op_lock import PRIORITY_DOWNLOAD, PRIORITY_INTERACTIVE, PRIORITY_STREAM
+from mscl_command_executor import JOB_FAILED, CommandExecutor, CommandQueueFull
+from mscl_port_helpers import PortWatcher
+from mscl_log_helpers import format_log_entry
+from mscl_metrics_helpers import render_prometheus
 from mscl_settings import (
     INFLUX_BUCKET,
     INFLUX_ORG,
     INFLUX_TOKEN,
     INFLUX_URL,
+    MSCL_BASE_INFO_REFRESH_SEC,
     MSCL_EXPORT_ALIGN_MIN_SKEW_SEC,
+    MSCL_EXPORT_DIR,
     MSCL_EXPORT_INFLUX_BATCH,
+    MSCL_EXPORT_KEEP,
+    MSCL_EXPORT_MAX_MB,
+    MSCL_HARVEST_CURSOR_FILE,
+    MSCL_JOB_KEEP,
+    MSCL_JOB_QUEUE_MAX,
+    MSCL_JOB_TTL_SEC,
+    MSCL_JOB_WAIT_MAX_SEC,
     MSCL_EXPORT_OFFSET_RECALC_MAX_SKEW_SEC,
     MSCL_EXPORT_OFFSET_RECALC_THRESHOLD_SEC,
     MSCL_MEASUREMENT,
+    MSCL_META_HARVEST_METRIC,
     MSCL_META_MEASUREMENT,
     MSCL_META_OFFSET_METRIC,
     MSCL_ONLY_CHANNEL_1,
+    MSCL_SNAPSHOT_INTERVAL_SEC,
     MSCL_SOURCE_NODE_EXPORT,
     MSCL_RESAMPLED_ENABLED,
+    MSCL_SESSION_CACHE_DIR,
+    MSCL_SESSION_CACHE_ENABLED,
     MSCL_RESAMPLED_MEASUREMENT,
     MSCL_RESAMPLED_INCLUDE_RAW_TS,
+    MSCL_RESAMPLED_LATENESS_SEC,
+    MSCL_RESAMPLED_MAX_SECOND_SAMPLES,
     MSCL_SOURCE_RADIO,
     MSCL_STREAM_BATCH_SIZE,
     MSCL_STREAM_DROP_LOG_THROTTLE_SEC,
     MSCL_STREAM_DROP_WARN_SEC,
     MSCL_STREAM_ENABLED,
+    MSCL_STREAM_ENCODER_WORKERS,
     MSCL_STREAM_FLUSH_INTERVAL_MS,
     MSCL_STREAM_IDLE_SLEEP,
     MSCL_STREAM_LOG_INTERVAL_SEC,
+    MSCL_STREAM_QUEUE_BLOCK_SEC,
     MSCL_STREAM_QUEUE_MAX,
+    MSCL_STREAM_QUEUE_MAX_MB,
+    MSCL_STREAM_QUEUE_MAX_POINTS,
+    MSCL_STREAM_QUEUE_OVERFLOW,
     MSCL_STREAM_QUEUE_WAIT_MS,
+    MSCL_STREAM_READ_LOCK_CAP_MS,
+    MSCL_STREAM_READ_TIMEOUT_MAX_MS,
     MSCL_STREAM_READ_TIMEOUT_MS,
+    MSCL_STREAM_SPOOL_DIR,
+    MSCL_STREAM_SPOOL_ENABLED,
+    MSCL_STREAM_SPOOL_FSYNC_SEC,
+    MSCL_STREAM_SPOOL_MAX_MB,
+    MSCL_STREAM_SPOOL_REPLAY_POINTS_PER_SEC,
+    MSCL_STREAM_SPOOL_SEGMENT_MB,
+    MSCL_STREAM_WRITE_BACKOFF_SEC,
+    MSCL_STREAM_WRITE_INFLIGHT,
+    MSCL_STREAM_WRITE_RETRIES,
+    MSCL_STREAM_WRITE_RETRY_SEC,
 )
 
 import mscl_state as state
@@ -131,22 +178,111 @@ app = Flask(__name__)
 # Suppress Flask request logs (GET/POST lines)
 logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
-def _pause_stream_reader(seconds, reason=""):
-    try:
-        sec = max(0.0, float(seconds))
-    except Exception:
-        sec = 0.0
-    if sec <= 0:
-        return
-    until = time.time() + sec
-    prev = float(getattr(state, "STREAM_PAUSE_UNTIL", 0.0) or 0.0)
-    if until > prev:
-        state.STREAM_PAUSE_UNTIL = until
-        if reason:
-            log(f"[mscl-stream] pause {sec:.1f}s reason={reason}")
-        else:
-            log(f"[mscl-stream] pause {sec:.1f}s")
 
+@app.before_request
+def _request_timer_start():
+    g.request_t0 = time.perf_counter()
+
+
+@app.after_request
+def _request_timer_stop(response):
+    t0 = g.pop("request_t0", None)
+    if t0 is not None:
+        state.HTTP_REQUEST_HIST.observe(request.endpoint or "unknown", time.perf_counter() - t0)
+    return response
+
+STATE_SNAPSHOT = SnapshotPublisher(
+    capture_fn=lambda now: capture_state_snapshot(state=state, now=now),
+    interval_sec=MSCL_SNAPSHOT_INTERVAL_SEC,
+    log_func=log,
+)
+
+COMMAND_EXECUTOR = CommandExecutor(
+    lock=state.OP_LOCK,
+    log_func=log,
+    metric_inc=metric_inc,
+    metric_set=metric_set,
+    max_queued=MSCL_JOB_QUEUE_MAX,
+    keep_finished=MSCL_JOB_KEEP,
+    finished_ttl_sec=MSCL_JOB_TTL_SEC,
+)
+
+
+def _on_port_change(port, present):
+    metric_inc("base_hotplug_events")
+    if present:
+        log(f"[mscl-web] BaseStation port appeared: {port}")
+        state.request_reconnect()
+    else:
+        log(f"[mscl-web] BaseStation port removed: {port}")
+        mark_base_disconnected(reset_port=True)
+
+
+EXPORT_STORE = ExportStore(
+    MSCL_EXPORT_DIR,
+    max_bytes=MSCL_EXPORT_MAX_MB * 1024 * 1024,
+    max_entries=MSCL_EXPORT_KEEP,
+)
+SESSION_CACHE = SessionCache(MSCL_SESSION_CACHE_DIR) if MSCL_SESSION_CACHE_ENABLED else None
+HARVEST_CURSORS = HarvestCursorFile(MSCL_HARVEST_CURSOR_FILE)
+
+PORT_WATCHER = PortWatcher(resolve_fn=state.find_port, on_change=_on_port_change, log_func=log)
+
+
+def _submit_job(name, node_id, fn, priority=PRIORITY_INTERACTIVE, async_default=False):
+    """Queue ``fn(job)`` on the command executor and return its result.
+
+    Unless ``async_default`` is set, the request waits for the job and answers
+    with the result as before. ``?async=1`` (or ``Prefer: respond-async``)
+    answers 202 with the job id instead, ``?async=0`` waits; with
+    ``?wait=<sec>`` an async request still returns the result directly if the
+    job finished within that time (capped).
+    """
+    if wants_async_response(request.args, request.headers, default=async_default):
+        try:
+            wait_sec = min(MSCL_JOB_WAIT_MAX_SEC, max(0.0, float(request.args.get("wait") or 0.0)))
+        except ValueError:
+            wait_sec = 0.0
+    else:
+        wait_sec = None
+
+    @copy_current_request_context
+    def _job_fn(job):
+        resp = app.make_response(fn(job))
+        if resp.is_streamed:
+            # Keep the (re-iterable) body; it is generated when the result is fetched.
+            return resp.response, resp.status_code, list(resp.headers.items())
+        resp.direct_passthrough = False
+        return resp.get_data(), resp.status_code, list(resp.headers.items())
+
+    try:
+        job = COMMAND_EXECUTOR.submit(name, _job_fn, node_id=node_id, priority=priority)
+    except CommandQueueFull as e:
+        return jsonify(success=False, error=str(e)), 503
+    if wait_sec is None:
+        job.wait()
+        return _job_result_response(job)
+    if wait_sec > 0 and job.wait(wait_sec):
+        return _job_result_response(job)
+    return jsonify(
+        success=True,
+        job_id=job.id,
+        status=job.status,
+        status_url=f"/api/jobs/{job.id}",
+        result_url=f"/api/jobs/{job.id}/result",
+    ), 202
+
+
+def _job_result_response(job):
+    if job.status == JOB_FAILED:
+        return jsonify(success=False, error=job.error or "Job failed", job_id=job.id), 500
+    export_id = job.progress.get("export_id")
+    if export_id:
+        # Export results live in EXPORT_STORE and may have been evicted since.
+        if EXPORT_STORE.get(export_id, touch=False) is None:
+            return jsonify(success=False, error="Export result was evicted", export_id=export_id), 410
+    body, status_code, headers = job.result
+    return Response(body, status=status_code, headers=headers)
 
 def _parse_iso_utc_to_ns(raw_value, name):
     try:
@@ -184,6 +320,47 @@ def _persist_export_offset_ns(node_id, offset_ns):
     )
 
 
+def _load_harvest_cursor(node_id):
+    cursor = HARVEST_CURSORS.get(node_id)
+    if cursor is None:
+        # Local file lost (new volume, other host): fall back to the copy in Influx.
+        cursor = load_persisted_harvest_cursor_service(
+            node_id=node_id,
+            influx_url=INFLUX_URL,
+            influx_token=INFLUX_TOKEN,
+            influx_org=INFLUX_ORG,
+            influx_bucket=INFLUX_BUCKET,
+            measurement=MSCL_META_MEASUREMENT,
+            metric=MSCL_META_HARVEST_METRIC,
+            log_func=log,
+        )
+        if cursor is not None:
+            HARVEST_CURSORS.set(node_id, cursor)
+    return cursor
+
+
+def _save_harvest_cursor(node_id, cursor):
+    HARVEST_CURSORS.set(node_id, cursor)
+    # Callers are jobs holding OP_LOCK; a slow or unreachable Influx must not stall the radio.
+    t = threading.Thread(
+        target=persist_harvest_cursor_service,
+        kwargs={
+            "node_id": node_id,
+            "cursor": cursor,
+            "influx_url": INFLUX_URL,
+            "influx_token": INFLUX_TOKEN,
+            "influx_org": INFLUX_ORG,
+            "influx_bucket": INFLUX_BUCKET,
+            "measurement": MSCL_META_MEASUREMENT,
+            "metric": MSCL_META_HARVEST_METRIC,
+            "log_func": log,
+            "ts_ns": time.time_ns(),
+        },
+        daemon=True,
+    )
+    t.start()
+
+
 def _compute_export_clock_offset_ns(rows, node_id=None, min_skew_sec=2.0):
     return compute_export_clock_offset_ns_service(
         rows=rows,
@@ -268,6 +445,31 @@ def _stream_loop():
         resampled_enabled=MSCL_RESAMPLED_ENABLED,
         resampled_measurement=MSCL_RESAMPLED_MEASUREMENT,
         resampled_include_raw_ts=MSCL_RESAMPLED_INCLUDE_RAW_TS,
+        resampled_lateness_sec=MSCL_RESAMPLED_LATENESS_SEC,
+        resampled_max_second_samples=MSCL_RESAMPLED_MAX_SECOND_SAMPLES,
+        spool_dir=MSCL_STREAM_SPOOL_DIR if MSCL_STREAM_SPOOL_ENABLED else None,
+        spool_max_bytes=MSCL_STREAM_SPOOL_MAX_MB * 1024 * 1024,
+        spool_segment_bytes=MSCL_STREAM_SPOOL_SEGMENT_MB * 1024 * 1024,
+        spool_fsync_sec=MSCL_STREAM_SPOOL_FSYNC_SEC,
+        spool_replay_points_per_sec=MSCL_STREAM_SPOOL_REPLAY_POINTS_PER_SEC,
+        write_retry_interval_sec=MSCL_STREAM_WRITE_RETRY_SEC,
+        write_retries=MSCL_STREAM_WRITE_RETRIES,
+        write_retry_backoff_sec=MSCL_STREAM_WRITE_BACKOFF_SEC,
+        queue_max_points=MSCL_STREAM_QUEUE_MAX_POINTS,
+        queue_max_bytes=MSCL_STREAM_QUEUE_MAX_MB * 1024 * 1024,
+        queue_overflow_policy=MSCL_STREAM_QUEUE_OVERFLOW,
+        queue_block_timeout_sec=MSCL_STREAM_QUEUE_BLOCK_SEC,
+        encoder_workers=MSCL_STREAM_ENCODER_WORKERS,
+        write_inflight=MSCL_STREAM_WRITE_INFLIGHT,
+        datapoint_accessors_fn=_DatapointAccessorCache,
+        packet_time_ns_fn=_packet_time_ns,
+        read_timeout_max_ms=MSCL_STREAM_READ_TIMEOUT_MAX_MS,
+        read_lock_cap_ms=MSCL_STREAM_READ_LOCK_CAP_MS,
+        reconnect_event=state.RECONNECT_EVENT,
+        note_link_alive=state.note_link_alive,
+        stage_hist=state.STREAM_STAGE_HIST,
+        influx_write_hist=state.INFLUX_WRITE_HIST,
+        ingest_lag_hist=state.INGEST_LAG_HIST,
     )
 
 
@@ -276,6 +478,26 @@ def _start_streamer():
     t.start()
 
 
+BASE_INFO_CACHE = BaseInfoCache(volatile_refresh_sec=MSCL_BASE_INFO_REFRESH_SEC)
+
+
+def _base_info_refresh_loop():
+    while True:
+        try:
+            if BASE_INFO_CACHE.refresh_due(state.BASE_STATION):
+                # Background work: queue behind API commands like the stream reader does.
+                with state.OP_LOCK.tagged("base_info_refresh", PRIORITY_STREAM):
+                    BASE_INFO_CACHE.refresh(state.BASE_STATION)
+        except Exception as e:
+            log(f"[mscl-web] base info refresh failed: {e}")
+        time.sleep(0.5)
+
+
+def _start_base_info_refresher():
+    t = threading.Thread(target=_base_info_refresh_loop, daemon=True)
+    t.start()
+
+
 def send_idle_sensorconnect_style(node, node_id, stage_tag):
     return send_idle_sensorconnect_style_service(
         node=node,
@@ -490,34 +712,38 @@ def index():
 
 @app.route('/api/connect', methods=['POST'])
 def api_connect():
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_connect"):
         s, p = internal_connect()
         return jsonify(success=s, port=p)
 
 
 @app.route('/api/disconnect', methods=['POST'])
 def api_disconnect():
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_disconnect"):
         state.close_base_station()
         state.LAST_BASE_STATUS.update({"connected": False, "message": "Disconnected", "ts": time.strftime("%H:%M:%S")})
         return jsonify(success=True, message="Disconnected")
 
 @app.route('/api/status')
 def api_status():
-    with state.OP_LOCK:
-        payload = build_status_payload(state=state, now=time.time())
-        return jsonify(**payload)
+    snap = STATE_SNAPSHOT.current
+    payload = build_status_payload(
+        state=snap,
+        now=time.time(),
+        base_info=BASE_INFO_CACHE.get(snap.BASE_STATION),
+    )
+    return jsonify(**payload)
 
 @app.route('/api/reconnect', methods=['POST'])
 def api_reconnect():
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_reconnect"):
         mark_base_disconnected()
         ok, msg = internal_connect(force_ping=True)
         return jsonify(success=bool(ok), message=msg)
 
 @app.route('/api/beacon', methods=['POST'])
 def api_beacon():
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_beacon"):
         ok, msg = internal_connect()
         if not ok or state.BASE_STATION is None:
             return jsonify(success=False, error=f"Base station not connected: {msg}")
@@ -551,7 +777,7 @@ def api_beacon():
 
 @app.route('/api/diagnostics/<int:node_id>')
 def api_diagnostics(node_id):
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_diagnostics"):
         ok, msg = internal_connect()
         if not ok or state.BASE_STATION is None:
             return jsonify(success=False, error=f"Base station not connected: {msg}")
@@ -592,35 +818,75 @@ def api_diagnostics(node_id):
 
 @app.route('/api/logs')
 def api_logs():
-    return jsonify(logs=state.LOG_BUFFER[-state.LOG_MAX:])
+    since = request.args.get("since", default=0, type=int) or 0
+    entries, last_seq, reset = state.LOG_RING.since(since)
+    # One representation per line: ``text`` is the formatted line, not a second copy of ``msg``.
+    return jsonify(
+        entries=[{"seq": e["seq"], "ts": e["ts"], "key": e["key"], "text": format_log_entry(e)} for e in entries],
+        seq=last_seq,
+        reset=reset,
+    )
 
 @app.route('/api/metrics')
 def api_metrics():
-    metrics = metric_snapshot()
-    metrics["node_cache_size"] = len(state.NODE_READ_CACHE)
-    metrics["sampling_runs_count"] = len(state.SAMPLE_RUNS)
-    metrics["idle_in_progress_count"] = len(state.IDLE_IN_PROGRESS)
-    metrics["base_connected"] = bool(state.BASE_STATION is not None)
-    metrics["base_port"] = state.CURRENT_PORT
+    snap = STATE_SNAPSHOT.current
+    metrics = dict(snap.metrics)
+    metrics["node_cache_size"] = snap.node_cache_size
+    metrics["sampling_runs_count"] = snap.sampling_runs_count
+    metrics["idle_in_progress_count"] = snap.idle_in_progress_count
+    metrics["base_connected"] = bool(snap.BASE_STATION is not None)
+    metrics["base_port"] = snap.CURRENT_PORT
+    metrics["op_lock"] = snap.op_lock
+    metrics["op_lock_scheduler"] = snap.op_lock_scheduler
+    metrics["stream_stages"] = snap.stream_stages
+    metrics["http_requests"] = snap.http_requests
+    metrics["influx_write"] = snap.influx_write
+    metrics["ingest_lag"] = snap.ingest_lag
+    metrics["snapshot_age_sec"] = round(max(0.0, time.time() - snap.ts), 3)
     return jsonify(metrics=metrics)
 
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text format: flat metrics from the snapshot plus live latency histograms."""
+    snap = STATE_SNAPSHOT.current
+    values = dict(snap.metrics)
+    values["base_connected"] = snap.BASE_STATION is not None
+    values["snapshot_age_sec"] = round(max(0.0, time.time() - snap.ts), 3)
+    body = render_prometheus(
+        values=values,
+        histograms=[
+            ("stream_stage", "stage", state.STREAM_STAGE_HIST, "Stream pipeline stage duration."),
+            ("http_request", "endpoint", state.HTTP_REQUEST_HIST, "HTTP request handling time."),
+            ("influx_write", "kind", state.INFLUX_WRITE_HIST, "InfluxDB write round trip."),
+            ("ingest_lag", "stage", state.INGEST_LAG_HIST, "Host time minus node sample time at dequeue / Influx ack."),
+            ("op_lock_wait", "tag", state.OP_LOCK.wait_hist, "OP_LOCK wait time per caller."),
+            ("op_lock_hold", "tag", state.OP_LOCK.hold_hist, "OP_LOCK hold time per caller."),
+        ],
+    )
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
 @app.route('/api/health')
 def api_health():
-    with state.OP_LOCK:
-        payload = build_health_payload(state=state, now=time.time(), metric_snapshot_fn=metric_snapshot)
-        return jsonify(**payload)
+    payload = build_health_payload(snapshot=STATE_SNAPSHOT.current, now=time.time())
+    return jsonify(**payload)
 
 @app.route('/api/read/<int:node_id>')
 def api_read(node_id):
+    return _submit_job("api_read", node_id, lambda job: _read_node_job(node_id, job))
+
+
+def _read_node_job(node_id, job):
     read_tag = "READ"
     max_attempts = 5
     last_err = None
     log(f"[mscl-web] [{read_tag}] request node_id={node_id}")
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_read"):
         cached = state.NODE_READ_CACHE.get(node_id, {})
         refresh_eeprom = True
         for attempt in range(1, max_attempts + 1):
+            job.set_progress(attempt=attempt, max_attempts=max_attempts)
             if attempt > 1:
                 log(f"[mscl-web] [{read_tag}] retry {attempt}/{max_attempts} node_id={node_id}")
             ok, msg = internal_connect()
@@ -1267,16 +1533,16 @@ def api_read(node_id):
                 mark_base_disconnected()
                 time.sleep(0.5)
                 continue
-    if last_err:
-        log(f"[mscl-web] [{read_tag}] failed node_id={node_id}: {last_err}")
-    else:
-        log(f"[mscl-web] [{read_tag}] failed node_id={node_id}: Read failed")
-    return jsonify(success=False, error=last_err or "Read failed")
+        if last_err:
+            log(f"[mscl-web] [{read_tag}] failed node_id={node_id}: {last_err}")
+        else:
+            log(f"[mscl-web] [{read_tag}] failed node_id={node_id}: Read failed")
+        return jsonify(success=False, error=last_err or "Read failed")
 
 @app.route('/api/probe/<int:node_id>')
 def api_probe(node_id):
     log(f"[mscl-web] Probe request node_id={node_id}")
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_probe"):
         ok, msg = internal_connect()
         if not ok or state.BASE_STATION is None:
             err = f"Base station not connected: {msg}"
@@ -1312,7 +1578,7 @@ def api_probe(node_id):
 
 @app.route('/api/node_idle/<int:node_id>', methods=['POST'])
 def api_node_idle(node_id):
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_node_idle"):
         if node_id in state.IDLE_IN_PROGRESS:
             return jsonify(success=False, error="Set to Idle already in progress")
         if _is_sampling_active(node_id):
@@ -1347,7 +1613,7 @@ def api_node_idle(node_id):
 
 @app.route('/api/node_cycle_power/<int:node_id>', methods=['POST'])
 def api_node_cycle_power(node_id):
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_node_cycle_power"):
         ok, msg = internal_connect()
         if not ok or state.BASE_STATION is None:
             return jsonify(success=False, error=f"Base station not connected: {msg}")
@@ -1364,7 +1630,7 @@ def api_node_cycle_power(node_id):
 
 @app.route('/api/node_sampling/<int:node_id>', methods=['POST'])
 def api_node_sampling(node_id):
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_node_sampling"):
         body = request.json or {}
         # Backward compatibility path (old UI sent only duration_sec).
         if "duration_sec" in body:
@@ -1385,7 +1651,7 @@ def api_node_sampling(node_id):
 
 @app.route('/api/sampling/start/<int:node_id>', methods=['POST'])
 def api_sampling_start(node_id):
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_sampling_start"):
         body = request.json or {}
         res = _start_sampling_run(node_id, body)
         if not res.get("success"):
@@ -1395,7 +1661,7 @@ def api_sampling_start(node_id):
 
 @app.route('/api/sampling/stop/<int:node_id>', methods=['POST'])
 def api_sampling_stop(node_id):
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_sampling_stop"):
         ok, msg = internal_connect()
         if not ok or state.BASE_STATION is None:
             return jsonify(success=False, error=f"Base station not connected: {msg}")
@@ -1425,7 +1691,7 @@ def api_sampling_stop(node_id):
 
 @app.route('/api/sampling/status/<int:node_id>')
 def api_sampling_status(node_id):
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_sampling_status"):
         state_num = None
         state_text = "Unknown"
         freshness_reason = None
@@ -1462,7 +1728,7 @@ def api_sampling_status(node_id):
 
 @app.route('/api/node_sleep/<int:node_id>', methods=['POST'])
 def api_node_sleep(node_id):
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("api_node_sleep"):
         ok, msg = internal_connect()
         if not ok or state.BASE_STATION is None:
             return jsonify(success=False, error=f"Base station not connected: {msg}")
@@ -1479,7 +1745,11 @@ def api_node_sleep(node_id):
 
 @app.route('/api/clear_storage/<int:node_id>', methods=['POST'])
 def api_clear_storage(node_id):
-    with state.OP_LOCK:
+    return _submit_job("api_clear_storage", node_id, lambda _job: _clear_storage_job(node_id))
+
+
+def _clear_storage_job(node_id):
+    with state.OP_LOCK.tagged("api_clear_storage"):
         ok, msg = internal_connect()
         if not ok or state.BASE_STATION is None:
             return jsonify(success=False, error=f"Base station not connected: {msg}")
@@ -1489,6 +1759,9 @@ def api_clear_storage(node_id):
             node.readWriteRetries(15)
             set_idle_with_retry(node, node_id, "before-clear-storage", attempts=2, delay_sec=0.8, required=False)
             node.erase()
+            if SESSION_CACHE is not None:
+                SESSION_CACHE.invalidate(node_id)
+            _save_harvest_cursor(node_id, None)
             set_idle_with_retry(node, node_id, "after-clear-storage", attempts=2, delay_sec=0.8, required=False)
             cached = state.NODE_READ_CACHE.get(node_id, {})
             cached["storage_pct"] = 0.0
@@ -1501,7 +1774,7 @@ def api_clear_storage(node_id):
             return jsonify(success=False, error=str(e))
 
 
-@app.route('/api/export_storage/<int:node_id>')
+@app.route('/api/export_storage/<int:node_id>', methods=['GET', 'POST'])
 def api_export_storage(node_id):
     try:
         req = parse_export_storage_request(request.args, _parse_iso_utc_to_ns)
@@ -1511,13 +1784,15 @@ def api_export_storage(node_id):
     export_format = req["export_format"]
     ingest_influx = req["ingest_influx"]
     align_clock = req["align_clock"]
+    use_session_cache = req["use_session_cache"]
+    incremental = req["incremental"]
     ui_from_raw = req["ui_from_raw"]
     ui_to_raw = req["ui_to_raw"]
     ui_window_from_ns = req["ui_window_from_ns"]
     ui_window_to_ns = req["ui_window_to_ns"]
     host_hours = req["host_hours"]
 
-    with state.OP_LOCK:
+    def _export_job(job):
         ok, msg = internal_connect()
         if not ok or state.BASE_STATION is None:
             return jsonify(success=False, error=f"Base station not connected: {msg}"), 503
@@ -1535,13 +1810,16 @@ def api_export_storage(node_id):
                 state_module=state,
                 mscl_mod=mscl,
                 ensure_beacon_on_fn=ensure_beacon_on,
-                pause_stream_reader_fn=_pause_stream_reader,
+                preempt_point_fn=COMMAND_EXECUTOR.preempt_point,
+                progress_fn=job.set_progress,
                 send_idle_sensorconnect_style_fn=send_idle_sensorconnect_style,
                 coerce_logged_sweeps_fn=_coerce_logged_sweeps,
                 logged_sweep_rows_fn=_logged_sweep_rows,
+                row_file_factory=EXPORT_STORE.new_row_file,
+                save_export_fn=EXPORT_STORE.commit,
                 resolve_export_time_window_fn=resolve_export_time_window,
                 compute_export_clock_offset_ns_fn=_compute_export_clock_offset_ns,
-                filter_rows_by_host_window_fn=filter_rows_by_host_window,
+                iter_rows_in_host_window_fn=iter_rows_in_host_window,
                 backfill_rows_to_influx_stream_fn=_backfill_rows_to_influx_stream,
                 metric_inc_fn=metric_inc,
                 log_func=log,
@@ -1549,7 +1827,11 @@ def api_export_storage(node_id):
                 source_node_export=MSCL_SOURCE_NODE_EXPORT,
                 jsonify_fn=jsonify,
                 response_cls=Response,
-                send_file_fn=send_file,
+                session_cache=SESSION_CACHE,
+                use_session_cache=use_session_cache,
+                incremental=incremental,
+                load_harvest_cursor_fn=_load_harvest_cursor,
+                save_harvest_cursor_fn=_save_harvest_cursor,
             )
         except Exception as e:
             err = str(e)
@@ -1560,19 +1842,31 @@ def api_export_storage(node_id):
                 log(f"[mscl-web] [EXPORT-STORAGE] failed node_id={node_id}: {err}")
             return jsonify(success=False, error=mapped_error), int(status_code)
 
+    # POST is the job-style API and answers 202; GET keeps the old blocking download.
+    return _submit_job(
+        "api_export_storage",
+        node_id,
+        _export_job,
+        priority=PRIORITY_DOWNLOAD,
+        async_default=request.method == "POST",
+    )
+
 
 @app.route('/api/write', methods=['POST'])
 def api_write():
     data = request.json
     raw_node_id = data.get('node_id') if isinstance(data, dict) else None
     log(f"[mscl-web] Write request node_id={raw_node_id}")
-    with state.OP_LOCK:
-        cached0 = cached_node_snapshot(raw_node_id, state.NODE_READ_CACHE)
-        try:
-            node_id, _ = validate_write_request(data, cached0)
-        except WriteRequestValidationError as ve:
-            return jsonify(success=False, error=str(ve)), int(getattr(ve, "status_code", 400))
+    cached0 = cached_node_snapshot(raw_node_id, state.NODE_READ_CACHE)
+    try:
+        node_id, _ = validate_write_request(data, cached0)
+    except WriteRequestValidationError as ve:
+        return jsonify(success=False, error=str(ve)), int(getattr(ve, "status_code", 400))
+    return _submit_job("api_write", int(node_id), lambda job: _write_node_job(int(node_id), data, job))
+
 
+def _write_node_job(node_id, data, job):
+    with state.OP_LOCK.tagged("api_write"):
         def _connected_attempt():
             return apply_write_connected(
                 node_id=int(node_id),
@@ -1614,7 +1908,90 @@ def api_write():
             return res.get("response")
         return jsonify(success=False, error=res.get("error") or "Write failed")
 
+
+def _stored_export_response(export_id, export_format=None):
+    stored = EXPORT_STORE.get(export_id)
+    if stored is None:
+        return jsonify(success=False, error="Unknown or evicted export", export_id=export_id), 404
+    meta, row_file = stored
+    export_format = str(export_format or meta.get("format") or "csv").strip().lower()
+    if export_format not in ("csv", "json", "ndjson"):
+        return jsonify(success=False, error="Unsupported format. Use 'csv', 'json', or 'ndjson'."), 400
+    rows = export_rows_view(row_file, harvest_after=meta.get("harvest_after"), window=meta.get("window"))
+    return build_export_response(
+        export_format=export_format,
+        rows=rows,
+        summary=meta.get("summary") or {},
+        base_name=meta.get("base_name") or export_id,
+        response_cls=Response,
+        export_id=export_id,
+    )
+
+
+@app.route('/api/exports')
+def api_exports():
+    entries = EXPORT_STORE.entries()
+    exports = []
+    for meta in entries:
+        exports.append({
+            "export_id": meta.get("export_id"),
+            "node_id": meta.get("node_id"),
+            "format": meta.get("format"),
+            "point_count": (meta.get("summary") or {}).get("point_count"),
+            "size_bytes": meta.get("size_bytes"),
+            "created_ts": meta.get("created_ts"),
+            "last_access_ts": meta.get("last_access_ts"),
+            "url": f"/api/exports/{meta.get('export_id')}",
+        })
+    return jsonify(
+        success=True,
+        exports=exports,
+        total_bytes=sum(int(m.get("size_bytes") or 0) for m in entries),
+        max_bytes=EXPORT_STORE.max_bytes,
+    )
+
+
+@app.route('/api/exports/<export_id>', methods=['GET', 'DELETE'])
+def api_export_result(export_id):
+    if request.method == 'DELETE':
+        if not EXPORT_STORE.remove(export_id):
+            return jsonify(success=False, error="Unknown export"), 404
+        return jsonify(success=True, export_id=export_id)
+    return _stored_export_response(export_id, request.args.get("format"))
+
+
+@app.route('/api/jobs')
+def api_jobs():
+    return jsonify(success=True, jobs=[job.to_dict() for job in COMMAND_EXECUTOR.jobs()])
+
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    job = COMMAND_EXECUTOR.get(job_id)
+    if job is None:
+        return jsonify(success=False, error="Unknown job"), 404
+    return jsonify(success=True, job=job.to_dict(), result_url=f"/api/jobs/{job.id}/result")
+
+
+@app.route('/api/jobs/<job_id>/result')
+def api_job_result(job_id):
+    job = COMMAND_EXECUTOR.get(job_id)
+    if job is None:
+        return jsonify(success=False, error="Unknown job"), 404
+    if not job.finished:
+        return jsonify(success=False, error="Job not finished", job=job.to_dict()), 409
+    export_id = job.progress.get("export_id")
+    if export_id and request.args.get("format"):
+        # Same export in another format, generated from the stored row file.
+        return _stored_export_response(export_id, request.args.get("format"))
+    return _job_result_response(job)
+
 def run_config_server():
+    STATE_SNAPSHOT.start()
+    COMMAND_EXECUTOR.start()
+    EXPORT_STORE.evict()
+    PORT_WATCHER.start()
+    _start_base_info_refresher()
     _start_streamer()
     app.run(host='0.0.0.0', port=5000)
 
@@ -0,0 +1,231 @@
+import os
+import struct
+
+try:
+    from mscl_stream_helpers import ns_to_iso_utc
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_stream_helpers import ns_to_iso_utc
+
+# Column order of exported datalog rows (CSV header, JSON/NDJSON keys).
+DATALOG_ROW_COLUMNS = (
+    "timestamp_utc",
+    "timestamp_ns",
+    "node_id",
+    "session_index",
+    "sample_rate",
+    "channel",
+    "channel_id",
+    "value",
+    "tick",
+    "cal_applied",
+)
+
+_MAGIC = b"MSCLROWS1\n"
+_HEADER = struct.Struct("<i")
+# Record tag, then: string id + length (+ utf-8 bytes), or one datapoint.
+_STR = struct.Struct("<cHH")
+_ROW = struct.Struct("<cqqiiHHdb")
+_NONE_INT = -1
+_NONE_STR = 0xFFFF
+_CAL = {False: 0, True: 1, None: 2}
+_CAL_BACK = (False, True, None)
+_READ_CHUNK = 1 << 20
+
+
+def _int_or_none(value):
+    return None if value == _NONE_INT else value
+
+
+class DatalogRowFile:
+    """Datalog rows spooled to a compact append-only file instead of a list of dicts.
+
+    A row is ~37 bytes on disk; channel and sample-rate strings are interned.
+    Iterating yields the same dicts ``logged_sweep_rows`` builds and can be
+    repeated (each iteration reads the file again), so the object can stand in
+    for a row list in the offset, window and backfill helpers.
+    """
+
+    def __init__(self, path, node_id):
+        self.path = str(path)
+        self.node_id = int(node_id)
+        self.count = 0
+        self.min_timestamp_ns = None
+        self.max_timestamp_ns = None
+        self._strings = {}
+        self._fh = None
+        self.export_id = None
+
+    @classmethod
+    def create(cls, path, node_id):
+        rows = cls(path, node_id)
+        directory = os.path.dirname(rows.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        rows._fh = open(rows.path, "wb")
+        rows._fh.write(_MAGIC + _HEADER.pack(rows.node_id))
+        return rows
+
+    @classmethod
+    def open(cls, path, count=None):
+        """Read-only handle for a finished row file (``count`` is scanned if unknown)."""
+        with open(path, "rb") as fh:
+            head = fh.read(len(_MAGIC) + _HEADER.size)
+        if not head.startswith(_MAGIC) or len(head) < len(_MAGIC) + _HEADER.size:
+            raise ValueError(f"not a datalog row file: {path}")
+        (node_id,) = _HEADER.unpack_from(head, len(_MAGIC))
+        rows = cls(path, node_id)
+        rows.count = int(count) if count is not None else sum(1 for _row in iter_datalog_rows(path))
+        return rows
+
+    def _sid(self, text):
+        if text is None:
+            return _NONE_STR
+        sid = self._strings.get(text)
+        if sid is None:
+            sid = len(self._strings)
+            if sid >= _NONE_STR:
+                raise ValueError("too many distinct channel/sample-rate strings")
+            raw = str(text).encode("utf-8")
+            self._fh.write(_STR.pack(b"S", sid, len(raw)) + raw)
+            self._strings[text] = sid
+        return sid
+
+    def append_rows(self, rows):
+        write = self._fh.write
+        for row in rows:
+            ts_ns = int(row["timestamp_ns"])
+            session_index = row.get("session_index")
+            tick = row.get("tick")
+            channel_id = row.get("channel_id")
+            write(
+                _ROW.pack(
+                    b"R",
+                    ts_ns,
+                    _NONE_INT if tick is None else int(tick),
+                    _NONE_INT if session_index is None else int(session_index),
+                    _NONE_INT if channel_id is None else int(channel_id),
+                    self._sid(row.get("channel")),
+                    self._sid(row.get("sample_rate")),
+                    float(row["value"]),
+                    _CAL.get(row.get("cal_applied"), 2),
+                )
+            )
+            self.count += 1
+            if self.max_timestamp_ns is None or ts_ns > self.max_timestamp_ns:
+                self.max_timestamp_ns = ts_ns
+            if self.min_timestamp_ns is None or ts_ns < self.min_timestamp_ns:
+                self.min_timestamp_ns = ts_ns
+
+    def flush(self):
+        if self._fh is not None:
+            self._fh.flush()
+
+    def close(self):
+        fh, self._fh = self._fh, None
+        if fh is not None:
+            fh.close()
+
+    def discard(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def size_bytes(self):
+        self.flush()
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        self.flush()
+        return iter_datalog_rows(self.path)
+
+
+def iter_datalog_rows(path):
+    """Yield row dicts from a file written by DatalogRowFile."""
+    strings = {_NONE_STR: None}
+    iso_cache = (None, None)
+    with open(path, "rb") as fh:
+        head = fh.read(len(_MAGIC) + _HEADER.size)
+        if not head.startswith(_MAGIC):
+            raise ValueError(f"not a datalog row file: {path}")
+        (node_id,) = _HEADER.unpack_from(head, len(_MAGIC))
+        buf = b""
+        pos = 0
+        while True:
+            chunk = fh.read(_READ_CHUNK)
+            if not chunk:
+                break
+            buf = buf[pos:] + chunk
+            pos = 0
+            end = len(buf)
+            while pos < end:
+                tag = buf[pos : pos + 1]
+                if tag == b"R":
+                    if pos + _ROW.size > end:
+                        break
+                    _t, ts_ns, tick, session_index, channel_id, ch_sid, rate_sid, value, cal = _ROW.unpack_from(buf, pos)
+                    pos += _ROW.size
+                    if iso_cache[0] != ts_ns:
+                        iso_cache = (ts_ns, ns_to_iso_utc(ts_ns))
+                    yield {
+                        "timestamp_utc": iso_cache[1],
+                        "timestamp_ns": ts_ns,
+                        "node_id": node_id,
+                        "session_index": _int_or_none(session_index),
+                        "sample_rate": strings[rate_sid],
+                        "channel": strings[ch_sid],
+                        "channel_id": _int_or_none(channel_id),
+                        "value": value,
+                        "tick": _int_or_none(tick),
+                        "cal_applied": _CAL_BACK[cal],
+                    }
+                elif tag == b"S":
+                    if pos + _STR.size > end:
+                        break
+                    _t, sid, length = _STR.unpack_from(buf, pos)
+                    if pos + _STR.size + length > end:
+                        break
+                    start = pos + _STR.size
+                    strings[sid] = buf[start : start + length].decode("utf-8")
+                    pos = start + length
+                else:
+                    raise ValueError(f"corrupt datalog row file: {path}")
+        if pos < len(buf):
+            raise ValueError(f"truncated datalog row file: {path}")
+
+
+class RowView:
+    """Re-iterable, lazily counted view over rows produced by ``factory()``."""
+
+    def __init__(self, factory, count=None):
+        self._factory = factory
+        self._count = count
+
+    def __iter__(self):
+        return iter(self._factory())
+
+    def __len__(self):
+        if self._count is None:
+            self._count = sum(1 for _row in self._factory())
+        return self._count
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+__all__ = [
+    "DATALOG_ROW_COLUMNS",
+    "DatalogRowFile",
+    "RowView",
+    "iter_datalog_rows",
+]
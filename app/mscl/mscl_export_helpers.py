@@ -1,5 +1,10 @@
+import csv
+import io
+import json
 from datetime import datetime, timezone
-from typing import Iterable, Optional, Tuple
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+EXPORT_CHUNK_ROWS = 2000
 
 
 def parse_iso_utc_to_ns(raw_value, name):
@@ -23,7 +28,7 @@ def resolve_export_time_window(
     host_hours: Optional[float],
     now_ns: Optional[int] = None,
 ) -> Tuple[Optional[int], Optional[int], Optional[str]]:
-    if export_format not in ("csv", "json"):
+    if export_format not in ("csv", "json", "ndjson"):
         return None, None, None
 
     if ui_window_from_ns is not None and ui_window_to_ns is not None:
@@ -37,13 +42,12 @@ def resolve_export_time_window(
     return None, None, None
 
 
-def filter_rows_by_host_window(
+def iter_rows_in_host_window(
     rows: Iterable[dict],
     window_from_ns: int,
     window_to_ns: int,
     time_offset_ns: int = 0,
-) -> list:
-    out = []
+) -> Iterator[dict]:
     lo = int(window_from_ns)
     hi = int(window_to_ns)
     offset = int(time_offset_ns)
@@ -56,12 +60,88 @@ def filter_rows_by_host_window(
         except (TypeError, ValueError):
             continue
         if lo <= host_ts_ns <= hi:
-            out.append(row)
-    return out
+            yield row
+
+
+def filter_rows_by_host_window(
+    rows: Iterable[dict],
+    window_from_ns: int,
+    window_to_ns: int,
+    time_offset_ns: int = 0,
+) -> list:
+    return list(iter_rows_in_host_window(rows, window_from_ns, window_to_ns, time_offset_ns))
+
+
+class StreamBody:
+    """Response body that re-runs ``factory()`` on every iteration.
+
+    Werkzeug streams any non-list iterable; keeping the factory instead of a
+    generator lets a finished job result be downloaded more than once.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __iter__(self):
+        return iter(self._factory())
+
+
+def iter_csv_chunks(rows: Iterable[dict], columns: Sequence[str], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(columns))
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    tail = buf.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def _iter_joined(items: Iterable[str], sep: str, chunk_rows: int) -> Iterator[str]:
+    parts = []
+    for item in items:
+        parts.append(item)
+        if len(parts) >= chunk_rows:
+            yield sep.join(parts)
+            parts = []
+    if parts:
+        yield sep.join(parts)
+
+
+def iter_ndjson_chunks(rows: Iterable[dict], summary: dict, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """One JSON object per row, then a final ``{"summary": {...}}`` record."""
+    lines = (json.dumps(row, ensure_ascii=False) for row in rows)
+    for text in _iter_joined(lines, "\n", chunk_rows):
+        yield (text + "\n").encode("utf-8")
+    yield (json.dumps({"summary": summary}, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def iter_json_chunks(payload: dict, rows: Iterable[dict], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Same document as ``json.dumps({**payload, "rows": [...]})``, built chunk by chunk."""
+    head = json.dumps(payload, ensure_ascii=False)
+    yield (head[:-1] + (", " if payload else "") + '"rows": [').encode("utf-8")
+    first = True
+    for text in _iter_joined((json.dumps(row, ensure_ascii=False) for row in rows), ", ", chunk_rows):
+        yield (text if first else ", " + text).encode("utf-8")
+        first = False
+    yield b"]}"
 
 
 __all__ = [
+    "EXPORT_CHUNK_ROWS",
+    "StreamBody",
     "filter_rows_by_host_window",
+    "iter_csv_chunks",
+    "iter_json_chunks",
+    "iter_ndjson_chunks",
+    "iter_rows_in_host_window",
     "parse_iso_utc_to_ns",
     "resolve_export_time_window",
 ]
@@ -17,12 +17,14 @@ def _query_bool_from_raw(raw_value, default=False):
 
 def parse_export_storage_request(args, parse_iso_utc_to_ns_fn):
     export_format = str(args.get("format", "csv") or "csv").strip().lower()
-    if export_format not in ("csv", "json", "none"):
-        raise ExportRequestValidationError("Unsupported format. Use 'csv', 'json', or 'none'.", 400)
+    if export_format not in ("csv", "json", "ndjson", "none"):
+        raise ExportRequestValidationError("Unsupported format. Use 'csv', 'json', 'ndjson', or 'none'.", 400)
 
     ingest_influx = _query_bool_from_raw(args.get("ingest_influx"), True)
     align_clock_raw = str(args.get("align_clock", "host") or "host").strip().lower()
     align_clock = align_clock_raw not in ("none", "off", "false", "0", "no")
+    use_session_cache = _query_bool_from_raw(args.get("cache"), True)
+    incremental = _query_bool_from_raw(args.get("incremental"), False)
 
     ui_from_raw = args.get("ui_from")
     ui_to_raw = args.get("ui_to")
@@ -49,10 +51,16 @@ def parse_export_storage_request(args, parse_iso_utc_to_ns_fn):
         if host_hours <= 0:
             raise ExportRequestValidationError("host_hours must be > 0", 400)
 
+    if incremental and (ui_window_from_ns is not None or host_hours is not None):
+        # The cursor moves past every exported row; rows outside the window would never be harvested.
+        raise ExportRequestValidationError("incremental cannot be combined with ui_from/ui_to or host_hours", 400)
+
     return {
         "export_format": export_format,
         "ingest_influx": ingest_influx,
         "align_clock": align_clock,
+        "use_session_cache": use_session_cache,
+        "incremental": incremental,
         "ui_from_raw": ui_from_raw,
         "ui_to_raw": ui_to_raw,
         "ui_window_from_ns": ui_window_from_ns,
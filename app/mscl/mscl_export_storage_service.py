@@ -1,10 +1,48 @@
-import csv
-import io
-import json
 import time
 from datetime import datetime, timezone
 from typing import Any
 
+try:
+    from mscl_datalog_rows import DATALOG_ROW_COLUMNS, RowView
+    from mscl_export_helpers import (
+        StreamBody,
+        iter_csv_chunks,
+        iter_json_chunks,
+        iter_ndjson_chunks,
+        iter_rows_in_host_window,
+    )
+    from mscl_harvest_service import (
+        DownloadCheckpoint,
+        cursor_is_stale,
+        iter_rows_after_cursor,
+        last_position,
+        storage_unchanged,
+    )
+    from mscl_session_cache import SessionTracker, session_start_matches
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_datalog_rows import DATALOG_ROW_COLUMNS, RowView
+    from app.mscl_export_helpers import (
+        StreamBody,
+        iter_csv_chunks,
+        iter_json_chunks,
+        iter_ndjson_chunks,
+        iter_rows_in_host_window,
+    )
+    from app.mscl_harvest_service import (
+        DownloadCheckpoint,
+        cursor_is_stale,
+        iter_rows_after_cursor,
+        last_position,
+        storage_unchanged,
+    )
+    from app.mscl_session_cache import SessionTracker, session_start_matches
+
+_EXPORT_MIMETYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
 
 def execute_export_storage_connected(
     *,
@@ -20,13 +58,16 @@ def execute_export_storage_connected(
     state_module,
     mscl_mod,
     ensure_beacon_on_fn,
-    pause_stream_reader_fn,
+    preempt_point_fn,
+    progress_fn,
     send_idle_sensorconnect_style_fn,
     coerce_logged_sweeps_fn,
     logged_sweep_rows_fn,
+    row_file_factory,
+    save_export_fn,
     resolve_export_time_window_fn,
     compute_export_clock_offset_ns_fn,
-    filter_rows_by_host_window_fn,
+    iter_rows_in_host_window_fn,
     backfill_rows_to_influx_stream_fn,
     metric_inc_fn,
     log_func,
@@ -34,9 +75,42 @@ def execute_export_storage_connected(
     source_node_export: str,
     jsonify_fn,
     response_cls,
-    send_file_fn,
+    session_cache=None,
+    use_session_cache: bool = True,
+    incremental: bool = False,
+    load_harvest_cursor_fn=None,
+    save_harvest_cursor_fn=None,
 ):
-    pause_stream_reader_fn(4.0, f"export-storage node={node_id}")
+    """Download the node datalog and answer with it (or only backfill Influx).
+
+    Rows are spooled to the ``DatalogRowFile`` from ``row_file_factory(node_id)``
+    while downloading instead of being kept in memory; csv/json/ndjson bodies
+    are generated from that file chunk by chunk while the response is sent.
+    The response starts only after the download finished (a failed attempt
+    may still be retried); this bounds memory, not the time to first byte.
+    ``save_export_fn(rows, meta)`` keeps the finished file for later downloads
+    in any format and returns its export id.
+
+    With a ``session_cache`` the node storage fingerprint (session count and
+    percent full) is read first. If it matches the last download, the download
+    still starts, but as soon as the first sweep arrives its session index,
+    sample rate and tick are checked against the first cached session; on a
+    match the rows come from the local session files instead of the radio,
+    otherwise the node's cache is dropped and the download continues.
+
+    ``incremental`` exports only sweeps after the node's harvest cursor (last
+    session index and tick exported) and moves the cursor on success. It does
+    not make the radio download shorter: MSCL's DatalogDownloader always reads
+    node storage from the first session and has no way to seek, so old sweeps
+    are downloaded and dropped here. Only the output, the backfill and the
+    stored export shrink, and an unchanged fingerprint skips the download.
+    It must not be combined with a time window (the request parser rejects it).
+
+    A failed attempt keeps the sweeps captured so far. The next attempt
+    re-idles the node and continues with the same downloader; only if that
+    makes no progress is a new downloader created, and the sweeps up to the
+    last captured (session_index, tick) are skipped instead of stored twice.
+    """
     ensure_beacon_on_fn()
     base_station = state_module.BASE_STATION
     if base_station is None:
@@ -62,14 +136,42 @@ def execute_export_storage_connected(
     except Exception:
         pass
 
-    rows: list[dict[str, Any]] = []
+    rows = None
     sweep_count = 0
     session_count = 0
     last_download_err: Exception | None = None
+    progress_every_sec = 1.0
+    fingerprint = None
+    sessions = None
+    from_cache = False
+    cache_candidate = None
+    harvest_cursor = None
+    downloader = None
+    checkpoint = DownloadCheckpoint()
+    resume_downloader = False
+    errors_total = 0
+    if incremental and load_harvest_cursor_fn is not None:
+        harvest_cursor = load_harvest_cursor_fn(node_id)
+
+    def _download_progress(downloader, attempt):
+        try:
+            pct = float(downloader.percentComplete())
+        except Exception:
+            pct = -1.0
+        progress_fn(
+            stage="resume" if checkpoint.skipping else "download",
+            attempt=attempt,
+            sweeps=sweep_count,
+            points=len(rows),
+            pct=round(pct, 3),
+            errors=errors_total,
+        )
+        return pct
 
     try:
         for attempt in range(1, 6):
-            pause_stream_reader_fn(6.0, f"export-storage attempt={attempt} node={node_id}")
+            preempt_point_fn()
+            progress_fn(stage="prepare", attempt=attempt)
             node = mscl_mod.WirelessNode(node_id, base_station)
             node.readWriteRetries(25)
 
@@ -115,10 +217,51 @@ def execute_export_storage_connected(
 
             session_count = int(session_count_read)
             if session_count <= 0:
+                if rows is not None:
+                    rows.discard()
                 return jsonify_fn(success=False, error="No datalog sessions on node storage"), 404
 
+            if session_cache is not None or incremental:
+                fingerprint = _storage_fingerprint(node, session_count)
+            if harvest_cursor and cursor_is_stale(harvest_cursor, fingerprint):
+                log_func(
+                    f"[mscl-web] [EXPORT-STORAGE] node_id={node_id}: storage shrank since the harvest cursor "
+                    f"was taken ({harvest_cursor} -> {fingerprint}); harvesting everything"
+                )
+                harvest_cursor = None
+            if not rows and storage_unchanged(harvest_cursor, fingerprint):
+                if rows is not None:
+                    rows.discard()
+                log_func(f"[mscl-web] [EXPORT-STORAGE] node_id={node_id}: nothing new since {harvest_cursor}")
+                return jsonify_fn(
+                    success=False,
+                    error="No new datalog data since last harvest",
+                    harvest_cursor=harvest_cursor,
+                ), 404
+
+            if session_cache is not None and not rows:
+                # Only a candidate: confirmed against the first downloaded sweep below.
+                cache_candidate = session_cache.lookup(node_id, fingerprint) if use_session_cache else None
+                if cache_candidate is None and fingerprint is not None and use_session_cache:
+                    metric_inc_fn("export_session_cache_misses")
+
+            if resume_downloader and downloader is not None:
+                log_func(
+                    f"[mscl-web] [EXPORT-STORAGE] attempt {attempt}/5 node_id={node_id}: resuming download "
+                    f"after sweeps={sweep_count} points={len(rows)}"
+                )
+            else:
+                downloader = None
+            resume_downloader = False
             try:
-                downloader = mscl_mod.DatalogDownloader(node)
+                if downloader is None:
+                    downloader = mscl_mod.DatalogDownloader(node)
+                    if checkpoint.sweeps:
+                        checkpoint.restart()
+                        log_func(
+                            f"[mscl-web] [EXPORT-STORAGE] attempt {attempt}/5 node_id={node_id}: new downloader, "
+                            f"skipping {checkpoint.sweeps} captured sweeps up to {checkpoint.position}"
+                        )
             except Exception as create_exc:
                 last_download_err = create_exc
                 err_txt = str(create_exc)
@@ -132,11 +275,15 @@ def execute_export_storage_connected(
                     continue
                 raise
 
-            rows = []
-            sweep_count = 0
+            if rows is None:
+                rows = row_file_factory(node_id)
+                sessions = SessionTracker()
+            sweeps_before = checkpoint.sweeps
+            interrupted = False
             safety_loops = 0
             transient_errors = 0
             consecutive_errors = 0
+            last_progress_ts = time.monotonic()
             while not downloader.complete():
                 safety_loops += 1
                 if safety_loops > 20_000_000:
@@ -156,25 +303,43 @@ def execute_export_storage_connected(
                     if not retriable:
                         raise
                     transient_errors += 1
+                    errors_total += 1
                     consecutive_errors += 1
                     if transient_errors % 10 == 0:
                         log_func(
                             f"[mscl-web] [EXPORT-STORAGE] transient errors node_id={node_id}: "
                             f"{transient_errors}, pct={downloader.percentComplete():.3f}, last={err_txt}"
                         )
+                    if time.monotonic() - last_progress_ts >= progress_every_sec:
+                        last_progress_ts = time.monotonic()
+                        _download_progress(downloader, attempt)
                     if consecutive_errors >= 20 or transient_errors >= 400:
-                        raise RuntimeError(
+                        last_download_err = RuntimeError(
                             f"Too many transient download errors ({transient_errors}); last={err_txt}"
                         )
+                        if attempt >= 5:
+                            raise last_download_err
+                        # Keep what was captured; the next attempt re-idles the node and
+                        # continues from here (same downloader if this one still progressed).
+                        resume_downloader = checkpoint.sweeps > sweeps_before
+                        interrupted = True
+                        metric_inc_fn("export_download_resumes")
+                        log_func(
+                            f"[mscl-web] [EXPORT-STORAGE] attempt {attempt}/5 interrupted node_id={node_id}: "
+                            f"{last_download_err}; keeping sweeps={sweep_count} points={len(rows)}"
+                        )
+                        break
                     time.sleep(min(1.0, 0.08 * consecutive_errors))
                     continue
 
+                # Between pages: let queued interactive commands use the base station.
+                preempt_point_fn()
                 sweeps = coerce_logged_sweeps_fn(batch)
                 if not sweeps:
                     continue
 
+                sweeps_in_page = sweep_count
                 for sweep in sweeps:
-                    sweep_count += 1
                     try:
                         session_index = int(downloader.sessionIndex())
                     except Exception:
@@ -183,9 +348,41 @@ def execute_export_storage_connected(
                         sample_rate_text = str(downloader.sampleRate())
                     except Exception:
                         sample_rate_text = ""
-                    rows.extend(logged_sweep_rows_fn(node_id, session_index, sample_rate_text, sweep))
+                    sweep_rows = logged_sweep_rows_fn(node_id, session_index, sample_rate_text, sweep)
+                    tick = sweep_rows[0]["tick"] if sweep_rows else None
+                    if checkpoint.should_skip(session_index, tick):
+                        continue
+                    sweep_count += 1
+                    rows.append_rows(sweep_rows)
+                    sessions.add_sweep(session_index, sample_rate_text, tick, len(sweep_rows))
+                    checkpoint.record(session_index, tick)
+
+                if cache_candidate is not None and sessions.segments:
+                    if session_start_matches(cache_candidate, sessions.segments):
+                        rows.discard()
+                        rows = row_file_factory(node_id)
+                        session_cache.copy_into(cache_candidate, rows)
+                        sweep_count = sum(int(seg.get("sweeps") or 0) for seg in cache_candidate)
+                        from_cache = True
+                        metric_inc_fn("export_session_cache_hits")
+                        log_func(
+                            f"[mscl-web] [EXPORT-STORAGE] session cache hit node_id={node_id} "
+                            f"sessions={len(cache_candidate)} sweeps={sweep_count} points={len(rows)}"
+                        )
+                        progress_fn(stage="cache", sweeps=sweep_count, points=len(rows), pct=100.0)
+                        break
+                    log_func(
+                        f"[mscl-web] [EXPORT-STORAGE] session cache stale node_id={node_id}: first session "
+                        f"{sessions.segments[0]} != cached {cache_candidate[0]}; downloading"
+                    )
+                    session_cache.invalidate(node_id)
+                    metric_inc_fn("export_session_cache_misses")
+                    cache_candidate = None
 
-                if sweep_count % 500 == 0:
+                if time.monotonic() - last_progress_ts >= progress_every_sec:
+                    last_progress_ts = time.monotonic()
+                    _download_progress(downloader, attempt)
+                if sweep_count != sweeps_in_page and sweep_count % 500 == 0:
                     try:
                         pct = float(downloader.percentComplete())
                     except Exception:
@@ -195,12 +392,22 @@ def execute_export_storage_connected(
                         f"sweeps={sweep_count} points={len(rows)} pct={pct:.3f}"
                     )
 
+            if from_cache:
+                break
+            if interrupted:
+                continue
+            _download_progress(downloader, attempt)
+            downloader = None
             if rows:
                 break
             last_download_err = RuntimeError("No datapoints found in node datalog sessions")
 
         if last_download_err is not None and not rows:
             raise last_download_err
+    except BaseException:
+        if rows is not None:
+            rows.discard()
+        raise
     finally:
         try:
             if old_base_timeout is not None:
@@ -214,7 +421,28 @@ def execute_export_storage_connected(
             pass
 
     if not rows:
+        if rows is not None:
+            rows.discard()
         return jsonify_fn(success=False, error="No datapoints found in node datalog sessions"), 404
+    rows.close()
+    row_file = rows
+    if session_cache is not None and not from_cache and fingerprint is not None:
+        try:
+            session_cache.store(node_id, fingerprint, sessions.segments, row_file)
+        except Exception as cache_exc:
+            log_func(f"[mscl-web] [EXPORT-STORAGE] session cache store failed node_id={node_id}: {cache_exc}")
+
+    harvest_after = None
+    if harvest_cursor:
+        harvest_after = {"session_index": int(harvest_cursor["session_index"]), "tick": int(harvest_cursor["tick"])}
+        rows = export_rows_view(row_file, harvest_after=harvest_after)
+        if not rows:
+            row_file.discard()
+            return jsonify_fn(
+                success=False,
+                error="No new datalog data since last harvest",
+                harvest_cursor=harvest_cursor,
+            ), 404
 
     time_window_applied = False
     time_window_from_ns, time_window_to_ns, time_window_origin = resolve_export_time_window_fn(
@@ -228,16 +456,18 @@ def execute_export_storage_connected(
 
     if time_window_from_ns is not None and time_window_to_ns is not None:
         time_window_offset_ns, _ = compute_export_clock_offset_ns_fn(
-            rows, node_id=node_id, min_skew_sec=export_align_min_skew_sec
+            row_file, node_id=node_id, min_skew_sec=export_align_min_skew_sec
         )
-        rows = filter_rows_by_host_window_fn(
-            rows=rows,
-            window_from_ns=int(time_window_from_ns),
-            window_to_ns=int(time_window_to_ns),
-            time_offset_ns=int(time_window_offset_ns),
+        window_args = (int(time_window_from_ns), int(time_window_to_ns), int(time_window_offset_ns))
+        rows = export_rows_view(
+            row_file,
+            harvest_after=harvest_after,
+            window=window_args,
+            iter_rows_in_host_window_fn=iter_rows_in_host_window_fn,
         )
         time_window_applied = True
         if not rows:
+            row_file.discard()
             return jsonify_fn(
                 success=False,
                 error="No datapoints in selected time window",
@@ -253,6 +483,7 @@ def execute_export_storage_connected(
     clock_offset_ns = 0
     clock_skew_ns = 0
     if ingest_influx:
+        progress_fn(stage="backfill", points=len(rows))
         try:
             if align_clock:
                 clock_offset_ns, clock_skew_ns = compute_export_clock_offset_ns_fn(
@@ -277,11 +508,22 @@ def execute_export_storage_connected(
             backfill_error = str(bf_exc)
             log_func(f"[mscl-web] [EXPORT-STORAGE] backfill failed node_id={node_id}: {backfill_error}")
 
+    point_count = int(len(rows))
+    new_harvest_cursor = None
+    if incremental and not (ingest_influx and backfill_error):
+        new_harvest_cursor = last_position(rows)
+        if new_harvest_cursor is not None:
+            new_harvest_cursor.update(fingerprint or {})
+            if save_harvest_cursor_fn is not None:
+                try:
+                    save_harvest_cursor_fn(node_id, new_harvest_cursor)
+                except Exception as cursor_exc:
+                    log_func(f"[mscl-web] [EXPORT-STORAGE] harvest cursor save failed node_id={node_id}: {cursor_exc}")
     exported_at = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     base_name = f"node_{node_id}_datalog_{exported_at}"
     log_func(
         f"[mscl-web] [EXPORT-STORAGE] success node_id={node_id} "
-        f"sessions={session_count} sweeps={sweep_count} points={len(rows)} "
+        f"sessions={session_count} sweeps={sweep_count} points={point_count} from_cache={from_cache} "
         f"format={export_format} ingest_influx={ingest_influx} "
         f"backfill_written={backfill_written} backfill_skipped_existing={backfill_skipped_existing} "
         f"time_window_applied={time_window_applied} time_window_origin={time_window_origin} "
@@ -312,34 +554,44 @@ def execute_export_storage_connected(
             resp.headers["X-Influx-Backfill-Error"] = str(backfill_error)[:180]
         return resp
 
-    if export_format == "json":
-        payload = {
-            "node_id": int(node_id),
-            "exported_at_utc": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ"),
-            "session_count": int(session_count),
-            "sweep_count": int(sweep_count),
-            "point_count": int(len(rows)),
-            "ingest_influx": bool(ingest_influx),
-            "backfill_written": int(backfill_written),
-            "backfill_skipped_existing": int(backfill_skipped_existing),
-            "clock_offset_ns": int(clock_offset_ns),
-            "clock_skew_ns": int(clock_skew_ns),
-            "backfill_error": backfill_error,
-            "time_window_applied": bool(time_window_applied),
-            "time_window_origin": time_window_origin,
-            "ui_from": ui_from_raw,
-            "ui_to": ui_to_raw,
-            "host_hours": host_hours,
-            "time_window_offset_ns": int(time_window_offset_ns),
-            "rows": rows,
-        }
-        body = json.dumps(payload, ensure_ascii=False)
-        resp = response_cls(
-            body,
-            mimetype="application/json",
-            headers={"Content-Disposition": f"attachment; filename={base_name}.json"},
+    summary = {
+        "node_id": int(node_id),
+        "exported_at_utc": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ"),
+        "session_count": int(session_count),
+        "sweep_count": int(sweep_count),
+        "point_count": point_count,
+        "from_session_cache": bool(from_cache),
+        "incremental": bool(incremental),
+        "harvested_after": harvest_after,
+        "harvest_cursor": new_harvest_cursor,
+        "ingest_influx": bool(ingest_influx),
+        "backfill_written": int(backfill_written),
+        "backfill_skipped_existing": int(backfill_skipped_existing),
+        "clock_offset_ns": int(clock_offset_ns),
+        "clock_skew_ns": int(clock_skew_ns),
+        "backfill_error": backfill_error,
+        "time_window_applied": bool(time_window_applied),
+        "time_window_origin": time_window_origin,
+        "ui_from": ui_from_raw,
+        "ui_to": ui_to_raw,
+        "host_hours": host_hours,
+        "time_window_offset_ns": int(time_window_offset_ns),
+    }
+    export_id = None
+    try:
+        export_id = save_export_fn(
+            row_file,
+            {
+                "format": export_format,
+                "base_name": base_name,
+                "window": list(window_args) if time_window_applied else None,
+                "harvest_after": harvest_after,
+                "summary": summary,
+            },
         )
-        return _attach_export_headers(resp)
+    except Exception as save_exc:
+        log_func(f"[mscl-web] [EXPORT-STORAGE] keeping export failed node_id={node_id}: {save_exc}")
+    progress_fn(stage="done", sweeps=sweep_count, points=point_count, export_id=export_id)
 
     if export_format == "none":
         if ingest_influx and backfill_error:
@@ -349,18 +601,19 @@ def execute_export_storage_connected(
                 node_id=int(node_id),
                 session_count=int(session_count),
                 sweep_count=int(sweep_count),
-                point_count=int(len(rows)),
+                point_count=point_count,
                 backfill_written=int(backfill_written),
                 backfill_skipped_existing=int(backfill_skipped_existing),
                 clock_offset_ns=int(clock_offset_ns),
                 clock_skew_ns=int(clock_skew_ns),
+                export_id=export_id,
             ), 502
         return jsonify_fn(
             success=True,
             node_id=int(node_id),
             session_count=int(session_count),
             sweep_count=int(sweep_count),
-            point_count=int(len(rows)),
+            point_count=point_count,
             ingest_influx=bool(ingest_influx),
             backfill_written=int(backfill_written),
             backfill_skipped_existing=int(backfill_skipped_existing),
@@ -373,32 +626,67 @@ def execute_export_storage_connected(
             ui_to=ui_to_raw,
             host_hours=host_hours,
             time_window_offset_ns=int(time_window_offset_ns),
+            export_id=export_id,
+            harvest_cursor=new_harvest_cursor,
         )
 
-    csv_columns = [
-        "timestamp_utc",
-        "timestamp_ns",
-        "node_id",
-        "session_index",
-        "sample_rate",
-        "channel",
-        "channel_id",
-        "value",
-        "tick",
-        "cal_applied",
-    ]
-    csv_buf = io.StringIO()
-    writer = csv.DictWriter(csv_buf, fieldnames=csv_columns)
-    writer.writeheader()
-    writer.writerows(rows)
-    csv_bytes = csv_buf.getvalue().encode("utf-8")
-    resp = send_file_fn(
-        io.BytesIO(csv_bytes),
-        mimetype="text/csv; charset=utf-8",
-        as_attachment=True,
-        download_name=f"{base_name}.csv",
+    resp = build_export_response(
+        export_format=export_format,
+        rows=rows,
+        summary=summary,
+        base_name=base_name,
+        response_cls=response_cls,
+        export_id=export_id,
     )
     return _attach_export_headers(resp)
 
 
-__all__ = ["execute_export_storage_connected"]
+def export_rows_view(row_file, *, harvest_after=None, window=None, iter_rows_in_host_window_fn=iter_rows_in_host_window):
+    """Rows of ``row_file`` after the harvest cursor and inside the host time window."""
+    if not harvest_after and not window:
+        return row_file
+
+    def _rows():
+        rows = row_file
+        if harvest_after:
+            rows = iter_rows_after_cursor(rows, harvest_after)
+        if window:
+            rows = iter_rows_in_host_window_fn(rows, *window)
+        return rows
+
+    return RowView(_rows)
+
+
+def _storage_fingerprint(node, session_count):
+    """Cheap description of the node's datalog storage, or None if it cannot be read.
+
+    ``percentFull()`` is kept unrounded: a few sweeps appended to the last
+    session may change it only in the later decimals.
+    """
+    try:
+        percent_full = float(node.percentFull())
+    except Exception:
+        return None
+    return {"session_count": int(session_count), "percent_full": percent_full}
+
+
+def build_export_response(*, export_format, rows, summary, base_name, response_cls, export_id=None):
+    """Streamed csv/json/ndjson response generated from ``rows`` while it is sent."""
+    if export_format == "json":
+        body = StreamBody(lambda: iter_json_chunks(summary, rows))
+    elif export_format == "ndjson":
+        body = StreamBody(lambda: iter_ndjson_chunks(rows, summary))
+    else:
+        body = StreamBody(lambda: iter_csv_chunks(rows, DATALOG_ROW_COLUMNS))
+    headers = {
+        "Content-Disposition": f"attachment; filename={base_name}.{export_format}",
+        "X-Export-Session-Count": str(int(summary.get("session_count") or 0)),
+        "X-Export-Sweep-Count": str(int(summary.get("sweep_count") or 0)),
+        "X-Export-Point-Count": str(int(summary.get("point_count") or 0)),
+    }
+    if export_id:
+        headers["X-Export-Id"] = str(export_id)
+    return response_cls(body, mimetype=_EXPORT_MIMETYPES[export_format], headers=headers)
+
+
+__all__ = ["build_export_response", "execute_export_storage_connected", "export_rows_view"]
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    from mscl_datalog_rows import DatalogRowFile
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_datalog_rows import DatalogRowFile
+
+_ROWS_SUFFIX = ".rows"
+_META_SUFFIX = ".json"
+
+
+class ExportStore:
+    """Finished datalog exports kept on disk as row file + JSON metadata.
+
+    Entries survive restarts and are evicted least-recently-used first once
+    there are more than ``max_entries`` or their row files exceed ``max_bytes``.
+    The metadata file's mtime is the access time.
+    """
+
+    def __init__(self, directory, *, max_bytes, max_entries=20, now_fn=time.time):
+        self.directory = str(directory)
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_entries = max(1, int(max_entries))
+        self._now_fn = now_fn
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.evicted = 0
+
+    def _rows_path(self, export_id):
+        return os.path.join(self.directory, f"{export_id}{_ROWS_SUFFIX}")
+
+    def _meta_path(self, export_id):
+        return os.path.join(self.directory, f"{export_id}{_META_SUFFIX}")
+
+    @staticmethod
+    def _valid_id(export_id):
+        return bool(export_id) and all(ch.isalnum() or ch in "-_" for ch in str(export_id))
+
+    def new_row_file(self, node_id):
+        """Row file for a download in progress; becomes an entry on ``commit()``."""
+        export_id = f"node{int(node_id)}-{time.strftime('%Y%m%dT%H%M%S', time.gmtime(self._now_fn()))}-{uuid.uuid4().hex[:6]}"
+        rows = DatalogRowFile.create(self._rows_path(export_id), node_id)
+        rows.export_id = export_id
+        with self._lock:
+            self._pending.add(export_id)
+        return rows
+
+    def commit(self, rows, meta):
+        """Store ``meta`` next to a finished row file and evict old entries; returns the export id."""
+        rows.close()
+        export_id = rows.export_id
+        meta = {
+            **meta,
+            "export_id": export_id,
+            "node_id": rows.node_id,
+            "point_count_total": len(rows),
+            "size_bytes": rows.size_bytes(),
+            "created_ts": self._now_fn(),
+        }
+        path = self._meta_path(export_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            self._pending.discard(export_id)
+        self.evict(keep=export_id)
+        return export_id
+
+    def get(self, export_id, *, touch=True):
+        """``(meta, rows)`` for a stored export, or None. Marks it as recently used."""
+        if not self._valid_id(export_id):
+            return None
+        path = self._meta_path(export_id)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if touch:
+                os.utime(path)
+        except (OSError, ValueError):
+            return None
+        rows_path = self._rows_path(export_id)
+        if not os.path.exists(rows_path):
+            return None
+        return meta, DatalogRowFile.open(rows_path, count=meta.get("point_count_total"))
+
+    def remove(self, export_id):
+        if not self._valid_id(export_id):
+            return False
+        removed = False
+        for path in (self._meta_path(export_id), self._rows_path(export_id)):
+            try:
+                os.remove(path)
+                removed = True
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def entries(self):
+        """Metadata of stored exports, most recently used first."""
+        out = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return out
+        for name in names:
+            if not name.endswith(_META_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    meta = json.load(fh)
+                meta["last_access_ts"] = os.path.getmtime(path)
+            except (OSError, ValueError):
+                continue
+            out.append(meta)
+        out.sort(key=lambda m: m["last_access_ts"], reverse=True)
+        return out
+
+    def total_bytes(self):
+        return sum(int(m.get("size_bytes") or 0) for m in self.entries())
+
+    def evict(self, keep=None):
+        """Drop orphaned row files, then least-recently-used entries over the limits."""
+        with self._lock:
+            self._pending = {p for p in self._pending if os.path.exists(self._rows_path(p))}
+            pending = set(self._pending)
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                return 0
+            for name in names:
+                if not name.endswith(_ROWS_SUFFIX):
+                    continue
+                export_id = name[: -len(_ROWS_SUFFIX)]
+                if export_id in pending or os.path.exists(self._meta_path(export_id)):
+                    continue
+                # Left behind by a download that never finished (e.g. restart).
+                self.remove(export_id)
+            entries = self.entries()
+            total = sum(int(m.get("size_bytes") or 0) for m in entries)
+            removed = 0
+            while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+                victim = entries.pop()
+                if victim.get("export_id") == keep:
+                    # Never drop the export that was just stored, even if it is over the limit alone.
+                    entries.insert(0, victim)
+                    if len(entries) == 1:
+                        break
+                    continue
+                self.remove(victim.get("export_id"))
+                total -= int(victim.get("size_bytes") or 0)
+                removed += 1
+            self.evicted += removed
+            return removed
+
+
+__all__ = ["ExportStore"]
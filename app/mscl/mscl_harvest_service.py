@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import time
+
+# Cursor fields persisted to the meta measurement (one field each, so they do
+# not collide with the integer "value" field of the clock offset metric).
+_CURSOR_FIELDS = ("session_index", "tick", "session_count", "percent_full")
+
+
+def position_key(session_index, tick):
+    """Sortable (session_index, tick) position of a logged sweep."""
+    return (int(session_index) if session_index is not None else -1, int(tick) if tick is not None else -1)
+
+
+def is_after_cursor(cursor, session_index, tick):
+    """True if a sweep at (session_index, tick) was not harvested yet."""
+    if not cursor or session_index is None or tick is None:
+        return True
+    return position_key(session_index, tick) > position_key(cursor.get("session_index"), cursor.get("tick"))
+
+
+def iter_rows_after_cursor(rows, cursor):
+    for row in rows:
+        if is_after_cursor(cursor, row.get("session_index"), row.get("tick")):
+            yield row
+
+
+def last_position(rows):
+    """Highest (session_index, tick) in ``rows`` as a cursor dict, or None."""
+    best = None
+    for row in rows:
+        session_index = row.get("session_index")
+        tick = row.get("tick")
+        if session_index is None or tick is None:
+            continue
+        key = (int(session_index), int(tick))
+        if best is None or key > best:
+            best = key
+    if best is None:
+        return None
+    return {"session_index": best[0], "tick": best[1]}
+
+
+def cursor_is_stale(cursor, fingerprint):
+    """The node storage shrank since the cursor was taken, i.e. it was erased."""
+    if not cursor or not fingerprint:
+        return False
+    for field in ("session_count", "percent_full"):
+        old = cursor.get(field)
+        new = fingerprint.get(field)
+        if old is not None and new is not None and float(new) < float(old):
+            return True
+    return False
+
+
+def storage_unchanged(cursor, fingerprint):
+    """True only if the node storage is exactly as it was when ``cursor`` was taken.
+
+    Both the session count and the unrounded ``percentFull()`` value must be
+    known and equal; anything less is treated as "may have new data".
+    """
+    if not cursor or not fingerprint:
+        return False
+    for field in ("session_count", "percent_full"):
+        old = cursor.get(field)
+        new = fingerprint.get(field)
+        if old is None or new is None or float(old) != float(new):
+            return False
+    return True
+
+
+class DownloadCheckpoint:
+    """How far a datalog download got, so a retry does not capture sweeps twice.
+
+    ``record()`` is called for every captured sweep. After ``restart()`` (a new
+    DatalogDownloader that starts from the first sweep again) ``should_skip()``
+    drops sweeps up to the checkpoint: by (session_index, tick) when both are
+    known, otherwise by their position in the download.
+    """
+
+    def __init__(self):
+        self.sweeps = 0
+        self.position = None
+        self.skipped = 0
+        self._seen = 0
+        self._skip_count = 0
+        self._boundary = None
+
+    def record(self, session_index, tick):
+        self.sweeps += 1
+        if session_index is not None and tick is not None:
+            self.position = {"session_index": int(session_index), "tick": int(tick)}
+
+    def restart(self):
+        self._seen = 0
+        self._skip_count = self.sweeps
+        self._boundary = self.position
+
+    @property
+    def skipping(self):
+        return self._skip_count > 0
+
+    def should_skip(self, session_index, tick):
+        if self._skip_count <= 0:
+            return False
+        self._seen += 1
+        if self._boundary is not None and session_index is not None and tick is not None:
+            skip = not is_after_cursor(self._boundary, session_index, tick)
+        else:
+            skip = self._seen <= self._skip_count
+        if skip:
+            self.skipped += 1
+        else:
+            # Past the checkpoint: everything from here on is new.
+            self._skip_count = 0
+        return skip
+
+
+class HarvestCursorFile:
+    """Per-node harvest cursors in a small local JSON file."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, node_id):
+        with self._lock:
+            return self._read().get(str(int(node_id)))
+
+    def set(self, node_id, cursor):
+        with self._lock:
+            data = self._read()
+            if cursor is None:
+                data.pop(str(int(node_id)), None)
+            else:
+                data[str(int(node_id))] = dict(cursor)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as fh:
+                json.dump(data, fh)
+            os.replace(self.path + ".tmp", self.path)
+
+
+def cursor_fields(cursor):
+    """Influx fields for ``cursor``; all of them are always written.
+
+    ``None`` (a reset) and unknown fingerprint values are written as -1, so
+    every point is a complete record on its own.
+    """
+    cursor = cursor or {}
+    session_count = cursor.get("session_count")
+    percent_full = cursor.get("percent_full")
+    return {
+        "session_index": int(cursor.get("session_index", -1)),
+        "tick": int(cursor.get("tick", -1)),
+        "session_count": -1 if session_count is None else int(session_count),
+        "percent_full": -1.0 if percent_full is None else float(percent_full),
+    }
+
+
+def cursor_from_fields(fields):
+    """Inverse of ``cursor_fields``; None for a reset marker or an incomplete record."""
+    try:
+        if any(fields.get(name) is None for name in _CURSOR_FIELDS):
+            return None
+        session_index = int(fields["session_index"])
+        if session_index < 0:
+            return None
+        session_count = int(fields["session_count"])
+        percent_full = float(fields["percent_full"])
+        return {
+            "session_index": session_index,
+            "tick": int(fields["tick"]),
+            "session_count": session_count if session_count >= 0 else None,
+            "percent_full": percent_full if percent_full >= 0 else None,
+        }
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def load_persisted_harvest_cursor(
+    node_id,
+    influx_url,
+    influx_token,
+    influx_org,
+    influx_bucket,
+    measurement,
+    metric,
+    log_func,
+):
+    if not all([influx_token, influx_org, influx_bucket]):
+        return None
+    node_tag = str(int(node_id))
+    bucket_q = json.dumps(influx_bucket)
+    measurement_q = json.dumps(measurement)
+    node_q = json.dumps(node_tag)
+    metric_q = json.dumps(metric)
+    fields_q = json.dumps(list(_CURSOR_FIELDS))
+    # One row per write, newest first: fields of different writes are never mixed.
+    flux = (
+        f'from(bucket: {bucket_q})\n'
+        f'  |> range(start: -3650d)\n'
+        f'  |> filter(fn: (r) => r._measurement == {measurement_q})\n'
+        f'  |> filter(fn: (r) => contains(value: r._field, set: {fields_q}))\n'
+        f'  |> filter(fn: (r) => r.node_id == {node_q})\n'
+        f'  |> filter(fn: (r) => r.metric == {metric_q})\n'
+        f'  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")\n'
+        f'  |> group()\n'
+        f'  |> sort(columns: ["_time"], desc: true)\n'
+        f'  |> limit(n: 1)'
+    )
+    fields = None
+    try:
+        from influxdb_client import InfluxDBClient  # type: ignore
+
+        with InfluxDBClient(url=influx_url, token=influx_token, org=influx_org) as db_client:
+            for rec in db_client.query_api().query_stream(query=flux, org=influx_org):
+                fields = getattr(rec, "values", {}) or {}
+                break
+    except Exception as e:
+        log_func(f"[mscl-web] [EXPORT-STORAGE] harvest-cursor-load failed node_id={node_id}: {e}")
+        return None
+    if fields is None:
+        return None
+    return cursor_from_fields(fields)
+
+
+def persist_harvest_cursor(
+    node_id,
+    cursor,
+    influx_url,
+    influx_token,
+    influx_org,
+    influx_bucket,
+    measurement,
+    metric,
+    log_func,
+    ts_ns=None,
+):
+    """Write ``cursor`` to the meta measurement; ``None`` writes a reset marker.
+
+    ``ts_ns`` is the point time (default: now). Pass the time the cursor was
+    taken when writing from a background thread, so the newest record wins.
+    """
+    if not all([influx_token, influx_org, influx_bucket]):
+        return
+    try:
+        node_tag = str(int(node_id))
+        fields = cursor_fields(cursor)
+    except Exception:
+        return
+    try:
+        from influxdb_client import InfluxDBClient, Point  # type: ignore
+        from influxdb_client.client.write_api import SYNCHRONOUS  # type: ignore
+        from influxdb_client.domain.write_precision import WritePrecision  # type: ignore
+
+        point = Point(measurement).tag("node_id", node_tag).tag("metric", metric)
+        for name in _CURSOR_FIELDS:
+            point = point.field(name, fields[name])
+        point = point.time(time.time_ns() if ts_ns is None else int(ts_ns), WritePrecision.NS)
+        with InfluxDBClient(url=influx_url, token=influx_token, org=influx_org) as db_client:
+            db_client.write_api(write_options=SYNCHRONOUS).write(influx_bucket, influx_org, [point])
+    except Exception as e:
+        log_func(f"[mscl-web] [EXPORT-STORAGE] harvest-cursor-persist failed node_id={node_id}: {e}")
+
+
+__all__ = [
+    "DownloadCheckpoint",
+    "HarvestCursorFile",
+    "cursor_fields",
+    "cursor_from_fields",
+    "cursor_is_stale",
+    "is_after_cursor",
+    "iter_rows_after_cursor",
+    "last_position",
+    "load_persisted_harvest_cursor",
+    "persist_harvest_cursor",
+    "position_key",
+    "storage_unchanged",
+]
@@ -1,34 +1,59 @@
-def build_health_payload(*, state, now, metric_snapshot_fn):
-    connected = bool(state.BASE_STATION is not None)
+# The reader waits briefly behind every API call; only longer waits count as paused.
+STREAM_PAUSED_AFTER_SEC = 1.0
+# A snapshot this old means the publisher thread is stuck.
+SNAPSHOT_STALE_AFTER_SEC = 5.0
+# p99 of (Influx ack time - node sample time) over the last minute; above this the write path lags.
+INGEST_LAG_WARN_SEC = 30.0
+
+
+def build_health_payload(*, snapshot, now):
+    """Health from a StateSnapshot (mscl_state_snapshot); never touches OP_LOCK."""
+    connected = bool(snapshot.BASE_STATION is not None)
+    # Stream packets confirm the link as well as a ping does; the reader only pings when quiet.
+    alive_ts = max(float(snapshot.LAST_PING_OK_TS or 0.0), float(snapshot.LAST_PACKET_TS or 0.0))
     ping_age_sec = None
-    if state.LAST_PING_OK_TS:
-        ping_age_sec = max(0.0, now - float(state.LAST_PING_OK_TS))
+    if alive_ts:
+        ping_age_sec = max(0.0, now - alive_ts)
+    packet_age_sec = None
+    if snapshot.LAST_PACKET_TS:
+        packet_age_sec = max(0.0, now - float(snapshot.LAST_PACKET_TS))
 
-    stream_pause_until = float(getattr(state, "STREAM_PAUSE_UNTIL", 0.0) or 0.0)
-    stream_paused = now < stream_pause_until
-    queue_depth = int(metric_snapshot_fn().get("stream_queue_depth", 0))
+    stream_wait_sec = float(snapshot.stream_wait_sec or 0.0)
+    stream_paused = stream_wait_sec >= STREAM_PAUSED_AFTER_SEC
+    queue_depth = int((snapshot.metrics or {}).get("stream_queue_depth", 0))
+    snapshot_age_sec = max(0.0, now - float(snapshot.ts or now))
+    ingest_lag_p99_sec = float(snapshot.ingest_lag_p99_sec or 0.0)
 
     status = "ok"
     reasons = []
     if not connected:
         status = "degraded"
         reasons.append("base_disconnected")
-    if ping_age_sec is not None and ping_age_sec > float(state.PING_TTL_SEC):
+    if ping_age_sec is not None and ping_age_sec > float(snapshot.PING_TTL_SEC):
         status = "degraded"
         reasons.append("ping_stale")
     if stream_paused:
         status = "degraded"
         reasons.append("stream_paused")
+    if snapshot_age_sec > SNAPSHOT_STALE_AFTER_SEC:
+        status = "degraded"
+        reasons.append("snapshot_stale")
+    if ingest_lag_p99_sec > INGEST_LAG_WARN_SEC:
+        status = "degraded"
+        reasons.append("ingest_lag_high")
 
     return {
         "status": status,
         "ts": int(now),
         "connected": connected,
-        "base_port": state.CURRENT_PORT,
+        "base_port": snapshot.CURRENT_PORT,
         "ping_age_sec": round(ping_age_sec, 3) if ping_age_sec is not None else None,
-        "ping_ttl_sec": float(state.PING_TTL_SEC),
+        "ping_ttl_sec": float(snapshot.PING_TTL_SEC),
+        "packet_age_sec": round(packet_age_sec, 3) if packet_age_sec is not None else None,
         "stream_paused": bool(stream_paused),
-        "stream_pause_remaining_sec": round(max(0.0, stream_pause_until - now), 3),
+        "stream_wait_sec": round(stream_wait_sec, 3),
         "stream_queue_depth": queue_depth,
+        "snapshot_age_sec": round(snapshot_age_sec, 3),
+        "ingest_lag_p99_sec": round(ingest_lag_p99_sec, 3),
         "reasons": reasons,
     }
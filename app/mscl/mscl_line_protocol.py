@@ -0,0 +1,104 @@
+import math
+
+# Same escaping as influxdb_client.client.write.point (_ESCAPE_MEASUREMENT, _ESCAPE_KEY and
+# _escape_tag_value): backslashes are kept as-is, a trailing one gets a space appended.
+_ESCAPE_MEASUREMENT = str.maketrans({",": r"\,", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+_ESCAPE_TAG = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+
+
+def _escape_tag_value(value):
+    escaped = str(value).translate(_ESCAPE_TAG)
+    if escaped.endswith("\\"):
+        escaped += " "
+    return escaped
+
+
+def format_float_field(value):
+    """Float field text as influxdb_client.Point renders it (None for NaN/inf)."""
+    if not math.isfinite(value):
+        return None
+    s = repr(float(value))
+    if s.endswith(".0"):
+        s = s[:-2]
+    return s.encode("ascii")
+
+
+class LineProtocolEncoder:
+    """Line-protocol writer with cached, pre-escaped measurement+tag prefixes.
+
+    Lines are appended to one reusable ``bytearray``; ``take()`` returns the
+    payload for ``write_api.write(..., record=payload)`` and resets the buffer.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.lines = 0
+        self._prefixes = {}
+
+    def prefix(self, measurement, node_id, channel, source, time_model=None):
+        key = (measurement, node_id, channel, source, time_model)
+        cached = self._prefixes.get(key)
+        if cached is None:
+            # Tags sorted by key and empty values skipped, like Point does.
+            parts = [str(measurement).translate(_ESCAPE_MEASUREMENT)]
+            for tag_key, tag_value in (
+                ("channel", channel),
+                ("node_id", node_id),
+                ("source", source),
+                ("time_model", time_model),
+            ):
+                if tag_value is None or str(tag_value) == "":
+                    continue
+                parts.append(f"{tag_key}={_escape_tag_value(tag_value)}")
+            cached = self._prefixes[key] = ",".join(parts).encode("utf-8")
+        return cached
+
+    def add(self, prefix, value, t_ns, raw_ts_ns=None):
+        value_txt = format_float_field(value)
+        if raw_ts_ns is None:
+            if value_txt is None:
+                return False
+            self.buffer += b"%s value=%s %d\n" % (prefix, value_txt, t_ns)
+        elif value_txt is None:
+            self.buffer += b"%s raw_ts_ns=%di %d\n" % (prefix, raw_ts_ns, t_ns)
+        else:
+            self.buffer += b"%s raw_ts_ns=%di,value=%s %d\n" % (prefix, raw_ts_ns, value_txt, t_ns)
+        self.lines += 1
+        return True
+
+    def add_series(
+        self,
+        *,
+        measurement,
+        source,
+        node_ids,
+        channels,
+        node_idx,
+        channel_idx,
+        values,
+        times,
+        order=None,
+        raw_times=None,
+        time_model=None,
+    ):
+        """Encode columnar rows; ``order`` picks/permutes rows matching ``times``."""
+        prefixes = {}
+        add = self.add
+        rows = range(len(times)) if order is None else order
+        for i, t_ns in zip(rows, times):
+            series = (node_idx[i] << 16) | channel_idx[i]
+            prefix = prefixes.get(series)
+            if prefix is None:
+                prefix = prefixes[series] = self.prefix(
+                    measurement, node_ids[node_idx[i]], channels[channel_idx[i]], source, time_model
+                )
+            add(prefix, values[i], t_ns, None if raw_times is None else raw_times[i])
+
+    def take(self):
+        payload = bytes(self.buffer)
+        self.buffer.clear()
+        self.lines = 0
+        return payload
+
+
+__all__ = ["LineProtocolEncoder", "format_float_field"]
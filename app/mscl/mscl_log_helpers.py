@@ -0,0 +1,139 @@
+import collections
+import itertools
+import queue
+import sys
+import threading
+import time
+
+
+class LogRing:
+    """Bounded in-memory log with monotonically increasing sequence numbers.
+
+    Readers keep the last ``seq`` they saw and ask for ``since(seq)``; entries
+    that fell off the ring are reported through ``reset`` instead of silently skipped.
+    """
+
+    def __init__(self, maxlen=200, *, now_fn=time.time):
+        self.maxlen = max(1, int(maxlen))
+        self._entries = collections.deque(maxlen=self.maxlen)
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._now_fn = now_fn
+        self.last_seq = 0
+
+    def append(self, msg, *, key=None):
+        ts = self._now_fn()
+        with self._lock:
+            seq = next(self._seq)
+            self._entries.append({"seq": seq, "ts": ts, "key": key, "msg": str(msg)})
+            self.last_seq = seq
+        return seq
+
+    def since(self, seq=0, limit=None):
+        """``(entries, last_seq, reset)`` for entries newer than ``seq``.
+
+        ``reset`` is True when ``seq`` is older than the ring (entries were lost)
+        or newer than anything logged (the process restarted).
+        """
+        seq = max(0, int(seq))
+        with self._lock:
+            last_seq = self.last_seq
+            first_seq = self._entries[0]["seq"] if self._entries else last_seq + 1
+            reset = seq > last_seq or (seq > 0 and seq < first_seq - 1)
+            if reset:
+                seq = 0
+            entries = [e for e in self._entries if e["seq"] > seq] if seq < last_seq else []
+        if limit is not None and len(entries) > limit:
+            entries = entries[-int(limit):]
+        return entries, last_seq, reset
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def format_log_entry(entry):
+    return f"{time.strftime('%H:%M:%S', time.localtime(entry['ts']))} {entry['msg']}"
+
+
+class KeyRateLimiter:
+    """Lets one message per key through every ``interval_sec`` and counts the rest."""
+
+    def __init__(self, interval_sec=5.0, *, now_fn=time.monotonic):
+        self.interval_sec = max(0.0, float(interval_sec))
+        self._now_fn = now_fn
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """``(allowed, suppressed_since_last)``; messages without a key always pass."""
+        if key is None or self.interval_sec <= 0:
+            return True, 0
+        now = self._now_fn()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval_sec:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False, 0
+            self._last[key] = now
+            return True, self._suppressed.pop(key, 0)
+
+
+class StdoutLogWriter:
+    """Writes log lines to a stream from a background thread.
+
+    ``write()`` never blocks: lines go to a bounded queue and are dropped (and
+    counted) when the consumer of stdout cannot keep up.
+    """
+
+    def __init__(self, *, stream=None, max_queued=10000):
+        self._stream = stream
+        self._queue = queue.Queue(maxsize=max(1, int(max_queued)))
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+
+    def write(self, line):
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="mscl-log-writer", daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout=1.0):
+        """Wait until queued lines were written (tests and shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def _run(self):
+        while True:
+            lines = [self._queue.get()]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            dropped, self.dropped = self.dropped, 0
+            if dropped:
+                lines.append(f"[mscl-web] log writer dropped {dropped} lines")
+            stream = self._stream or sys.stdout
+            try:
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+            except Exception:
+                pass
+            finally:
+                for _ in range(len(lines) - (1 if dropped else 0)):
+                    self._queue.task_done()
+
+
+__all__ = ["KeyRateLimiter", "LogRing", "StdoutLogWriter", "format_log_entry"]
@@ -0,0 +1,228 @@
+import bisect
+import threading
+
+# Seconds; the implicit last bucket is +Inf.
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+# For sub-millisecond work such as stream pipeline stages and HTTP handlers.
+FAST_LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025) + DEFAULT_LATENCY_BUCKETS[:-2]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (seconds) with Prometheus-style quantile estimates."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        seconds = max(0.0, float(seconds))
+        idx = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[idx] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def observe_many(self, values):
+        """Observe several values (seconds) under one lock acquisition."""
+        idxs = []
+        total = 0.0
+        peak = 0.0
+        for seconds in values:
+            seconds = max(0.0, float(seconds))
+            idxs.append(bisect.bisect_left(self.buckets, seconds))
+            total += seconds
+            if seconds > peak:
+                peak = seconds
+        if not idxs:
+            return
+        with self._lock:
+            for idx in idxs:
+                self._counts[idx] += 1
+            self.count += len(idxs)
+            self.sum += total
+            if peak > self.max:
+                self.max = peak
+
+    def cumulative_counts(self):
+        """``[(upper_bound, cumulative_count), ...]`` ending with ``(inf, count)``."""
+        with self._lock:
+            counts = list(self._counts)
+        out = []
+        total = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+    def quantile(self, q):
+        return _quantile(self.cumulative_counts(), q, self.max)
+
+    def snapshot(self):
+        with self._lock:
+            count = self.count
+            total = self.sum
+            peak = self.max
+        return {
+            "count": count,
+            "sum_sec": round(total, 6),
+            "avg_sec": round(total / count, 6) if count else 0.0,
+            "p50_sec": round(self.quantile(0.5), 6),
+            "p90_sec": round(self.quantile(0.9), 6),
+            "p99_sec": round(self.quantile(0.99), 6),
+            "max_sec": round(peak, 6),
+        }
+
+
+def _quantile(cumulative, q, overflow_value):
+    # Linear interpolation inside the bucket holding the rank; +Inf reports overflow_value.
+    total = cumulative[-1][1]
+    if not total:
+        return 0.0
+    rank = float(q) * total
+    lower_bound = 0.0
+    lower_count = 0
+    for bound, count in cumulative:
+        if count >= rank:
+            if bound == float("inf"):
+                return overflow_value
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return overflow_value
+
+
+class HistogramWindow:
+    """Quantiles of a LatencyHistogram over roughly the last ``window_sec``.
+
+    Keeps cumulative bucket counts from earlier calls and subtracts the oldest
+    one still inside the window, so a recent slowdown is not diluted by hours
+    of history. Call it periodically (e.g. from the snapshot publisher).
+    """
+
+    def __init__(self, hist, window_sec=60.0):
+        self.hist = hist
+        self.window_sec = max(0.1, float(window_sec))
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def quantile(self, q, now):
+        current = self.hist.cumulative_counts()
+        with self._lock:
+            self._samples.append((now, current))
+            while len(self._samples) > 2 and self._samples[1][0] <= now - self.window_sec:
+                self._samples.pop(0)
+            _ts, baseline = self._samples[0]
+        if baseline is current:
+            baseline = [(bound, 0) for bound, _count in current]
+        window = [(bound, count - base) for (bound, count), (_b, base) in zip(current, baseline)]
+        return _quantile(window, q, self.hist.max)
+
+
+class HistogramFamily:
+    """Histograms created on first use, keyed by a label (e.g. caller tag)."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._items = {}
+
+    def get(self, label):
+        hist = self._items.get(label)
+        if hist is None:
+            with self._lock:
+                hist = self._items.get(label)
+                if hist is None:
+                    hist = self._items[label] = LatencyHistogram(self._buckets)
+        return hist
+
+    def observe(self, label, seconds):
+        self.get(label).observe(seconds)
+
+    def items(self):
+        with self._lock:
+            return sorted(self._items.items())
+
+    def snapshot(self):
+        return {label: hist.snapshot() for label, hist in self.items()}
+
+
+def _prom_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def prometheus_name(name):
+    """Metric name with characters Prometheus does not allow replaced by ``_``."""
+    out = "".join(c if c.isalnum() or c in "_:" else "_" for c in str(name))
+    return out if out and not out[0].isdigit() else f"_{out}"
+
+
+def render_prometheus(*, values=None, histograms=(), prefix="mscl_"):
+    """Prometheus text exposition (format 0.0.4).
+
+    ``values``: flat ``{name: number}`` (bools as 0/1; other types are skipped),
+    exported untyped as the app does not distinguish counters from gauges.
+    ``histograms``: ``[(name, label, HistogramFamily, help), ...]``; each family
+    member becomes one labelled series of ``<prefix><name>_seconds``.
+    """
+    lines = []
+    for name, value in sorted((values or {}).items()):
+        if isinstance(value, bool):
+            value = int(value)
+        if not isinstance(value, (int, float)):
+            continue
+        metric = prometheus_name(prefix + name)
+        lines.append(f"# TYPE {metric} untyped")
+        lines.append(f"{metric} {_prom_number(value)}")
+    for name, label, family, help_text in histograms:
+        metric = prometheus_name(f"{prefix}{name}_seconds")
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for label_value, hist in family.items():
+            lv = f'{label}="{_prom_escape(label_value)}"'
+            cumulative = hist.cumulative_counts()
+            for bound, count in cumulative:
+                lines.append(f'{metric}_bucket{{{lv},le="{_prom_number(bound)}"}} {count}')
+            lines.append(f"{metric}_sum{{{lv}}} {_prom_number(float(hist.sum))}")
+            lines.append(f"{metric}_count{{{lv}}} {cumulative[-1][1]}")
+    return "\n".join(lines) + "\n"
+
+
+__all__ = [
+    "DEFAULT_LATENCY_BUCKETS",
+    "FAST_LATENCY_BUCKETS",
+    "HistogramFamily",
+    "HistogramWindow",
+    "LatencyHistogram",
+    "prometheus_name",
+    "render_prometheus",
+]
@@ -0,0 +1,230 @@
+import fcntl
+import heapq
+import itertools
+import os
+import threading
+import time
+
+try:
+    from mscl_metrics_helpers import HistogramFamily
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_metrics_helpers import HistogramFamily
+
+DEFAULT_TAG = "other"
+
+# Lower value wins the lock first; equal priorities are served in arrival order.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DOWNLOAD = 1
+PRIORITY_STREAM = 2
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_DOWNLOAD: "download",
+    PRIORITY_STREAM: "stream",
+}
+
+
+class _TaggedAcquire:
+    __slots__ = ("_lock", "_tag", "_priority")
+
+    def __init__(self, lock, tag, priority):
+        self._lock = lock
+        self._tag = tag
+        self._priority = priority
+
+    def __enter__(self):
+        self._lock.acquire(self._tag, self._priority)
+        return self._lock
+
+    def __exit__(self, _exc_type, _exc, _tb):
+        self._lock.release()
+
+
+class SharedOpLock:
+    """Thread + process lock to serialize BaseStation access across containers.
+
+    Within the process the lock is a priority scheduler: on release it is handed
+    to the waiting thread with the best priority class (interactive commands,
+    then datalog downloads, then the live stream reader), FIFO within a class.
+    Long holders call ``yield_if_preempted()`` at safe points to let a better
+    class in. Across processes it is a plain ``flock`` on a lock file that is
+    opened once per process.
+
+    Wait and hold times of outermost acquisitions are recorded per caller tag;
+    use ``with OP_LOCK.tagged("api_read"):`` to name the caller (plain
+    ``with OP_LOCK:`` is tagged ``"other"`` at interactive priority).
+    """
+
+    def __init__(self, lock_path):
+        self._lock_path = lock_path
+        self._cond = threading.Condition(threading.Lock())
+        self._waiters = []
+        self._seq = itertools.count()
+        self._owner = None
+        self._depth = 0
+        self._tag = None
+        self._priority = None
+        self._acquired = 0.0
+        self._fh = None
+        self.acquisitions = 0
+        self.preemptions = 0
+        self.wait_hist = HistogramFamily()
+        self.hold_hist = HistogramFamily()
+
+    def tagged(self, tag, priority=PRIORITY_INTERACTIVE):
+        return _TaggedAcquire(self, tag, priority)
+
+    def __enter__(self):
+        self.acquire(DEFAULT_TAG)
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb):
+        self.release()
+
+    def acquire(self, tag=DEFAULT_TAG, priority=PRIORITY_INTERACTIVE):
+        me = threading.get_ident()
+        t0 = time.perf_counter()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                return
+            entry = (int(priority), next(self._seq), t0)
+            heapq.heappush(self._waiters, entry)
+            try:
+                while self._owner is not None or self._waiters[0] is not entry:
+                    self._cond.wait()
+            except BaseException:
+                # Interrupted while queued: leave the queue, wake the next waiter.
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiters)
+            self._owner = me
+            self._depth = 1
+        try:
+            self._flock(fcntl.LOCK_EX)
+        except BaseException:
+            self._hand_off()
+            raise
+        acquired = time.perf_counter()
+        self.acquisitions += 1
+        self._tag = tag
+        self._priority = int(priority)
+        self._acquired = acquired
+        self.wait_hist.observe(tag, acquired - t0)
+
+    def release(self):
+        if self._owner != threading.get_ident():
+            raise RuntimeError("OP_LOCK released by a thread that does not hold it")
+        self._depth -= 1
+        if self._depth:
+            return
+        try:
+            self.hold_hist.observe(self._tag or DEFAULT_TAG, time.perf_counter() - self._acquired)
+            self._flock(fcntl.LOCK_UN)
+        finally:
+            self._hand_off()
+
+    def _hand_off(self):
+        with self._cond:
+            self._owner = None
+            self._depth = 0
+            self._tag = None
+            self._priority = None
+            self._cond.notify_all()
+
+    def preempt_pending(self, priority=None):
+        """True when a thread of a better priority class than ``priority`` is queued."""
+        if priority is None:
+            priority = self._priority if self._priority is not None else PRIORITY_STREAM
+        try:
+            return self._waiters[0][0] < priority
+        except IndexError:
+            return False
+
+    def yield_if_preempted(self):
+        """Pre-emption point: hand the lock to a better class, then take it back.
+
+        Only call this from the holder, where BaseStation state is consistent.
+        Returns True if the lock was given away.
+        """
+        if self._owner != threading.get_ident() or not self.preempt_pending():
+            return False
+        tag, priority, depth = self._tag, self._priority, self._depth
+        self._depth = 1
+        self.release()
+        self.acquire(tag, priority)
+        self._depth = depth
+        self.preemptions += 1
+        return True
+
+    def wait_age_sec(self, priority):
+        """How long the oldest queued thread of ``priority`` has been waiting."""
+        with self._cond:
+            starts = [t0 for prio, _seq, t0 in self._waiters if prio == priority]
+        if not starts:
+            return 0.0
+        return max(0.0, time.perf_counter() - min(starts))
+
+    def status(self):
+        with self._cond:
+            owner = self._owner is not None
+            tag, priority, acquired = self._tag, self._priority, self._acquired
+            waiting = {}
+            for prio, _seq, _t0 in self._waiters:
+                name = PRIORITY_NAMES.get(prio, str(prio))
+                waiting[name] = waiting.get(name, 0) + 1
+        return {
+            "holder": tag if owner else None,
+            "holder_class": PRIORITY_NAMES.get(priority, priority) if owner else None,
+            "held_sec": round(time.perf_counter() - acquired, 6) if owner and tag is not None else 0.0,
+            "waiting": waiting,
+            "preemptions": self.preemptions,
+        }
+
+    def stats(self):
+        """``{tag: {"wait": {...}, "hold": {...}}}`` histogram summaries."""
+        out = {}
+        for tag, snap in self.wait_hist.snapshot().items():
+            out.setdefault(tag, {})["wait"] = snap
+        for tag, snap in self.hold_hist.snapshot().items():
+            out.setdefault(tag, {})["hold"] = snap
+        return out
+
+    def _flock(self, op):
+        # Only the owning thread gets here, so the shared fd needs no extra locking.
+        if self._fh is None:
+            self._open()
+        try:
+            fcntl.flock(self._fh.fileno(), op)
+        except (OSError, ValueError):
+            if op == fcntl.LOCK_UN:
+                raise
+            # Broken fd: reopen the lock file once and retry.
+            self._close()
+            self._open()
+            fcntl.flock(self._fh.fileno(), op)
+
+    def _open(self):
+        lock_dir = os.path.dirname(self._lock_path)
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        self._fh = open(self._lock_path, "a+", encoding="utf-8")
+
+    def _close(self):
+        fh, self._fh = self._fh, None
+        if fh is not None:
+            try:
+                fh.close()
+            except OSError:
+                pass
+
+
+__all__ = [
+    "DEFAULT_TAG",
+    "PRIORITY_DOWNLOAD",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_NAMES",
+    "PRIORITY_STREAM",
+    "SharedOpLock",
+]
@@ -0,0 +1,147 @@
+import ctypes
+import ctypes.util
+import glob
+import os
+import select
+import threading
+import time
+
+SERIAL_BY_ID_GLOB = "/dev/serial/by-id/*"
+SERIAL_DEV_GLOBS = ("/dev/ttyACM*", "/dev/ttyUSB*")
+
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_ATTRIB = 0x00000004
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+
+def resolve_port(configured=None, *, glob_fn=glob.glob, exists_fn=os.path.exists):
+    """Serial port to open, preferring stable ``/dev/serial/by-id`` names.
+
+    A configured path (``MSCL_PORT``) wins while it exists; otherwise the first
+    by-id entry, then the first ttyACM/ttyUSB node. Returns None if nothing is plugged in.
+    """
+    if configured and exists_fn(configured):
+        return configured
+    by_id = sorted(glob_fn(SERIAL_BY_ID_GLOB))
+    if by_id:
+        return by_id[0]
+    for pattern in SERIAL_DEV_GLOBS:
+        ports = sorted(glob_fn(pattern))
+        if ports:
+            return ports[0]
+    return None
+
+
+def _device_key(port):
+    # A re-plugged device gets a new device node, so a fast replug still looks like a change.
+    if port is None:
+        return None
+    try:
+        st = os.stat(port)
+    except OSError:
+        return (port, None)
+    return (port, st.st_ino, st.st_rdev)
+
+
+def _inotify_fd(watch_dirs):
+    """Non-blocking inotify fd watching ``watch_dirs`` for device nodes, or None."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    watched = 0
+    for path in watch_dirs:
+        if libc.inotify_add_watch(fd, os.fsencode(path), _IN_CREATE | _IN_DELETE | _IN_ATTRIB) >= 0:
+            watched += 1
+    if not watched:
+        os.close(fd)
+        return None
+    return fd
+
+
+class PortWatcher:
+    """Calls ``on_change(port, present)`` when the base-station port appears or vanishes.
+
+    Wakes on inotify events for ``/dev`` (new tty nodes) and polls every
+    ``poll_interval_sec`` as a fallback, e.g. for by-id links udev adds a little
+    after the node.
+    """
+
+    def __init__(
+        self,
+        *,
+        resolve_fn,
+        on_change,
+        log_func=None,
+        watch_dirs=("/dev",),
+        poll_interval_sec=0.25,
+    ):
+        self._resolve_fn = resolve_fn
+        self._on_change = on_change
+        self._log = log_func
+        self._watch_dirs = watch_dirs
+        self.poll_interval_sec = max(0.02, float(poll_interval_sec))
+        self.port = None
+        self._key = None
+        self.events = 0
+        self.inotify = False
+        self._thread = None
+
+    def check(self):
+        port = self._resolve_fn()
+        key = _device_key(port)
+        if key == self._key:
+            return False
+        previous, self.port, self._key = self.port, port, key
+        self.events += 1
+        if previous is not None:
+            self._on_change(previous, False)
+        if port is not None:
+            self._on_change(port, True)
+        return True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.port = self._resolve_fn()
+        self._key = _device_key(self.port)
+        self._thread = threading.Thread(target=self._run, name="mscl-port-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        fd = _inotify_fd(self._watch_dirs)
+        self.inotify = fd is not None
+        if self._log is not None:
+            mode = "inotify" if self.inotify else f"polling every {self.poll_interval_sec:.2f}s"
+            self._log(f"[mscl-web] port watcher started ({mode}) port={self.port}")
+        while True:
+            try:
+                if fd is not None:
+                    ready, _, _ = select.select([fd], [], [], self.poll_interval_sec)
+                    if ready:
+                        self._drain(fd)
+                else:
+                    time.sleep(self.poll_interval_sec)
+                self.check()
+            except Exception as e:
+                if self._log is not None:
+                    self._log(f"[mscl-web] port watcher error: {e}")
+                time.sleep(self.poll_interval_sec)
+
+    @staticmethod
+    def _drain(fd):
+        # Event contents do not matter; the port is re-resolved after every wakeup.
+        while True:
+            try:
+                if not os.read(fd, 4096):
+                    return
+            except BlockingIOError:
+                return
+
+
+__all__ = ["PortWatcher", "resolve_port"]
@@ -0,0 +1,92 @@
+import time
+
+
+class AdaptiveReadTimeout:
+    """getData() timeout that follows the observed packet arrival rate.
+
+    The timeout is ``wait_factor`` expected inter-arrival times, clamped to
+    [min_ms, max_ms]: idle reads back off towards ``max_ms`` (fewer wakeups and
+    lock acquisitions), busy reads stay at ``min_ms`` so the BaseStation lock is
+    not held waiting between bursts. The rate is an EWMA of packets per second.
+
+    Only ``lock_ms`` (at most ``lock_cap_ms``) of the timeout is spent inside
+    ``getData()`` holding the BaseStation lock; the rest, ``unlocked_wait_sec``,
+    is slept after releasing it, so an interactive command never waits longer
+    than the cap for the reader.
+    """
+
+    def __init__(self, *, min_ms=20, max_ms=250, alpha=0.2, wait_factor=2.0, lock_cap_ms=50):
+        self.min_ms = max(1, int(min_ms))
+        self.max_ms = max(self.min_ms, int(max_ms))
+        self.lock_cap_ms = max(1, int(lock_cap_ms))
+        self.alpha = min(1.0, max(0.01, float(alpha)))
+        self.wait_factor = max(0.1, float(wait_factor))
+        self.rate_pps = None
+        self.timeout_ms = self.min_ms
+
+    def update(self, packets, elapsed_sec):
+        """Record one read cycle; return the timeout to use for the next read."""
+        elapsed_sec = max(1e-3, float(elapsed_sec))
+        sample = max(0, int(packets)) / elapsed_sec
+        if self.rate_pps is None:
+            self.rate_pps = sample
+        else:
+            self.rate_pps += self.alpha * (sample - self.rate_pps)
+        if self.rate_pps <= 0:
+            wanted = self.max_ms
+        else:
+            wanted = 1000.0 * self.wait_factor / self.rate_pps
+        self.timeout_ms = int(min(self.max_ms, max(self.min_ms, wanted)))
+        return self.timeout_ms
+
+    @property
+    def lock_ms(self):
+        return min(self.timeout_ms, self.lock_cap_ms)
+
+    @property
+    def unlocked_wait_sec(self):
+        return (self.timeout_ms - self.lock_ms) / 1000.0
+
+
+class ThreadCpuMeter:
+    """CPU% of the calling thread between ``sample()`` calls (create it in that thread)."""
+
+    def __init__(self, now_fn=time.monotonic, cpu_fn=time.thread_time):
+        self._now_fn = now_fn
+        self._cpu_fn = cpu_fn
+        self._last_wall = now_fn()
+        self._last_cpu = cpu_fn()
+
+    def sample(self):
+        wall = self._now_fn()
+        cpu = self._cpu_fn()
+        d_wall = wall - self._last_wall
+        d_cpu = cpu - self._last_cpu
+        self._last_wall = wall
+        self._last_cpu = cpu
+        if d_wall <= 0:
+            return 0.0
+        return round(100.0 * max(0.0, d_cpu) / d_wall, 2)
+
+
+class RateMeter:
+    """Per-second rate of a monotonically increasing counter between samples."""
+
+    def __init__(self, now_fn=time.monotonic):
+        self._now_fn = now_fn
+        self._last_ts = None
+        self._last_total = 0
+
+    def sample(self, total):
+        now = self._now_fn()
+        total = int(total)
+        if self._last_ts is None or now <= self._last_ts:
+            rate = 0.0
+        else:
+            rate = max(0, total - self._last_total) / (now - self._last_ts)
+        self._last_ts = now
+        self._last_total = total
+        return round(rate, 2)
+
+
+__all__ = ["AdaptiveReadTimeout", "RateMeter", "ThreadCpuMeter"]
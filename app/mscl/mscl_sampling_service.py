@@ -245,7 +245,7 @@ def schedule_idle_after(
     if seconds <= 0:
         return
     time.sleep(seconds)
-    with state.OP_LOCK:
+    with state.OP_LOCK.tagged("sampling_auto_idle"):
         if state.SAMPLE_STOP_TOKENS.get(node_id) != token:
             return
         ok, msg = internal_connect()
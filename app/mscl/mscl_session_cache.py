@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+
+try:
+    from mscl_datalog_rows import DatalogRowFile
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_datalog_rows import DatalogRowFile
+
+_ROWS_SUFFIX = ".rows"
+
+
+def session_key(node_id, session_index, sample_rate, first_tick, sweep_count):
+    """Content address of one downloaded datalog session."""
+    raw = json.dumps([int(node_id), session_index, str(sample_rate or ""), first_tick, int(sweep_count)])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def session_start_matches(cached_segments, segments):
+    """True if a download's first session starts like the first cached session.
+
+    Compares the per-session key fields readable from the first downloaded
+    sweep (session index, sample rate, first tick).
+    """
+    if not cached_segments or not segments:
+        return False
+    cached, seg = cached_segments[0], segments[0]
+    return all(cached.get(k) == seg.get(k) for k in ("session_index", "sample_rate", "first_tick"))
+
+
+class SessionTracker:
+    """Splits the downloaded sweep stream into sessions while it is written.
+
+    A new segment starts whenever ``session_index`` or ``sample_rate`` changes;
+    each segment remembers its first tick and how many sweeps/rows it has.
+    """
+
+    def __init__(self):
+        self.segments = []
+
+    def add_sweep(self, session_index, sample_rate, tick, point_count):
+        seg = self.segments[-1] if self.segments else None
+        if seg is None or (seg["session_index"], seg["sample_rate"]) != (session_index, sample_rate):
+            seg = {"session_index": session_index, "sample_rate": sample_rate, "first_tick": tick, "sweeps": 0, "points": 0}
+            self.segments.append(seg)
+        if seg["first_tick"] is None:
+            seg["first_tick"] = tick
+        seg["sweeps"] += 1
+        seg["points"] += int(point_count)
+
+
+class SessionCache:
+    """Downloaded datalog sessions kept as one row file per session key.
+
+    A per-node manifest lists the node's sessions in download order together
+    with a storage fingerprint (session count, percent full) read before the
+    download. ``lookup()`` only returns candidates for a matching fingerprint;
+    the export confirms them against the node's first session (see
+    ``session_start_matches``) before serving the local files.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self._lock = threading.Lock()
+
+    def _manifest_path(self, node_id):
+        return os.path.join(self.directory, f"node_{int(node_id)}.json")
+
+    def _rows_path(self, key):
+        return os.path.join(self.directory, f"{key}{_ROWS_SUFFIX}")
+
+    def lookup(self, node_id, fingerprint):
+        """Cached segments for ``node_id`` if the fingerprint still matches, else None."""
+        if not fingerprint:
+            return None
+        try:
+            with open(self._manifest_path(node_id), "r", encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("fingerprint") != fingerprint:
+            return None
+        segments = manifest.get("sessions") or []
+        if not segments or not all(os.path.exists(self._rows_path(seg["key"])) for seg in segments):
+            return None
+        return segments
+
+    def copy_into(self, segments, rows):
+        """Append the cached rows of ``segments`` to ``rows`` (a DatalogRowFile)."""
+        for seg in segments:
+            rows.append_rows(DatalogRowFile.open(self._rows_path(seg["key"]), count=seg.get("points")))
+
+    def store(self, node_id, fingerprint, segments, rows):
+        """Split a finished download into per-session files and record the manifest."""
+        if not fingerprint or not segments:
+            return []
+        os.makedirs(self.directory, exist_ok=True)
+        stored = []
+        row_iter = iter(rows)
+        for seg in segments:
+            key = session_key(node_id, seg["session_index"], seg["sample_rate"], seg["first_tick"], seg["sweeps"])
+            count = int(seg["points"])
+            path = self._rows_path(key)
+            if os.path.exists(path):
+                for _ in range(count):
+                    next(row_iter)
+            else:
+                part = DatalogRowFile.create(path + ".tmp", node_id)
+                part.append_rows(next(row_iter) for _ in range(count))
+                part.close()
+                os.replace(path + ".tmp", path)
+            stored.append({**seg, "key": key})
+        manifest = {"node_id": int(node_id), "fingerprint": fingerprint, "sessions": stored}
+        path = self._manifest_path(node_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh)
+        os.replace(path + ".tmp", path)
+        self._gc()
+        return stored
+
+    def invalidate(self, node_id):
+        """Forget the node's sessions (e.g. after its storage was erased)."""
+        try:
+            os.remove(self._manifest_path(node_id))
+        except FileNotFoundError:
+            pass
+        return self._gc()
+
+    def _gc(self):
+        """Remove session files no manifest refers to."""
+        with self._lock:
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                return 0
+            referenced = set()
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name), "r", encoding="utf-8") as fh:
+                        referenced.update(seg.get("key") for seg in json.load(fh).get("sessions") or [])
+                except (OSError, ValueError):
+                    continue
+            removed = 0
+            for name in names:
+                if name.endswith(_ROWS_SUFFIX) and name[: -len(_ROWS_SUFFIX)] not in referenced:
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                        removed += 1
+                    except OSError:
+                        pass
+            return removed
+
+
+__all__ = ["SessionCache", "SessionTracker", "session_key", "session_start_matches"]
@@ -37,24 +37,61 @@ MSCL_MEASUREMENT = os.getenv("MSCL_MEASUREMENT", "mscl_sensors")
 MSCL_ONLY_CHANNEL_1 = _env_bool("MSCL_ONLY_CHANNEL_1", False)
 MSCL_STREAM_ENABLED = _env_bool("MSCL_STREAM_ENABLED", True)
 MSCL_STREAM_READ_TIMEOUT_MS = _env_int("MSCL_STREAM_READ_TIMEOUT_MS", 20)
+MSCL_STREAM_READ_TIMEOUT_MAX_MS = _env_int("MSCL_STREAM_READ_TIMEOUT_MAX_MS", 250)
+MSCL_STREAM_READ_LOCK_CAP_MS = _env_int("MSCL_STREAM_READ_LOCK_CAP_MS", 50)
 MSCL_STREAM_IDLE_SLEEP = _env_float("MSCL_STREAM_IDLE_SLEEP", 0.005)
 MSCL_STREAM_BATCH_SIZE = _env_int("MSCL_STREAM_BATCH_SIZE", 5000)
 MSCL_STREAM_FLUSH_INTERVAL_MS = _env_int("MSCL_STREAM_FLUSH_INTERVAL_MS", 500)
 MSCL_STREAM_QUEUE_MAX = _env_int("MSCL_STREAM_QUEUE_MAX", 5000)
 MSCL_STREAM_QUEUE_WAIT_MS = _env_int("MSCL_STREAM_QUEUE_WAIT_MS", 200)
+MSCL_STREAM_QUEUE_MAX_POINTS = _env_int("MSCL_STREAM_QUEUE_MAX_POINTS", 200000)
+MSCL_STREAM_QUEUE_MAX_MB = _env_int("MSCL_STREAM_QUEUE_MAX_MB", 64)
+MSCL_STREAM_QUEUE_OVERFLOW = os.getenv("MSCL_STREAM_QUEUE_OVERFLOW", "drop_oldest")
+MSCL_STREAM_QUEUE_BLOCK_SEC = _env_float("MSCL_STREAM_QUEUE_BLOCK_SEC", 5.0)
 MSCL_STREAM_DROP_WARN_SEC = _env_float("MSCL_STREAM_DROP_WARN_SEC", 30.0)
 MSCL_STREAM_DROP_LOG_THROTTLE_SEC = _env_float("MSCL_STREAM_DROP_LOG_THROTTLE_SEC", 30.0)
 MSCL_STREAM_LOG_INTERVAL_SEC = _env_float("MSCL_STREAM_LOG_INTERVAL_SEC", 5.0)
+MSCL_STREAM_ENCODER_WORKERS = _env_int("MSCL_STREAM_ENCODER_WORKERS", 1)
+MSCL_STREAM_WRITE_INFLIGHT = _env_int("MSCL_STREAM_WRITE_INFLIGHT", 2)
+MSCL_STREAM_WRITE_RETRY_SEC = _env_float("MSCL_STREAM_WRITE_RETRY_SEC", 5.0)
+MSCL_STREAM_WRITE_RETRIES = _env_int("MSCL_STREAM_WRITE_RETRIES", 3)
+MSCL_STREAM_WRITE_BACKOFF_SEC = _env_float("MSCL_STREAM_WRITE_BACKOFF_SEC", 0.5)
+MSCL_STREAM_SPOOL_ENABLED = _env_bool("MSCL_STREAM_SPOOL_ENABLED", True)
+MSCL_STREAM_SPOOL_DIR = os.getenv("MSCL_STREAM_SPOOL_DIR", "/var/lib/mscl/spool")
+MSCL_STREAM_SPOOL_MAX_MB = _env_int("MSCL_STREAM_SPOOL_MAX_MB", 512)
+MSCL_STREAM_SPOOL_SEGMENT_MB = _env_int("MSCL_STREAM_SPOOL_SEGMENT_MB", 8)
+MSCL_STREAM_SPOOL_FSYNC_SEC = _env_float("MSCL_STREAM_SPOOL_FSYNC_SEC", 1.0)
+MSCL_STREAM_SPOOL_REPLAY_POINTS_PER_SEC = _env_float("MSCL_STREAM_SPOOL_REPLAY_POINTS_PER_SEC", 20000.0)
 MSCL_RESAMPLED_ENABLED = _env_bool("MSCL_RESAMPLED_ENABLED", True)
 MSCL_RESAMPLED_MEASUREMENT = os.getenv("MSCL_RESAMPLED_MEASUREMENT", "mscl_sensors_resampled")
 MSCL_RESAMPLED_INCLUDE_RAW_TS = _env_bool("MSCL_RESAMPLED_INCLUDE_RAW_TS", True)
+MSCL_RESAMPLED_LATENESS_SEC = _env_float("MSCL_RESAMPLED_LATENESS_SEC", 2.0)
+MSCL_RESAMPLED_MAX_SECOND_SAMPLES = _env_int("MSCL_RESAMPLED_MAX_SECOND_SAMPLES", 8192)
 
 MSCL_EXPORT_ALIGN_MIN_SKEW_SEC = _env_float("MSCL_EXPORT_ALIGN_MIN_SKEW_SEC", 2.0)
 MSCL_EXPORT_OFFSET_RECALC_THRESHOLD_SEC = _env_float("MSCL_EXPORT_OFFSET_RECALC_THRESHOLD_SEC", 3.0)
 MSCL_EXPORT_OFFSET_RECALC_MAX_SKEW_SEC = _env_float("MSCL_EXPORT_OFFSET_RECALC_MAX_SKEW_SEC", 30.0)
 MSCL_EXPORT_INFLUX_BATCH = _env_int("MSCL_EXPORT_INFLUX_BATCH", 5000)
+MSCL_EXPORT_DIR = os.getenv("MSCL_EXPORT_DIR", "/var/lib/mscl/exports")
+MSCL_EXPORT_MAX_MB = _env_int("MSCL_EXPORT_MAX_MB", 512)
+MSCL_EXPORT_KEEP = _env_int("MSCL_EXPORT_KEEP", 20)
+MSCL_SESSION_CACHE_ENABLED = _env_bool("MSCL_SESSION_CACHE_ENABLED", True)
+MSCL_SESSION_CACHE_DIR = os.getenv("MSCL_SESSION_CACHE_DIR", "/var/lib/mscl/exports/sessions")
+MSCL_HARVEST_CURSOR_FILE = os.getenv("MSCL_HARVEST_CURSOR_FILE", "/var/lib/mscl/exports/harvest_cursors.state")
+
+MSCL_SNAPSHOT_INTERVAL_SEC = _env_float("MSCL_SNAPSHOT_INTERVAL_SEC", 0.5)
+MSCL_BASE_INFO_REFRESH_SEC = _env_float("MSCL_BASE_INFO_REFRESH_SEC", 5.0)
+
+MSCL_JOB_QUEUE_MAX = _env_int("MSCL_JOB_QUEUE_MAX", 32)
+MSCL_JOB_KEEP = _env_int("MSCL_JOB_KEEP", 64)
+MSCL_JOB_TTL_SEC = _env_float("MSCL_JOB_TTL_SEC", 900.0)
+MSCL_JOB_WAIT_MAX_SEC = _env_float("MSCL_JOB_WAIT_MAX_SEC", 60.0)
+
+MSCL_LOG_MAX = _env_int("MSCL_LOG_MAX", 500)
+MSCL_LOG_KEY_INTERVAL_SEC = _env_float("MSCL_LOG_KEY_INTERVAL_SEC", 5.0)
 
 MSCL_SOURCE_RADIO = os.getenv("MSCL_SOURCE_RADIO", "mscl_config_stream")
 MSCL_SOURCE_NODE_EXPORT = os.getenv("MSCL_SOURCE_NODE_EXPORT", "mscl_node_export")
 MSCL_META_MEASUREMENT = os.getenv("MSCL_META_MEASUREMENT", "mscl_meta")
 MSCL_META_OFFSET_METRIC = "node_export_clock_offset_ns"
+MSCL_META_HARVEST_METRIC = "datalog_harvest_cursor"
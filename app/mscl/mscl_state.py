@@ -1,5 +1,3 @@
-import fcntl
-import glob
 import os
 import threading
 import time
@@ -7,57 +5,36 @@ from datetime import datetime, timezone
 from typing import Any
 
 from mscl_constants import mscl
+from mscl_log_helpers import KeyRateLimiter, LogRing, StdoutLogWriter
+from mscl_metrics_helpers import FAST_LATENCY_BUCKETS, HistogramFamily, HistogramWindow
+from mscl_op_lock import SharedOpLock
+from mscl_port_helpers import resolve_port
+from mscl_settings import MSCL_LOG_KEY_INTERVAL_SEC, MSCL_LOG_MAX
 
 CONNECT_LOCK = threading.Lock()
 INTERPROCESS_LOCK_PATH = os.getenv("MSCL_LOCK_FILE", "/var/lock/mscl/base.lock")
-
-
-class SharedOpLock:
-    """Thread + process lock to serialize BaseStation access across containers."""
-
-    def __init__(self, lock_path):
-        self._lock_path = lock_path
-        self._thread_lock = threading.RLock()
-        self._tls = threading.local()
-
-    def __enter__(self):
-        self._thread_lock.acquire()
-        depth = getattr(self._tls, "depth", 0)
-        if depth == 0:
-            lock_dir = os.path.dirname(self._lock_path)
-            if lock_dir:
-                os.makedirs(lock_dir, exist_ok=True)
-            fh = open(self._lock_path, "a+", encoding="utf-8")
-            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
-            self._tls.fh = fh
-        self._tls.depth = depth + 1
-        return self
-
-    def __exit__(self, _exc_type, _exc, _tb):
-        depth = getattr(self._tls, "depth", 1) - 1
-        self._tls.depth = depth
-        if depth == 0:
-            fh = getattr(self._tls, "fh", None)
-            if fh is not None:
-                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
-                fh.close()
-                self._tls.fh = None
-        self._thread_lock.release()
-
-
 OP_LOCK = SharedOpLock(INTERPROCESS_LOCK_PATH)
 METRICS_LOCK = threading.Lock()
 
 # Global state
 BASE_STATION = None
 BAUDRATE = 3000000
-LOG_BUFFER = []
-LOG_MAX = 200
+LOG_MAX = MSCL_LOG_MAX
+LOG_RING = LogRing(maxlen=LOG_MAX)
+# Keyed messages (e.g. per-retry error lines) reach the log at most once per interval.
+LOG_RATE_LIMITER = KeyRateLimiter(interval_sec=MSCL_LOG_KEY_INTERVAL_SEC)
+LOG_WRITER = StdoutLogWriter()
 LAST_BASE_STATUS = {"connected": False, "port": "N/A", "message": "Not connected", "ts": None}
 LAST_PING_OK_TS = 0
+# Wall time of the last getData() that returned packets; live traffic proves the link like a ping.
+LAST_PACKET_TS = 0
 PING_TTL_SEC = 10
-CONNECT_BACKOFF_SEC = 1.5
 CURRENT_PORT = None
+# Preferred stable port, e.g. /dev/serial/by-id/usb-..._WSDA-Base-...-if00
+CONFIGURED_PORT = os.getenv("MSCL_PORT", "").strip() or None
+DISCONNECTED_SINCE = 0.0
+# Set to cut the stream reader's reconnect backoff short (hotplug, /api/reconnect).
+RECONNECT_EVENT = threading.Event()
 LAST_CONNECT_ATTEMPT_TS = 0
 CONNECT_MIN_INTERVAL_SEC = 2.0
 NODE_READ_CACHE: dict[int, dict[str, Any]] = {}
@@ -67,8 +44,14 @@ NODE_ACTIVE_STATE_FRESH_SEC = 8
 SAMPLE_STOP_TOKENS: dict[int, int] = {}
 SAMPLE_RUNS: dict[int, dict[str, Any]] = {}
 IDLE_IN_PROGRESS: set[int] = set()
-STREAM_PAUSE_UNTIL = 0.0
 NODE_EXPORT_CLOCK_OFFSET_NS: dict[int, int] = {}
+# Latency histograms (seconds), exported on /metrics and summarized on /api/metrics.
+STREAM_STAGE_HIST = HistogramFamily(FAST_LATENCY_BUCKETS)
+HTTP_REQUEST_HIST = HistogramFamily(FAST_LATENCY_BUCKETS)
+INFLUX_WRITE_HIST = HistogramFamily()
+# Host time minus node sample time, at writer dequeue ("dequeue") and at Influx ack ("ack").
+INGEST_LAG_HIST = HistogramFamily()
+INGEST_LAG_WINDOW = HistogramWindow(INGEST_LAG_HIST.get("ack"), window_sec=60.0)
 METRICS = {
     "base_reconnect_attempts": 0,
     "base_reconnect_successes": 0,
@@ -79,17 +62,70 @@ METRICS = {
     "stream_write_calls": 0,
     "stream_queue_depth": 0,
     "stream_queue_hwm": 0,
+    "stream_reader_timeout_ms": 0,
+    "stream_reader_packet_rate": 0.0,
+    "stream_reader_cpu_pct": 0.0,
+    "stream_reader_lock_acquisitions_per_sec": 0.0,
+    "op_lock_acquisitions_per_sec": 0.0,
+    "stream_queue_points": 0,
+    "stream_queue_bytes": 0,
     "stream_queue_dropped_packets": 0,
+    "stream_queue_dropped_points": 0,
+    "stream_queue_spilled_packets": 0,
+    "stream_queue_spilled_points": 0,
+    "stream_points_written_resampled": 0,
+    "stream_resample_late_samples": 0,
+    "stream_resample_forced_flushes": 0,
+    "stream_resample_open_samples": 0,
+    "stream_accessor_cache_hits": 0,
+    "stream_accessor_cache_misses": 0,
+    "stream_accessor_cache_hit_rate": 0.0,
+    "stream_rate_cache_hits": 0,
+    "stream_rate_cache_misses": 0,
+    "stream_rate_cache_hit_rate": 0.0,
+    "stream_sweep_timestamp_packets": 0,
+    "stream_point_timestamp_packets": 0,
+    "stream_influx_healthy": 1,
+    "stream_influx_writes": 0,
+    "stream_influx_write_errors": 0,
+    "stream_influx_write_retries": 0,
+    "stream_sink_queue_overflows": 0,
+    "stream_write_dropped_points": 0,
+    "stream_spool_depth_records": 0,
+    "stream_spool_depth_bytes": 0,
+    "stream_spool_dropped_records": 0,
+    "stream_spool_replay_lag_sec": 0.0,
+    "stream_spool_records_spooled": 0,
+    "stream_spool_points_spooled": 0,
+    "stream_spool_records_replayed": 0,
+    "stream_spool_points_replayed": 0,
     "eeprom_retries_read": 0,
     "eeprom_retries_write": 0,
+    "export_session_cache_hits": 0,
+    "export_session_cache_misses": 0,
+    "export_download_resumes": 0,
+    "base_hotplug_events": 0,
+    "base_liveness_pings": 0,
+    "base_reconnect_last_ms": 0,
+    "base_reconnect_max_ms": 0,
+    "command_jobs_submitted": 0,
+    "command_jobs_rejected": 0,
+    "command_jobs_done": 0,
+    "command_jobs_failed": 0,
+    "command_jobs_preempted": 0,
+    "command_jobs_queued": 0,
+    "command_jobs_running": 0,
 }
 
 
-def log(msg):
-    print(msg, flush=True)
-    LOG_BUFFER.append(f"{time.strftime('%H:%M:%S')} {msg}")
-    if len(LOG_BUFFER) > LOG_MAX:
-        del LOG_BUFFER[0 : len(LOG_BUFFER) - LOG_MAX]
+def log(msg, key=None):
+    allowed, suppressed = LOG_RATE_LIMITER.allow(key)
+    if not allowed:
+        return
+    if suppressed:
+        msg = f"{msg} (+{suppressed} similar suppressed)"
+    LOG_RING.append(msg, key=key)
+    LOG_WRITER.write(msg)
 
 
 def metric_inc(name, amount=1):
@@ -114,12 +150,42 @@ def metric_snapshot():
         return dict(METRICS)
 
 
+def _note_disconnected(now):
+    global DISCONNECTED_SINCE
+    if not DISCONNECTED_SINCE:
+        DISCONNECTED_SINCE = now
+
+
+def _note_connected(now):
+    global DISCONNECTED_SINCE
+    if DISCONNECTED_SINCE:
+        took_ms = int(max(0.0, now - DISCONNECTED_SINCE) * 1000)
+        metric_set("base_reconnect_last_ms", took_ms)
+        metric_max("base_reconnect_max_ms", took_ms)
+        DISCONNECTED_SINCE = 0.0
+
+
+def request_reconnect():
+    """Drop the connect throttle and wake the stream reader so it reconnects right away."""
+    global LAST_CONNECT_ATTEMPT_TS
+    LAST_CONNECT_ATTEMPT_TS = 0
+    RECONNECT_EVENT.set()
+
+
+def note_link_alive(now=None):
+    global LAST_PACKET_TS
+    LAST_PACKET_TS = time.time() if now is None else now
+
+
 def mark_base_disconnected(reset_port=False):
-    global BASE_STATION, BASE_BEACON_STATE, LAST_PING_OK_TS, CURRENT_PORT
+    global BASE_STATION, BASE_BEACON_STATE, LAST_PING_OK_TS, LAST_PACKET_TS, CURRENT_PORT
     with CONNECT_LOCK:
+        if BASE_STATION is not None:
+            _note_disconnected(time.time())
         BASE_STATION = None
         BASE_BEACON_STATE = None
         LAST_PING_OK_TS = 0
+        LAST_PACKET_TS = 0
         if reset_port:
             CURRENT_PORT = None
 
@@ -169,8 +235,7 @@ def _feature_supported(features, method_name):
 
 
 def find_port():
-    ports = glob.glob("/dev/ttyACM*") + glob.glob("/dev/ttyUSB*")
-    return ports[0] if ports else None
+    return resolve_port(CONFIGURED_PORT)
 
 
 def internal_connect(force_ping=False):
@@ -178,9 +243,11 @@ def internal_connect(force_ping=False):
     now = time.time()
     with CONNECT_LOCK:
         if BASE_STATION and not force_ping:
-            if (now - LAST_PING_OK_TS) <= PING_TTL_SEC:
+            # Only ping when neither a ping nor stream packets confirmed the link within the TTL.
+            if (now - max(LAST_PING_OK_TS, LAST_PACKET_TS)) <= PING_TTL_SEC:
                 return True, "Connected"
             try:
+                metric_inc("base_liveness_pings")
                 if BASE_STATION.ping():
                     LAST_PING_OK_TS = now
                     LAST_BASE_STATUS.update({"connected": True, "message": "Connected", "ts": time.strftime("%H:%M:%S")})
@@ -195,6 +262,7 @@ def internal_connect(force_ping=False):
                     }
                 )
                 BASE_STATION = None
+                _note_disconnected(now)
         if BASE_STATION and force_ping:
             try:
                 if BASE_STATION.ping():
@@ -211,10 +279,12 @@ def internal_connect(force_ping=False):
                     }
                 )
                 BASE_STATION = None
+                _note_disconnected(now)
         if not force_ping and (now - LAST_CONNECT_ATTEMPT_TS) < CONNECT_MIN_INTERVAL_SEC:
             return False, "Connect throttled"
         LAST_CONNECT_ATTEMPT_TS = now
-        port = CURRENT_PORT or find_port()
+        # A tty name that vanished (device re-enumerated) must not pin the connect attempts.
+        port = CURRENT_PORT if CURRENT_PORT and os.path.exists(CURRENT_PORT) else find_port()
         if not port:
             LAST_BASE_STATUS.update(
                 {"connected": False, "port": "N/A", "message": "No Port", "ts": time.strftime("%H:%M:%S")}
@@ -234,20 +304,19 @@ def internal_connect(force_ping=False):
                 LAST_BASE_STATUS.update(
                     {"connected": True, "port": port, "message": "OK", "ts": time.strftime("%H:%M:%S")}
                 )
+                _note_connected(time.time())
                 log(f"[mscl-web] BaseStation OK port={port}")
                 return True, port
             LAST_BASE_STATUS.update(
                 {"connected": False, "port": port, "message": "Ping failed", "ts": time.strftime("%H:%M:%S")}
             )
             log("[mscl-web] BaseStation ping failed")
-            time.sleep(CONNECT_BACKOFF_SEC)
             return False, "Ping failed"
         except Exception as exc:
             LAST_BASE_STATUS.update(
                 {"connected": False, "port": port, "message": str(exc), "ts": time.strftime("%H:%M:%S")}
             )
             log(f"[mscl-web] BaseStation connect error: {exc}")
-            time.sleep(CONNECT_BACKOFF_SEC)
             return False, str(exc)
 
 
@@ -355,13 +424,18 @@ __all__ = [
     "METRICS_LOCK",
     "BASE_STATION",
     "BAUDRATE",
-    "LOG_BUFFER",
     "LOG_MAX",
+    "LOG_RING",
+    "LOG_RATE_LIMITER",
+    "LOG_WRITER",
     "LAST_BASE_STATUS",
     "LAST_PING_OK_TS",
+    "LAST_PACKET_TS",
     "PING_TTL_SEC",
-    "CONNECT_BACKOFF_SEC",
     "CURRENT_PORT",
+    "CONFIGURED_PORT",
+    "DISCONNECTED_SINCE",
+    "RECONNECT_EVENT",
     "LAST_CONNECT_ATTEMPT_TS",
     "CONNECT_MIN_INTERVAL_SEC",
     "NODE_READ_CACHE",
@@ -372,12 +446,19 @@ __all__ = [
     "SAMPLE_RUNS",
     "IDLE_IN_PROGRESS",
     "METRICS",
+    "STREAM_STAGE_HIST",
+    "HTTP_REQUEST_HIST",
+    "INFLUX_WRITE_HIST",
+    "INGEST_LAG_HIST",
+    "INGEST_LAG_WINDOW",
     "log",
     "metric_inc",
     "metric_set",
     "metric_max",
     "metric_snapshot",
+    "note_link_alive",
     "mark_base_disconnected",
+    "request_reconnect",
     "_get_temp_sensor_options",
     "_set_temp_sensor_options",
     "_filter_default_modes",
@@ -0,0 +1,111 @@
+import threading
+import time
+from types import MappingProxyType
+
+try:
+    from mscl_op_lock import PRIORITY_STREAM
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_op_lock import PRIORITY_STREAM
+
+
+class StateSnapshot:
+    """Read-only copy of the state served by /api/health, /api/metrics and /api/status.
+
+    Copied mscl_state globals keep their names, so payload builders that take
+    the state module accept a snapshot as well.
+    """
+
+    __slots__ = (
+        "ts",
+        "BASE_STATION",
+        "CURRENT_PORT",
+        "LAST_BASE_STATUS",
+        "LAST_PING_OK_TS",
+        "LAST_PACKET_TS",
+        "PING_TTL_SEC",
+        "BASE_BEACON_STATE",
+        "BAUDRATE",
+        "stream_wait_sec",
+        "metrics",
+        "op_lock",
+        "op_lock_scheduler",
+        "stream_stages",
+        "http_requests",
+        "influx_write",
+        "ingest_lag",
+        "ingest_lag_p99_sec",
+        "node_cache_size",
+        "sampling_runs_count",
+        "idle_in_progress_count",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, _name, _value):
+        raise AttributeError("StateSnapshot is read-only")
+
+
+def capture_state_snapshot(*, state, now):
+    op_lock = state.OP_LOCK
+    return StateSnapshot(
+        ts=now,
+        BASE_STATION=state.BASE_STATION,
+        CURRENT_PORT=state.CURRENT_PORT,
+        LAST_BASE_STATUS=MappingProxyType(dict(state.LAST_BASE_STATUS)),
+        LAST_PING_OK_TS=state.LAST_PING_OK_TS,
+        LAST_PACKET_TS=state.LAST_PACKET_TS,
+        PING_TTL_SEC=state.PING_TTL_SEC,
+        BASE_BEACON_STATE=state.BASE_BEACON_STATE,
+        BAUDRATE=state.BAUDRATE,
+        stream_wait_sec=float(op_lock.wait_age_sec(PRIORITY_STREAM)),
+        metrics=MappingProxyType(state.metric_snapshot()),
+        op_lock=op_lock.stats(),
+        op_lock_scheduler=op_lock.status(),
+        stream_stages=state.STREAM_STAGE_HIST.snapshot(),
+        http_requests=state.HTTP_REQUEST_HIST.snapshot(),
+        influx_write=state.INFLUX_WRITE_HIST.snapshot(),
+        ingest_lag=state.INGEST_LAG_HIST.snapshot(),
+        ingest_lag_p99_sec=state.INGEST_LAG_WINDOW.quantile(0.99, now),
+        node_cache_size=len(state.NODE_READ_CACHE),
+        sampling_runs_count=len(state.SAMPLE_RUNS),
+        idle_in_progress_count=len(state.IDLE_IN_PROGRESS),
+    )
+
+
+class SnapshotPublisher:
+    """Rebuilds the snapshot every ``interval_sec`` on its own thread.
+
+    Readers take ``publisher.current``: a single reference read, no locks.
+    """
+
+    def __init__(self, *, capture_fn, interval_sec=0.5, log_func=None, now_fn=time.time):
+        self._capture_fn = capture_fn
+        self.interval_sec = max(0.05, float(interval_sec))
+        self._log = log_func
+        self._now_fn = now_fn
+        self._thread = None
+        self.current = capture_fn(now=now_fn())
+
+    def publish(self):
+        self.current = self._capture_fn(now=self._now_fn())
+        return self.current
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="mscl-state-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                if self._log is not None:
+                    self._log(f"[mscl-web] state snapshot failed: {e}")
+            time.sleep(self.interval_sec)
+
+
+__all__ = ["SnapshotPublisher", "StateSnapshot", "capture_state_snapshot"]
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timezone
 
 
@@ -24,16 +25,12 @@ def comm_age_sec(value, now):
         return None
 
 
-def read_base_info(base_station):
-    info = {
-        "base_model": None,
-        "base_fw": None,
-        "base_serial": None,
-        "base_region": None,
-        "base_radio": None,
-        "base_last_comm": None,
-        "base_link": None,
-    }
+STATIC_BASE_FIELDS = ("base_model", "base_fw", "base_serial", "base_region", "base_radio")
+VOLATILE_BASE_FIELDS = ("base_last_comm", "base_link")
+
+
+def read_static_base_info(base_station):
+    info = {name: None for name in STATIC_BASE_FIELDS}
     if base_station is None:
         return info
 
@@ -60,6 +57,14 @@ def read_base_info(base_station):
         info["base_radio"] = str(base_station.frequency())
     except Exception:
         pass
+    return info
+
+
+def read_volatile_base_info(base_station):
+    info = {name: None for name in VOLATILE_BASE_FIELDS}
+    if base_station is None:
+        return info
+
     try:
         info["base_last_comm"] = trim_ts(base_station.lastCommunicationTime())
     except Exception:
@@ -68,10 +73,62 @@ def read_base_info(base_station):
         info["base_link"] = str(base_station.lastDeviceState())
     except Exception:
         pass
-
     return info
 
 
+def read_base_info(base_station):
+    return {**read_static_base_info(base_station), **read_volatile_base_info(base_station)}
+
+
+class BaseInfoCache:
+    """Base-station info read once per connection, volatile fields refreshed periodically.
+
+    ``get()`` is a plain memory read; ``refresh()`` does the radio/USB calls and
+    must run under OP_LOCK (see the background refresher in mscl_config).
+    """
+
+    def __init__(self, *, volatile_refresh_sec=5.0, now_fn=time.time):
+        self.volatile_refresh_sec = max(0.5, float(volatile_refresh_sec))
+        self._now_fn = now_fn
+        self._station = None
+        self._info = read_base_info(None)
+        self._static_ts = None
+        self._volatile_ts = None
+
+    def get(self, base_station):
+        """Cached info for ``base_station``; all None until it has been refreshed once."""
+        if base_station is None or base_station is not self._station:
+            return dict(read_base_info(None), base_info_age_sec=None)
+        age = None
+        if self._volatile_ts is not None:
+            age = round(max(0.0, self._now_fn() - self._volatile_ts), 2)
+        return dict(self._info, base_info_age_sec=age)
+
+    def refresh_due(self, base_station):
+        if base_station is not self._station:
+            return True
+        if base_station is None:
+            return False
+        return self._volatile_ts is None or (self._now_fn() - self._volatile_ts) >= self.volatile_refresh_sec
+
+    def refresh(self, base_station):
+        if base_station is None:
+            self._station = None
+            self._info = read_base_info(None)
+            self._static_ts = self._volatile_ts = None
+            return
+        if base_station is not self._station:
+            static = read_static_base_info(base_station)
+            self._static_ts = self._now_fn()
+        else:
+            static = {name: self._info.get(name) for name in STATIC_BASE_FIELDS}
+        volatile = read_volatile_base_info(base_station)
+        self._volatile_ts = self._now_fn()
+        # Publish one new dict so readers never see a half-updated mix.
+        self._info = {**static, **volatile}
+        self._station = base_station
+
+
 def compute_link_health(*, ping_age_sec, comm_age_sec_value, ping_ttl_sec):
     link_health = "offline"
     link_health_reason = "No active BaseStation object"
@@ -100,16 +157,21 @@ def compute_link_health(*, ping_age_sec, comm_age_sec_value, ping_ttl_sec):
     return link_health, link_health_reason
 
 
-def build_status_payload(state, now):
+def build_status_payload(state, now, base_info=None):
     ok = state.BASE_STATION is not None
     msg = state.LAST_BASE_STATUS.get("message", "Not connected")
     port = state.LAST_BASE_STATUS.get("port", "N/A")
 
-    info = read_base_info(state.BASE_STATION)
+    # base_info comes from BaseInfoCache; without it the BaseStation is read directly.
+    info = base_info if base_info is not None else read_base_info(state.BASE_STATION)
 
     ping_age_sec = None
-    if ok and float(getattr(state, "LAST_PING_OK_TS", 0.0) or 0.0) > 0:
-        ping_age_sec = max(0.0, now - float(state.LAST_PING_OK_TS))
+    alive_ts = max(
+        float(getattr(state, "LAST_PING_OK_TS", 0.0) or 0.0),
+        float(getattr(state, "LAST_PACKET_TS", 0.0) or 0.0),
+    )
+    if ok and alive_ts > 0:
+        ping_age_sec = max(0.0, now - alive_ts)
 
     comm_age = comm_age_sec(info.get("base_last_comm"), now) if ok else None
 
@@ -140,4 +202,5 @@ def build_status_payload(state, now):
         "link_health_reason": link_health_reason,
         "ping_age_sec": round(ping_age_sec, 2) if ping_age_sec is not None else None,
         "comm_age_sec": round(comm_age, 2) if comm_age is not None else None,
+        "base_info_age_sec": info.get("base_info_age_sec"),
     }
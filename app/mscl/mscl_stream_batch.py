@@ -0,0 +1,231 @@
+from array import array
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - numpy is optional; pure-Python path is used
+    np = None
+
+# Below this many rows the numpy setup cost outweighs the per-row loop.
+NUMPY_RESAMPLE_MIN_ROWS = 256
+_SPAN_LIMIT_NS = 999_999_999
+
+
+class StreamBatch:
+    """Struct-of-arrays buffer for decoded stream datapoints.
+
+    Node ids and channel names are interned into small integer ids that stay
+    stable across ``clear()`` calls, so the writer can reuse one batch object
+    for its whole lifetime without allocating a dict per datapoint.
+    """
+
+    __slots__ = (
+        "node_ids",
+        "channels",
+        "_node_index",
+        "_channel_index",
+        "node_idx",
+        "channel_idx",
+        "values",
+        "t_ns",
+        "rate_hz",
+    )
+
+    def __init__(self):
+        self.node_ids = []
+        self.channels = []
+        self._node_index = {}
+        self._channel_index = {}
+        self.clear()
+
+    def clear(self):
+        self.node_idx = array("i")
+        self.channel_idx = array("i")
+        self.values = array("d")
+        self.t_ns = array("q")
+        # 0.0 means "rate unknown" (matches the old rate_hz=None rows).
+        self.rate_hz = array("d")
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern_node(self, node_id):
+        idx = self._node_index.get(node_id)
+        if idx is None:
+            idx = len(self.node_ids)
+            self._node_index[node_id] = idx
+            self.node_ids.append(node_id)
+        return idx
+
+    def intern_channel(self, channel):
+        idx = self._channel_index.get(channel)
+        if idx is None:
+            idx = len(self.channels)
+            self._channel_index[channel] = idx
+            self.channels.append(channel)
+        return idx
+
+    def append(self, node_i, channel_i, value, t_ns, rate_hz):
+        self.node_idx.append(node_i)
+        self.channel_idx.append(channel_i)
+        self.values.append(value)
+        self.t_ns.append(t_ns)
+        self.rate_hz.append(rate_hz)
+
+
+def _series_time_keys(node_idx, channel_idx, t_ns):
+    # One int per row instead of a (node, channel, t) tuple.
+    return [(t << 32) | (n << 16) | c for n, c, t in zip(node_idx, channel_idx, t_ns)]
+
+
+def dedupe_series_times(node_idx, channel_idx, t_ns):
+    """Shift repeated (node, channel, t_ns) keys by +1ns per repeat, in input order."""
+    out = array("q", t_ns)
+    keys = _series_time_keys(node_idx, channel_idx, t_ns)
+    if len(set(keys)) == len(keys):
+        return out
+    seen = {}
+    for i, key in enumerate(keys):
+        dup_idx = seen.get(key, 0)
+        seen[key] = dup_idx + 1
+        if dup_idx:
+            out[i] += dup_idx
+    return out
+
+
+def resample_group_times(sec, n, max_rate_hz):
+    """Return (start_ns, step_ns) for ``n`` samples spread evenly inside ``sec``."""
+    span_limit = _SPAN_LIMIT_NS
+    step_from_rate = None
+    if max_rate_hz > 0:
+        try:
+            step_from_rate = max(1, int(round(1_000_000_000.0 / max_rate_hz)))
+        except Exception:
+            step_from_rate = None
+
+    step_auto = max(1, span_limit // max(1, n - 1))
+    if step_from_rate is not None and (step_from_rate * (n - 1)) <= span_limit:
+        step_ns = step_from_rate
+    else:
+        step_ns = step_auto
+
+    used_span = int(step_ns) * (n - 1)
+    start_ns = int(sec) * 1_000_000_000 + ((span_limit - used_span) // 2)
+    return start_ns, step_ns
+
+
+def resample_uniform_second(node_idx, channel_idx, t_ns, rate_hz):
+    """Spread samples of each (node, channel, second) group evenly over that second.
+
+    Uses the numpy implementation for larger batches when numpy is installed;
+    both paths return identical results.
+    """
+    if np is not None and len(t_ns) >= NUMPY_RESAMPLE_MIN_ROWS:
+        return resample_uniform_second_np(node_idx, channel_idx, t_ns, rate_hz)
+    return resample_uniform_second_py(node_idx, channel_idx, t_ns, rate_hz)
+
+
+def resample_uniform_second_py(node_idx, channel_idx, t_ns, rate_hz):
+    """Spread samples of each (node, channel, second) group evenly over that second.
+
+    Returns ``(order, t_resampled)``: ``order`` holds source row indices in output
+    order (groups by first appearance, rows sorted by t_ns inside a group) and
+    ``t_resampled`` the matching resampled timestamps. Single-sample groups keep
+    their original timestamp. Output times are unique per (node, channel): each
+    group stays inside its own second and uses a step of at least 1ns.
+    """
+    groups = {}
+    sec_keys = [
+        ((t // 1_000_000_000) << 32) | (n << 16) | c for n, c, t in zip(node_idx, channel_idx, t_ns)
+    ]
+    for i, key in enumerate(sec_keys):
+        rows = groups.get(key)
+        if rows is None:
+            groups[key] = [i]
+        else:
+            rows.append(i)
+
+    order = array("q")
+    t_resampled = array("q")
+    for key, rows in groups.items():
+        n = len(rows)
+        if n == 1:
+            order.append(rows[0])
+            t_resampled.append(t_ns[rows[0]])
+            continue
+
+        rows.sort(key=t_ns.__getitem__)
+        max_rate_hz = max(map(rate_hz.__getitem__, rows))
+        start_ns, step_ns = resample_group_times(key >> 32, n, max_rate_hz)
+        order.extend(rows)
+        t_resampled.extend(range(start_ns, start_ns + step_ns * n, step_ns))
+    return order, t_resampled
+
+
+def resample_uniform_second_np(node_idx, channel_idx, t_ns, rate_hz):
+    """Vectorized ``resample_uniform_second_py``: same groups, order and timestamps."""
+    n = len(t_ns)
+    if n == 0:
+        return array("q"), array("q")
+    t = np.asarray(t_ns, dtype=np.int64)
+    nodes = np.asarray(node_idx, dtype=np.int64)
+    chans = np.asarray(channel_idx, dtype=np.int64)
+    hz = np.asarray(rate_hz, dtype=np.float64)
+    sec = t // 1_000_000_000
+    rows = np.arange(n, dtype=np.int64)
+
+    # Group rows by (node, channel, second); the row index as last key makes
+    # the first row of each run the group's first appearance.
+    by_group = np.lexsort((rows, sec, chans, nodes))
+    g_nodes = nodes[by_group]
+    g_chans = chans[by_group]
+    g_sec = sec[by_group]
+    boundary = np.empty(n, dtype=bool)
+    boundary[0] = True
+    boundary[1:] = (g_nodes[1:] != g_nodes[:-1]) | (g_chans[1:] != g_chans[:-1]) | (g_sec[1:] != g_sec[:-1])
+    group_starts = np.flatnonzero(boundary)
+    group_count = len(group_starts)
+
+    # Rank groups by first appearance (dict insertion order in the Python path).
+    rank_of_group = np.empty(group_count, dtype=np.int64)
+    rank_of_group[np.argsort(by_group[group_starts], kind="stable")] = np.arange(group_count, dtype=np.int64)
+    row_rank = np.empty(n, dtype=np.int64)
+    row_rank[by_group] = rank_of_group[np.cumsum(boundary) - 1]
+    sec_by_rank = np.empty(group_count, dtype=np.int64)
+    sec_by_rank[rank_of_group] = g_sec[group_starts]
+
+    order = np.lexsort((rows, t, row_rank))
+    out_rank = row_rank[order]
+    sizes = np.bincount(row_rank, minlength=group_count).astype(np.int64)
+    first_pos = np.zeros(group_count, dtype=np.int64)
+    np.cumsum(sizes[:-1], out=first_pos[1:])
+    pos_in_group = np.arange(n, dtype=np.int64) - first_pos[out_rank]
+    max_hz = np.maximum.reduceat(hz[order], first_pos)
+
+    gaps = sizes - 1
+    with np.errstate(divide="ignore"):
+        # Steps >= 1s never fit a multi-sample group, so clamping keeps int64 safe.
+        rate_step = np.minimum(np.round(1_000_000_000.0 / np.where(max_hz > 0, max_hz, 1.0)), 2e9)
+    rate_step = np.maximum(1, rate_step.astype(np.int64))
+    auto_step = np.maximum(1, _SPAN_LIMIT_NS // np.maximum(1, gaps))
+    step = np.where((max_hz > 0) & (rate_step * gaps <= _SPAN_LIMIT_NS), rate_step, auto_step)
+    start = sec_by_rank * 1_000_000_000 + (_SPAN_LIMIT_NS - step * gaps) // 2
+
+    t_out = start[out_rank] + pos_in_group * step[out_rank]
+    single = sizes[out_rank] == 1
+    t_out[single] = t[order][single]
+
+    order_out = array("q")
+    order_out.frombytes(order.astype(np.int64).tobytes())
+    t_resampled = array("q")
+    t_resampled.frombytes(t_out.astype(np.int64).tobytes())
+    return order_out, t_resampled
+
+
+__all__ = [
+    "StreamBatch",
+    "dedupe_series_times",
+    "resample_group_times",
+    "resample_uniform_second",
+    "resample_uniform_second_np",
+    "resample_uniform_second_py",
+]
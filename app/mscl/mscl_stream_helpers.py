@@ -1,3 +1,4 @@
+import operator
 import time
 from datetime import datetime, timezone
 
@@ -15,23 +16,82 @@ def point_channel(dp):
         return "channel"
 
 
-def point_value(dp):
-    for getter in (
-        lambda: dp.as_float(),
-        lambda: dp.as_double(),
-        lambda: dp.as_int32(),
-        lambda: dp.as_uint32(),
-        lambda: dp.as_int16(),
-        lambda: dp.as_uint16(),
-        lambda: dp.as_int8(),
-        lambda: dp.as_uint8(),
-        lambda: dp.value(),
-    ):
+_VALUE_GETTERS = (
+    "as_float",
+    "as_double",
+    "as_int32",
+    "as_uint32",
+    "as_int16",
+    "as_uint16",
+    "as_int8",
+    "as_uint8",
+    "value",
+)
+
+
+def resolve_point_value(dp):
+    """Return ``(getter_name, value)`` for the first datapoint accessor that works."""
+    for name in _VALUE_GETTERS:
         try:
-            return float(getter())
+            return name, float(getattr(dp, name)())
         except Exception:
             continue
-    return None
+    return None, None
+
+
+def point_value(dp):
+    return resolve_point_value(dp)[1]
+
+
+class DatapointAccessorCache:
+    """Remembers which value accessor works for a datapoint's storedAs type.
+
+    Which typed accessor MSCL accepts depends on the stored type, so that is the
+    key; (node, channel) is used instead when storedAs() is unavailable. A hit
+    is one direct call instead of the ``point_value`` try-chain; if the cached
+    accessor raises, the chain is probed again and the cache updated.
+    Not thread-safe: use one instance per decoding thread.
+    """
+
+    __slots__ = ("_getters", "hits", "misses")
+
+    def __init__(self):
+        self._getters = {}
+        self.hits = 0
+        self.misses = 0
+
+    def channel(self, dp):
+        # channelName() is the common case; the rest of the chain is the fallback.
+        try:
+            name = dp.channelName()
+            if name:
+                return str(name)
+        except Exception:
+            pass
+        return point_channel(dp)
+
+    def value(self, node, channel, dp):
+        try:
+            stored_as = dp.storedAs()
+        except Exception:
+            stored_as = None
+        key = (node, channel) if stored_as is None else stored_as
+        getter = self._getters.get(key)
+        if getter is not None:
+            try:
+                value = float(getter(dp))
+                self.hits += 1
+                return value
+            except Exception:
+                pass
+        self.misses += 1
+        name, value = resolve_point_value(dp)
+        if name is None:
+            self._getters.pop(key, None)
+            return None
+        getter = getattr(type(dp), name, None)
+        self._getters[key] = getter if callable(getter) else operator.methodcaller(name)
+        return value
 
 
 def point_time_ns(dp):
@@ -51,6 +111,14 @@ def point_time_ns(dp):
     return time.time_ns()
 
 
+def packet_time_ns(packet):
+    """Sweep timestamp of a DataSweep in unix ns, or None if it has none."""
+    try:
+        return timestamp_to_ns(packet.timestamp())
+    except Exception:
+        return None
+
+
 def timestamp_to_ns(ts):
     try:
         sec = int(ts.seconds())
@@ -142,9 +210,12 @@ def logged_sweep_rows(node_id, session_index, sample_rate_text, sweep):
 
 
 __all__ = [
+    "DatapointAccessorCache",
     "point_channel",
     "point_value",
+    "resolve_point_value",
     "point_time_ns",
+    "packet_time_ns",
     "timestamp_to_ns",
     "ns_to_iso_utc",
     "logged_sweep_time_ns",
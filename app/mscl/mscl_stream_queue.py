@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import deque
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block", "spill")
+
+# Rough resident size of one decoded MSCL datapoint plus per-packet overhead.
+PACKET_OVERHEAD_BYTES = 256
+POINT_BYTES = 96
+
+
+def estimate_packet_bytes(points):
+    return PACKET_OVERHEAD_BYTES + POINT_BYTES * max(0, int(points))
+
+
+def normalize_overflow_policy(value, default="drop_oldest"):
+    policy = str(value or "").strip().lower().replace("-", "_")
+    return policy if policy in OVERFLOW_POLICIES else default
+
+
+class FairPacketQueue:
+    """Reader->writer packet queue with per-node sub-queues.
+
+    The queue is bounded by decoded point count and estimated bytes (plus a
+    packet-count safety cap). ``get_batch()`` drains nodes round-robin, one
+    packet per node per turn. When a budget is exceeded ``policy`` decides:
+
+    - ``drop_oldest``: evict the oldest packets of the node holding the most points;
+    - ``drop_newest``: reject the incoming packet;
+    - ``block``: make the producer wait up to ``block_timeout_sec``, then drop_oldest;
+    - ``spill``: evict like drop_oldest and hand the packets to ``spill_fn``.
+
+    Drops are counted per node in ``dropped_packets`` / ``dropped_points``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_points=200_000,
+        max_bytes=64 * 1024 * 1024,
+        max_packets=None,
+        policy="drop_oldest",
+        block_timeout_sec=5.0,
+        spill_fn=None,
+    ):
+        self.max_points = max(1, int(max_points))
+        self.max_bytes = max(1, int(max_bytes))
+        self.max_packets = None if max_packets is None else max(1, int(max_packets))
+        self.policy = normalize_overflow_policy(policy)
+        if self.policy == "spill" and spill_fn is None:
+            self.policy = "drop_oldest"
+        self.block_timeout_sec = max(0.0, float(block_timeout_sec))
+        self._spill_fn = spill_fn
+        self._cond = threading.Condition()
+        self._nodes = {}
+        self._node_points = {}
+        self._rr = deque()
+        self.packets = 0
+        self.points = 0
+        self.bytes = 0
+        self.dropped_packets = {}
+        self.dropped_points = {}
+        self.spilled_packets = 0
+
+    def __len__(self):
+        return self.packets
+
+    def put(self, node, packet, points, nbytes=None):
+        """Queue one packet; return the number of packets dropped or spilled to make room."""
+        points = max(0, int(points))
+        nbytes = estimate_packet_bytes(points) if nbytes is None else int(nbytes)
+        evicted = []
+        with self._cond:
+            if self.policy == "block" and self._over_budget(1, points, nbytes):
+                deadline = time.monotonic() + self.block_timeout_sec
+                while self.packets and self._over_budget(1, points, nbytes):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=remaining)
+            if self.policy == "drop_newest" and self._over_budget(1, points, nbytes) and self.packets:
+                self._count_drop(node, 1, points)
+                return 1
+            sub = self._nodes.get(node)
+            if sub is None:
+                sub = self._nodes[node] = deque()
+                self._rr.append(node)
+            sub.append((packet, points, nbytes))
+            self._node_points[node] = self._node_points.get(node, 0) + points
+            self.packets += 1
+            self.points += points
+            self.bytes += nbytes
+            while self._over_budget() and self.packets > 1:
+                evicted.append(self._evict_oldest_of_heaviest())
+            if self.policy == "spill":
+                self.spilled_packets += len(evicted)
+            else:
+                for victim, _packet, victim_points in evicted:
+                    self._count_drop(victim, 1, victim_points)
+            self._cond.notify_all()
+        if evicted and self.policy == "spill":
+            # Outside the lock: spilling encodes and writes to disk.
+            self._spill_fn([item[1] for item in evicted])
+        return len(evicted)
+
+    def get_batch(self, max_points, timeout=0.0):
+        """Pop packets round-robin across nodes until ``max_points`` is reached."""
+        max_points = max(1, int(max_points))
+        out = []
+        with self._cond:
+            if not self.packets and timeout > 0:
+                self._cond.wait(timeout=timeout)
+            taken = 0
+            while self.packets and taken < max_points:
+                node = self._rr[0]
+                self._rr.rotate(-1)
+                packet, points, _nbytes = self._pop_node(node)
+                taken += points
+                out.append(packet)
+            if out:
+                self._cond.notify_all()
+        return out
+
+    def _over_budget(self, packets=0, points=0, nbytes=0):
+        if self.max_packets is not None and self.packets + packets > self.max_packets:
+            return True
+        return self.points + points > self.max_points or self.bytes + nbytes > self.max_bytes
+
+    def _pop_node(self, node):
+        sub = self._nodes[node]
+        packet, points, nbytes = sub.popleft()
+        if sub:
+            self._node_points[node] -= points
+        else:
+            del self._nodes[node]
+            del self._node_points[node]
+            self._rr.remove(node)
+        self.packets -= 1
+        self.points -= points
+        self.bytes -= nbytes
+        return packet, points, nbytes
+
+    def _evict_oldest_of_heaviest(self):
+        heaviest = max(self._node_points, key=self._node_points.__getitem__)
+        packet, points, _nbytes = self._pop_node(heaviest)
+        return heaviest, packet, points
+
+    def _count_drop(self, node, packets, points):
+        self.dropped_packets[node] = self.dropped_packets.get(node, 0) + packets
+        self.dropped_points[node] = self.dropped_points.get(node, 0) + points
+
+
+class ShardedPacketQueue:
+    """N FairPacketQueues with every node pinned to one shard.
+
+    New nodes go to the shard with the fewest nodes, so one encoder worker per
+    shard sees all packets of its nodes in order. Budgets are split evenly.
+    """
+
+    def __init__(self, shards=1, *, max_points=200_000, max_bytes=64 * 1024 * 1024, max_packets=None, **kwargs):
+        shards = max(1, int(shards))
+        self.shards = [
+            FairPacketQueue(
+                max_points=max(1, int(max_points) // shards),
+                max_bytes=max(1, int(max_bytes) // shards),
+                max_packets=None if max_packets is None else max(1, int(max_packets) // shards),
+                **kwargs,
+            )
+            for _ in range(shards)
+        ]
+        self.policy = self.shards[0].policy
+        self._lock = threading.Lock()
+        self._node_shard = {}
+        self._shard_nodes = [0] * shards
+
+    def __len__(self):
+        return sum(len(q) for q in self.shards)
+
+    @property
+    def points(self):
+        return sum(q.points for q in self.shards)
+
+    @property
+    def bytes(self):
+        return sum(q.bytes for q in self.shards)
+
+    @property
+    def spilled_packets(self):
+        return sum(q.spilled_packets for q in self.shards)
+
+    def dropped_counts(self):
+        """Return merged per-node ``(dropped_packets, dropped_points)`` dicts."""
+        packets = {}
+        points = {}
+        for q in self.shards:
+            with q._cond:
+                packets.update(q.dropped_packets)
+                points.update(q.dropped_points)
+        return packets, points
+
+    def shard_of(self, node):
+        shard = self._node_shard.get(node)
+        if shard is None:
+            with self._lock:
+                shard = self._node_shard.get(node)
+                if shard is None:
+                    shard = min(range(len(self.shards)), key=self._shard_nodes.__getitem__)
+                    self._shard_nodes[shard] += 1
+                    self._node_shard[node] = shard
+        return shard
+
+    def put(self, node, packet, points, nbytes=None):
+        return self.shards[self.shard_of(node)].put(node, packet, points, nbytes)
+
+
+__all__ = [
+    "FairPacketQueue",
+    "ShardedPacketQueue",
+    "OVERFLOW_POLICIES",
+    "estimate_packet_bytes",
+    "normalize_overflow_policy",
+]
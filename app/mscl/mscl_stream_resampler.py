@@ -0,0 +1,151 @@
+import time
+from array import array
+
+try:
+    from mscl_stream_batch import resample_uniform_second
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_stream_batch import resample_uniform_second
+
+
+class _OpenSecond:
+    __slots__ = ("sec", "t_ns", "values", "rate_hz", "touched_at")
+
+    def __init__(self, sec, touched_at):
+        self.sec = sec
+        self.t_ns = array("q")
+        self.values = array("d")
+        self.rate_hz = array("d")
+        self.touched_at = touched_at
+
+
+class ResampledRows:
+    """Columnar output of one ``StreamingResampler`` call (encoder-ready)."""
+
+    __slots__ = ("node_idx", "channel_idx", "values", "t_ns", "rate_hz", "order", "t_resampled")
+
+    def __init__(self):
+        self.node_idx = array("i")
+        self.channel_idx = array("i")
+        self.values = array("d")
+        self.t_ns = array("q")
+        self.rate_hz = array("d")
+        self.order = array("q")
+        self.t_resampled = array("q")
+
+    def __len__(self):
+        return len(self.t_resampled)
+
+
+class StreamingResampler:
+    """Uniform-second resampler that keeps each series' current second open across batches.
+
+    A (node, channel) second is emitted once a sample from a later second of the
+    same series arrives, or once it has not been touched for ``lateness_sec``
+    (forced flush). Samples for a second that was already emitted are counted as
+    late and skipped, so every second is resampled exactly once. Memory is one
+    open second per series, capped at ``max_second_samples`` rows.
+
+    Series ids are the interned node/channel indexes of the writer's StreamBatch.
+    """
+
+    def __init__(self, *, lateness_sec=2.0, max_second_samples=8192, now_fn=time.monotonic):
+        self.lateness_sec = max(0.0, float(lateness_sec))
+        self.max_second_samples = max(1, int(max_second_samples))
+        self._now_fn = now_fn
+        self._open = {}
+        self._closed_sec = {}
+        self.late_samples = 0
+        self.forced_flushes = 0
+        self._open_samples = 0
+
+    def open_samples(self):
+        # Kept as a counter so metric readers on other threads never iterate ``_open``.
+        return self._open_samples
+
+    def open_series(self):
+        return len(self._open)
+
+    def push(self, node_idx, channel_idx, t_ns, values, rate_hz, now=None):
+        """Feed one batch of rows; return the seconds that closed, resampled."""
+        now = self._now_fn() if now is None else now
+        out = ResampledRows()
+        n = len(t_ns)
+        if n:
+            keys = [
+                (((n_i << 16) | c_i) << 40) | (t // 1_000_000_000)
+                for n_i, c_i, t in zip(node_idx, channel_idx, t_ns)
+            ]
+            # Stable sort: rows of one (series, second) keep arrival order.
+            rows_sorted = sorted(range(n), key=keys.__getitem__)
+            start = 0
+            while start < n:
+                key = keys[rows_sorted[start]]
+                end = start + 1
+                while end < n and keys[rows_sorted[end]] == key:
+                    end += 1
+                rows = rows_sorted[start:end]
+                self._accept(key >> 40, key & ((1 << 40) - 1), rows, t_ns, values, rate_hz, now, out)
+                start = end
+        self._flush_expired(now, out)
+        return self._finish(out)
+
+    def flush_expired(self, now=None):
+        """Emit open seconds idle for longer than ``lateness_sec`` (call when no data arrives)."""
+        now = self._now_fn() if now is None else now
+        out = ResampledRows()
+        self._flush_expired(now, out)
+        return self._finish(out)
+
+    def _accept(self, series, sec, rows, t_ns, values, rate_hz, now, out):
+        st = self._open.get(series)
+        if st is not None and sec < st.sec:
+            self.late_samples += len(rows)
+            return
+        if st is None and sec <= self._closed_sec.get(series, -1):
+            self.late_samples += len(rows)
+            return
+        if st is not None and sec > st.sec:
+            self._emit(series, st, out)
+            st = None
+        if st is None:
+            st = self._open[series] = _OpenSecond(sec, now)
+        room = self.max_second_samples - len(st.t_ns)
+        taken = rows[:room]
+        for i in taken:
+            st.t_ns.append(t_ns[i])
+            st.values.append(values[i])
+            st.rate_hz.append(rate_hz[i])
+        self._open_samples += len(taken)
+        st.touched_at = now
+        if len(rows) > room:
+            # Second is over capacity: close it now, the remainder arrives late.
+            self.forced_flushes += 1
+            self.late_samples += len(rows) - max(0, room)
+            self._emit(series, st, out)
+
+    def _flush_expired(self, now, out):
+        expired = [s for s, st in self._open.items() if (now - st.touched_at) >= self.lateness_sec]
+        for series in expired:
+            self.forced_flushes += 1
+            self._emit(series, self._open[series], out)
+
+    def _emit(self, series, st, out):
+        self._open.pop(series, None)
+        self._closed_sec[series] = st.sec
+        count = len(st.t_ns)
+        self._open_samples -= count
+        out.node_idx.extend([series >> 16] * count)
+        out.channel_idx.extend([series & 0xFFFF] * count)
+        out.t_ns.extend(st.t_ns)
+        out.values.extend(st.values)
+        out.rate_hz.extend(st.rate_hz)
+
+    def _finish(self, out):
+        if len(out.t_ns):
+            out.order, out.t_resampled = resample_uniform_second(
+                out.node_idx, out.channel_idx, out.t_ns, out.rate_hz
+            )
+        return out
+
+
+__all__ = ["ResampledRows", "StreamingResampler"]
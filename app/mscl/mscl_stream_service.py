@@ -1,11 +1,30 @@
+import functools
 import threading
 import time
-from collections import deque
 
-from influxdb_client import InfluxDBClient, Point  # type: ignore
-from influxdb_client.client.write_api import ASYNCHRONOUS, WriteOptions  # type: ignore
+from influxdb_client import InfluxDBClient  # type: ignore
+from influxdb_client.client.write_api import SYNCHRONOUS  # type: ignore
 from influxdb_client.domain.write_precision import WritePrecision  # type: ignore
 
+try:
+    from mscl_line_protocol import LineProtocolEncoder
+    from mscl_op_lock import PRIORITY_STREAM
+    from mscl_reader_helpers import AdaptiveReadTimeout, RateMeter, ThreadCpuMeter
+    from mscl_stream_batch import StreamBatch, dedupe_series_times
+    from mscl_stream_queue import ShardedPacketQueue
+    from mscl_stream_resampler import StreamingResampler
+    from mscl_stream_sink import SpooledWriteSink
+    from mscl_stream_spool import LineProtocolSpool
+except ImportError:  # pragma: no cover - test/module import path fallback
+    from app.mscl_line_protocol import LineProtocolEncoder
+    from app.mscl_op_lock import PRIORITY_STREAM
+    from app.mscl_reader_helpers import AdaptiveReadTimeout, RateMeter, ThreadCpuMeter
+    from app.mscl_stream_batch import StreamBatch, dedupe_series_times
+    from app.mscl_stream_queue import ShardedPacketQueue
+    from app.mscl_stream_resampler import StreamingResampler
+    from app.mscl_stream_sink import SpooledWriteSink
+    from app.mscl_stream_spool import LineProtocolSpool
+
 
 def run_stream_loop(
     *,
@@ -40,6 +59,34 @@ def run_stream_loop(
     resampled_enabled,
     resampled_measurement,
     resampled_include_raw_ts,
+    resampled_lateness_sec=2.0,
+    resampled_max_second_samples=8192,
+    spool_dir=None,
+    spool_max_bytes=512 * 1024 * 1024,
+    spool_segment_bytes=8 * 1024 * 1024,
+    spool_fsync_sec=1.0,
+    spool_replay_points_per_sec=20000.0,
+    write_retry_interval_sec=5.0,
+    write_retries=3,
+    write_retry_backoff_sec=0.5,
+    queue_max_points=200_000,
+    queue_max_bytes=64 * 1024 * 1024,
+    queue_overflow_policy="drop_oldest",
+    queue_block_timeout_sec=5.0,
+    encoder_workers=1,
+    write_inflight=2,
+    datapoint_accessors_fn=None,
+    packet_time_ns_fn=None,
+    rate_cache_size=64,
+    read_timeout_max_ms=250,
+    read_lock_cap_ms=50,
+    reader_metrics_interval_sec=2.0,
+    reconnect_event=None,
+    note_link_alive=None,
+    stage_hist=None,
+    influx_write_hist=None,
+    ingest_lag_hist=None,
+    lag_sample_points=64,
 ):
     if not stream_enabled:
         log_func("[mscl-stream] Disabled via MSCL_STREAM_ENABLED")
@@ -54,43 +101,90 @@ def run_stream_loop(
     if resampled_enabled:
         log_func(f"[mscl-stream] Resampled stream enabled: measurement={resampled_measurement}")
     db_client = InfluxDBClient(url=influx_url, token=influx_token, org=influx_org)
-    write_api = db_client.write_api(
-        write_options=WriteOptions(
-            batch_size=batch_size,
-            flush_interval=flush_interval_ms,
-            jitter_interval=200,
-            retry_interval=1000,
-            max_retries=3,
-            max_retry_delay=10000,
-            max_retry_time=60000,
-            exponential_base=2,
+    write_api = db_client.write_api(write_options=SYNCHRONOUS)
+
+    spool = None
+    if spool_dir:
+        try:
+            spool = LineProtocolSpool(
+                spool_dir,
+                segment_max_bytes=spool_segment_bytes,
+                max_total_bytes=spool_max_bytes,
+                fsync_interval_sec=spool_fsync_sec,
+            )
+            log_func(
+                f"[mscl-stream] Spool: {spool_dir} ({spool.depth_records} records pending, "
+                f"max {spool_max_bytes // (1024 * 1024)} MB)"
+            )
+        except Exception as e:
+            log_func(f"[mscl-stream] Spool disabled, cannot open {spool_dir}: {e}")
+            spool = None
+
+    sink = SpooledWriteSink(
+        write_fn=lambda payload: write_api.write(
+            influx_bucket, influx_org, record=payload, write_precision=WritePrecision.NS
         ),
-        write_type=ASYNCHRONOUS,
+        spool=spool,
+        log_func=log_func,
+        metric_inc=metric_inc,
+        metric_set=metric_set,
+        batch_points=batch_size,
+        inflight_writes=write_inflight,
+        flush_wait_sec=flush_interval_ms / 1000.0,
+        retry_interval_sec=write_retry_interval_sec,
+        write_retries=write_retries,
+        retry_backoff_sec=write_retry_backoff_sec,
+        replay_points_per_sec=spool_replay_points_per_sec,
+        write_hist=influx_write_hist,
+        lag_hist=ingest_lag_hist.get("ack") if ingest_lag_hist is not None else None,
     )
+    sink.start()
+
+    def observe_stage(stage, seconds):
+        if stage_hist is not None:
+            stage_hist.observe(stage, seconds)
 
-    queue_cond = threading.Condition()
-    packet_queue = deque()
+    def lag_sample(t_ns):
+        # Ingest lag is tracked on an evenly spaced sample of each batch to keep the writer cheap.
+        if ingest_lag_hist is None or not len(t_ns):
+            return None
+        return t_ns[:: max(1, len(t_ns) // max(1, lag_sample_points))]
+
+    # Shared by all encoder workers; only touched once per batch, under diag_lock.
+    diag_lock = threading.Lock()
     last_ch1_ts = 0.0
     last_drop_log_ts = 0.0
     last_batch_log_ts = 0.0
     last_diag = {}
 
-    def note_diag(channel, value):
-        last_diag[channel] = value
+    def note_batch_diag(batch_diag, ch1_seen_ts):
+        nonlocal last_ch1_ts
+        with diag_lock:
+            last_diag.update(batch_diag)
+            if ch1_seen_ts:
+                last_ch1_ts = max(last_ch1_ts, ch1_seen_ts)
 
-    def maybe_log_batch(now_ts, channel_counts, point_count):
+    def maybe_log_batch(now_ts, channel_counts, point_count, packet_rate_counts=None):
         nonlocal last_batch_log_ts
-        if (now_ts - last_batch_log_ts) < log_interval_sec:
-            return
-        last_batch_log_ts = now_ts
+        with diag_lock:
+            if (now_ts - last_batch_log_ts) < log_interval_sec:
+                return
+            last_batch_log_ts = now_ts
         channels_txt = ", ".join(f"{k}:{v}" for k, v in sorted(channel_counts.items()))
         log_func(f"[mscl-stream] Logged {point_count} points ({channels_txt})")
+        if packet_rate_counts:
+            rate_txt = ", ".join(f"{k}:{v}" for k, v in sorted(packet_rate_counts.items()))
+            log_func(f"[mscl-stream] Packet rates ({rate_txt})")
 
     def packet_rate_label(packet):
+        try:
+            rate = packet.sampleRate()
+        except Exception:
+            return "unknown"
         for getter in (
-            lambda: packet.sampleRate().prettyStr(),
-            lambda: packet.sampleRate().toString(),
-            lambda: str(packet.sampleRate()),
+            lambda: rate.prettyStr(),
+            lambda: rate.toString(),
+            lambda: str(rate),
         ):
             try:
                 s = str(getter()).strip()
@@ -100,244 +194,381 @@ def run_stream_loop(
                 continue
         return "unknown"
 
+    @functools.lru_cache(maxsize=max(1, int(rate_cache_size)))
+    def rate_label_to_hz(rate_lbl):
+        # Rate labels barely change, so the regex parsing runs once per label.
+        rate_hz = None
+        try:
+            if sample_rate_to_hz_fn is not None:
+                rate_hz = sample_rate_to_hz_fn(rate_lbl)
+        except Exception:
+            rate_hz = None
+        return float(rate_hz) if isinstance(rate_hz, (int, float)) and rate_hz > 0 else 0.0
+
     def maybe_log_drop(now_ts):
         nonlocal last_drop_log_ts
-        if last_ch1_ts <= 0:
+        with diag_lock:
+            if last_ch1_ts <= 0:
+                return
+            gap = now_ts - last_ch1_ts
+            if gap < drop_warn_sec:
+                return
+            if now_ts - last_drop_log_ts < drop_log_throttle_sec:
+                return
+            last_drop_log_ts = now_ts
+            diag_summary = ", ".join(
+                f"{k}={last_diag.get(k)}"
+                for k in (
+                    "diagnostic_state",
+                    "diagnostic_syncFailures",
+                    "diagnostic_totalDroppedPackets",
+                    "diagnostic_lowBatteryFlag",
+                    "diagnostic_memoryFull",
+                )
+            )
+        log_func(f"[mscl-stream] Warning: no ch1 data for {gap:.1f}s; {diag_summary}")
+
+    def decode_packets(packets, target, accessors=None, channel_counts=None, packet_rate_counts=None):
+        # Appends decoded points to ``target``; counts/diagnostics only for the live writer batch.
+        batch_diag = {}
+        ch1_seen_ts = 0.0
+        channel_of = point_channel_fn if accessors is None else accessors.channel
+        node_idx_append = target.node_idx.append
+        channel_idx_append = target.channel_idx.append
+        values_append = target.values.append
+        t_ns_append = target.t_ns.append
+        rate_hz_append = target.rate_hz.append
+        sweep_ts_packets = 0
+        for packet in packets:
+            node_i = target.intern_node(str(packet.nodeAddress()))
+            rate_lbl = packet_rate_label(packet)
+            rate_hz = rate_label_to_hz(rate_lbl)
+            # All datapoints of a sweep share its timestamp; per-point lookup is the fallback.
+            sweep_t_ns = packet_time_ns_fn(packet) if packet_time_ns_fn is not None else None
+            if sweep_t_ns is not None:
+                sweep_ts_packets += 1
+            if packet_rate_counts is not None:
+                packet_rate_counts[rate_lbl] = packet_rate_counts.get(rate_lbl, 0) + 1
+            for dp in packet.data():
+                channel = channel_of(dp)
+                if only_channel_1 and channel not in ("channel_1", "ch1"):
+                    continue
+                value = point_value_fn(dp) if accessors is None else accessors.value(node_i, channel, dp)
+                if value is None:
+                    continue
+                node_idx_append(node_i)
+                channel_idx_append(target.intern_channel(channel))
+                values_append(value)
+                t_ns_append(sweep_t_ns if sweep_t_ns is not None else int(point_time_ns_fn(dp)))
+                rate_hz_append(rate_hz)
+                if channel_counts is None:
+                    continue
+                if channel.startswith("diagnostic_"):
+                    batch_diag[channel] = value
+                channel_counts[channel] = channel_counts.get(channel, 0) + 1
+                if channel in ("channel_1", "ch1"):
+                    ch1_seen_ts = time.time()
+        if batch_diag or ch1_seen_ts:
+            note_batch_diag(batch_diag, ch1_seen_ts)
+        if sweep_ts_packets:
+            metric_inc("stream_sweep_timestamp_packets", sweep_ts_packets)
+        if sweep_ts_packets < len(packets):
+            metric_inc("stream_point_timestamp_packets", len(packets) - sweep_ts_packets)
+
+    spill_batch = StreamBatch()
+    spill_encoder = LineProtocolEncoder()
+    spill_accessors = datapoint_accessors_fn() if datapoint_accessors_fn is not None else None
+
+    def spill_packets(packets):
+        # Overflow policy "spill": raw points go to the disk spool (not the resampled stream).
+        spill_batch.clear()
+        decode_packets(packets, spill_batch, spill_accessors)
+        if not len(spill_batch):
             return
-        gap = now_ts - last_ch1_ts
-        if gap < drop_warn_sec:
+        spill_encoder.add_series(
+            measurement=measurement,
+            source=source_radio,
+            node_ids=spill_batch.node_ids,
+            channels=spill_batch.channels,
+            node_idx=spill_batch.node_idx,
+            channel_idx=spill_batch.channel_idx,
+            values=spill_batch.values,
+            times=dedupe_series_times(spill_batch.node_idx, spill_batch.channel_idx, spill_batch.t_ns),
+        )
+        spilled = spill_encoder.lines
+        if spilled:
+            sink.spill(
+                spill_encoder.take(),
+                points=spilled,
+                t_min_ns=min(spill_batch.t_ns),
+                t_max_ns=max(spill_batch.t_ns),
+            )
+            metric_inc("stream_queue_spilled_points", spilled)
+
+    encoder_workers = max(1, int(encoder_workers))
+    packet_queue = ShardedPacketQueue(
+        encoder_workers,
+        max_points=queue_max_points,
+        max_bytes=queue_max_bytes,
+        max_packets=queue_max,
+        policy=queue_overflow_policy,
+        block_timeout_sec=queue_block_timeout_sec,
+        spill_fn=spill_packets if spool is not None else None,
+    )
+    log_func(
+        f"[mscl-stream] Packet queue: max_points={queue_max_points} max_bytes={queue_max_bytes} "
+        f"max_packets={queue_max} policy={packet_queue.policy}; "
+        f"encoder_workers={encoder_workers} write_inflight={sink.inflight_writes}"
+    )
+
+    def packet_points(packet):
+        try:
+            return len(packet.data())
+        except Exception:
+            return 1
+
+    def publish_queue_metrics(dropped):
+        depth = len(packet_queue)
+        metric_set("stream_queue_depth", depth)
+        metric_set("stream_queue_points", packet_queue.points)
+        metric_set("stream_queue_bytes", packet_queue.bytes)
+        metric_max("stream_queue_hwm", depth)
+        if not dropped:
             return
-        if now_ts - last_drop_log_ts < drop_log_throttle_sec:
+        if packet_queue.policy == "spill":
+            metric_set("stream_queue_spilled_packets", packet_queue.spilled_packets)
             return
-        last_drop_log_ts = now_ts
-        diag_summary = ", ".join(
-            f"{k}={last_diag.get(k)}"
-            for k in (
-                "diagnostic_state",
-                "diagnostic_syncFailures",
-                "diagnostic_totalDroppedPackets",
-                "diagnostic_lowBatteryFlag",
-                "diagnostic_memoryFull",
-            )
-        )
-        log_func(f"[mscl-stream] Warning: no ch1 data for {gap:.1f}s; {diag_summary}")
+        metric_inc("stream_queue_dropped_packets", dropped)
+        dropped_packets, dropped_points = packet_queue.dropped_counts()
+        metric_set("stream_queue_dropped_points", sum(dropped_points.values()))
+        for node, count in dropped_packets.items():
+            metric_set(f"stream_queue_dropped_packets_node_{node}", count)
+            metric_set(f"stream_queue_dropped_points_node_{node}", dropped_points.get(node, 0))
 
     def reader_loop():
         backoff = 1.0
         backoff_max = 10.0
         disconnected = True
+        read_timeout = AdaptiveReadTimeout(
+            min_ms=read_timeout_ms,
+            max_ms=read_timeout_max_ms,
+            lock_cap_ms=read_lock_cap_ms,
+        )
+        cpu_meter = ThreadCpuMeter()
+        read_rate = RateMeter()
+        lock_rate = RateMeter()
+        reads = 0
+        read_rate.sample(reads)
+        lock_rate.sample(getattr(state.OP_LOCK, "acquisitions", 0))
+        last_read_done = time.monotonic()
+        next_metrics_ts = last_read_done + reader_metrics_interval_sec
+
+        def publish_reader_metrics():
+            metric_set("stream_reader_timeout_ms", read_timeout.timeout_ms)
+            metric_set("stream_reader_packet_rate", round(read_timeout.rate_pps or 0.0, 2))
+            metric_set("stream_reader_cpu_pct", cpu_meter.sample())
+            metric_set("stream_reader_lock_acquisitions_per_sec", read_rate.sample(reads))
+            metric_set("op_lock_acquisitions_per_sec", lock_rate.sample(getattr(state.OP_LOCK, "acquisitions", 0)))
+
+        def wait_backoff():
+            # A hotplug or /api/reconnect sets reconnect_event and cuts the wait short.
+            nonlocal backoff
+            if reconnect_event is None:
+                time.sleep(backoff)
+            elif reconnect_event.wait(backoff):
+                reconnect_event.clear()
+                backoff = 1.0
+                return
+            backoff = min(backoff_max, backoff * 1.7)
+
         while True:
             try:
-                pause_until = float(getattr(state, "STREAM_PAUSE_UNTIL", 0.0) or 0.0)
-                now_ts = time.time()
-                if now_ts < pause_until:
-                    time.sleep(min(0.25, max(0.05, pause_until - now_ts)))
-                    continue
-
                 ok, _ = internal_connect()
                 if not ok or state.BASE_STATION is None:
                     metric_inc("base_reconnect_attempts")
                     disconnected = True
-                    time.sleep(backoff)
-                    backoff = min(backoff_max, backoff * 1.7)
+                    wait_backoff()
                     continue
                 if disconnected:
                     metric_inc("base_reconnect_successes")
                     disconnected = False
 
-                with state.OP_LOCK:
+                # Lowest priority: queued interactive/download holders get the lock first.
+                with state.OP_LOCK.tagged("stream_reader", PRIORITY_STREAM):
                     base_station = state.BASE_STATION
                     if base_station is None:
                         time.sleep(idle_sleep)
                         continue
-                    packets = base_station.getData(read_timeout_ms)
+                    t_read = time.perf_counter()
+                    packets = base_station.getData(read_timeout.lock_ms)
+                    observe_stage("getdata", time.perf_counter() - t_read)
+
+                reads += 1
+                now_mono = time.monotonic()
+                read_timeout.update(len(packets) if packets else 0, now_mono - last_read_done)
+                last_read_done = now_mono
+                if now_mono >= next_metrics_ts:
+                    next_metrics_ts = now_mono + reader_metrics_interval_sec
+                    publish_reader_metrics()
 
                 if not packets:
                     backoff = 1.0
-                    time.sleep(idle_sleep)
+                    # Idle: wait out the rest of the adaptive timeout without holding OP_LOCK.
+                    time.sleep(max(idle_sleep, read_timeout.unlocked_wait_sec))
                     continue
 
-                with queue_cond:
-                    packet_queue.extend(packets)
-                    dropped = 0
-                    while len(packet_queue) > queue_max:
-                        packet_queue.popleft()
-                        dropped += 1
-                    q_depth = len(packet_queue)
-                    queue_cond.notify_all()
+                if note_link_alive is not None:
+                    note_link_alive()
+                dropped = 0
+                for packet in packets:
+                    dropped += packet_queue.put(str(packet.nodeAddress()), packet, packet_points(packet))
                 metric_inc("stream_packets_read", len(packets))
-                metric_set("stream_queue_depth", q_depth)
-                metric_max("stream_queue_hwm", q_depth)
-                if dropped:
-                    metric_inc("stream_queue_dropped_packets", dropped)
+                publish_queue_metrics(dropped)
                 backoff = 1.0
             except Exception as e:
-                log_func(f"[mscl-stream] Reader error: {e}")
+                log_func(f"[mscl-stream] Reader error: {e}", key="stream_reader_error")
                 metric_inc("stream_reader_errors")
                 mark_base_disconnected()
                 disconnected = True
-                time.sleep(backoff)
-                backoff = min(backoff_max, backoff * 1.7)
+                wait_backoff()
 
     threading.Thread(target=reader_loop, daemon=True).start()
 
-    def build_resampled_rows(raw_rows):
-        grouped = {}
-        for row in raw_rows:
-            sec = int(row["t_ns"]) // 1_000_000_000
-            key = (row["node_id"], row["channel"], sec)
-            grouped.setdefault(key, []).append(row)
-
-        out = []
-        for (_node_id, _channel, sec), rows in grouped.items():
-            if len(rows) <= 1:
-                row = dict(rows[0])
-                row["t_resampled_ns"] = int(row["t_ns"])
-                out.append(row)
-                continue
+    # One slot per encoder worker, filled by that worker; readers only see plain int counters.
+    resamplers = [None] * len(packet_queue.shards)
+    accessor_caches = [None] * len(packet_queue.shards)
 
-            rows_sorted = sorted(rows, key=lambda r: int(r["t_ns"]))
-            n = len(rows_sorted)
-            sec_start = int(sec) * 1_000_000_000
-            span_limit = 999_999_999
-
-            hz_vals = []
-            for r in rows_sorted:
-                hz = r.get("rate_hz")
-                if isinstance(hz, (int, float)) and float(hz) > 0:
-                    hz_vals.append(float(hz))
-            step_from_rate = None
-            if hz_vals:
-                try:
-                    step_from_rate = max(1, int(round(1_000_000_000.0 / max(hz_vals))))
-                except Exception:
-                    step_from_rate = None
-
-            step_auto = max(1, span_limit // max(1, n - 1))
-            if step_from_rate is not None and (step_from_rate * (n - 1)) <= span_limit:
-                step_ns = step_from_rate
-            else:
-                step_ns = step_auto
-
-            used_span = int(step_ns) * (n - 1)
-            start_ns = sec_start + ((span_limit - used_span) // 2)
-            for idx, row in enumerate(rows_sorted):
-                t_resampled_ns = int(start_ns + (idx * step_ns))
-                row_out = dict(row)
-                row_out["t_resampled_ns"] = t_resampled_ns
-                out.append(row_out)
-        return out
-
-    while True:
-        try:
-            with queue_cond:
-                if not packet_queue:
-                    queue_cond.wait(timeout=queue_wait_ms / 1000.0)
-                packets = []
-                while packet_queue:
-                    packets.append(packet_queue.popleft())
-
-            if not packets:
-                time.sleep(idle_sleep)
-                continue
+    def hit_rate(hits, misses):
+        total = hits + misses
+        return round(hits / total, 4) if total else 0.0
 
-            raw_rows = []
-            channel_counts = {}
-            packet_rate_counts = {}
-            for packet in packets:
-                node_address = str(packet.nodeAddress())
-                rate_lbl = packet_rate_label(packet)
-                rate_hz = None
-                try:
-                    if sample_rate_to_hz_fn is not None:
-                        rate_hz = sample_rate_to_hz_fn(rate_lbl)
-                except Exception:
-                    rate_hz = None
-                packet_rate_counts[rate_lbl] = packet_rate_counts.get(rate_lbl, 0) + 1
-                for dp in packet.data():
-                    channel = point_channel_fn(dp)
-                    if only_channel_1 and channel not in ("channel_1", "ch1"):
-                        continue
-                    value = point_value_fn(dp)
-                    if value is None:
-                        continue
-                    if channel.startswith("diagnostic_"):
-                        note_diag(channel, value)
-                    t_ns = point_time_ns_fn(dp)
-                    raw_rows.append(
-                        {
-                            "node_id": node_address,
-                            "channel": channel,
-                            "source": source_radio,
-                            "value": value,
-                            "t_ns": int(t_ns),
-                            "rate_hz": rate_hz,
-                        }
-                    )
-                    channel_counts[channel] = channel_counts.get(channel, 0) + 1
-                    if channel in ("channel_1", "ch1"):
-                        last_ch1_ts = time.time()
-
-            points = []
-            point_key_counts = {}
-            for row in raw_rows:
-                t_ns = int(row["t_ns"])
-                key = (row["node_id"], row["channel"], t_ns)
-                dup_idx = point_key_counts.get(key, 0)
-                point_key_counts[key] = dup_idx + 1
-                if dup_idx:
-                    t_ns += dup_idx
-                point = (
-                    Point(measurement)
-                    .tag("node_id", row["node_id"])
-                    .tag("channel", row["channel"])
-                    .tag("source", row["source"])
-                    .field("value", row["value"])
-                    .time(t_ns, WritePrecision.NS)
+    def publish_resample_metrics():
+        active = [r for r in resamplers if r is not None]
+        metric_set("stream_resample_late_samples", sum(r.late_samples for r in active))
+        metric_set("stream_resample_forced_flushes", sum(r.forced_flushes for r in active))
+        metric_set("stream_resample_open_samples", sum(r.open_samples() for r in active))
+
+    def publish_cache_metrics():
+        info = rate_label_to_hz.cache_info()
+        metric_set("stream_rate_cache_hits", info.hits)
+        metric_set("stream_rate_cache_misses", info.misses)
+        metric_set("stream_rate_cache_hit_rate", hit_rate(info.hits, info.misses))
+        caches = [c for c in accessor_caches if c is not None]
+        if caches:
+            hits = sum(c.hits for c in caches)
+            misses = sum(c.misses for c in caches)
+            metric_set("stream_accessor_cache_hits", hits)
+            metric_set("stream_accessor_cache_misses", misses)
+            metric_set("stream_accessor_cache_hit_rate", hit_rate(hits, misses))
+
+    def encoder_worker(worker_idx, shard_queue):
+        # Each worker owns the nodes of one queue shard, so per-node order is kept.
+        batch = StreamBatch()
+        encoder = LineProtocolEncoder()
+        resampler = StreamingResampler(
+            lateness_sec=resampled_lateness_sec,
+            max_second_samples=resampled_max_second_samples,
+        )
+        resamplers[worker_idx] = resampler
+        accessors = datapoint_accessors_fn() if datapoint_accessors_fn is not None else None
+        accessor_caches[worker_idx] = accessors
+
+        def write_resampled(resampled):
+            if len(resampled):
+                encoder.add_series(
+                    measurement=resampled_measurement,
+                    source=source_radio,
+                    node_ids=batch.node_ids,
+                    channels=batch.channels,
+                    node_idx=resampled.node_idx,
+                    channel_idx=resampled.channel_idx,
+                    values=resampled.values,
+                    times=resampled.t_resampled,
+                    order=resampled.order,
+                    raw_times=resampled.t_ns if resampled_include_raw_ts else None,
+                    time_model="resampled_uniform_second",
                 )
-                points.append(point)
-
-            resampled_points = []
-            if resampled_enabled and raw_rows:
-                resampled_rows = build_resampled_rows(raw_rows)
-                resampled_key_counts = {}
-                for row in resampled_rows:
-                    t_resampled_ns = int(row["t_resampled_ns"])
-                    key = (row["node_id"], row["channel"], t_resampled_ns)
-                    dup_idx = resampled_key_counts.get(key, 0)
-                    resampled_key_counts[key] = dup_idx + 1
-                    if dup_idx:
-                        t_resampled_ns += dup_idx
-                    point = (
-                        Point(resampled_measurement)
-                        .tag("node_id", row["node_id"])
-                        .tag("channel", row["channel"])
-                        .tag("source", row["source"])
-                        .tag("time_model", "resampled_uniform_second")
-                        .field("value", row["value"])
+            resampled_count = encoder.lines
+            if resampled_count:
+                sink.submit(
+                    encoder.take(),
+                    points=resampled_count,
+                    t_min_ns=min(resampled.t_resampled),
+                    t_max_ns=max(resampled.t_resampled),
+                )
+                metric_inc("stream_points_written_resampled", resampled_count)
+            publish_resample_metrics()
+            return resampled_count
+
+        while True:
+            try:
+                packets = shard_queue.get_batch(batch_size, timeout=queue_wait_ms / 1000.0)
+
+                if not packets:
+                    if resampled_enabled:
+                        write_resampled(resampler.flush_expired())
+                    time.sleep(idle_sleep)
+                    continue
+
+                dequeue_ns = time.time_ns()
+                batch.clear()
+                channel_counts = {}
+                packet_rate_counts = {}
+                t0 = time.perf_counter()
+                decode_packets(packets, batch, accessors, channel_counts, packet_rate_counts)
+                t1 = time.perf_counter()
+                observe_stage("decode", t1 - t0)
+                lag_times = lag_sample(batch.t_ns)
+                if lag_times:
+                    ingest_lag_hist.get("dequeue").observe_many((dequeue_ns - t) / 1e9 for t in lag_times)
+                publish_queue_metrics(0)
+                publish_cache_metrics()
+
+                point_count = 0
+                if len(batch):
+                    t1 = time.perf_counter()
+                    times = dedupe_series_times(batch.node_idx, batch.channel_idx, batch.t_ns)
+                    t2 = time.perf_counter()
+                    observe_stage("dedupe", t2 - t1)
+                    encoder.add_series(
+                        measurement=measurement,
+                        source=source_radio,
+                        node_ids=batch.node_ids,
+                        channels=batch.channels,
+                        node_idx=batch.node_idx,
+                        channel_idx=batch.channel_idx,
+                        values=batch.values,
+                        times=times,
                     )
-                    if resampled_include_raw_ts:
-                        point = point.field("raw_ts_ns", int(row["t_ns"]))
-                    point = point.time(t_resampled_ns, WritePrecision.NS)
-                    resampled_points.append(point)
-
-            if points:
-                write_api.write(influx_bucket, influx_org, points)
-                if resampled_points:
-                    write_api.write(influx_bucket, influx_org, resampled_points)
-                metric_inc("stream_write_calls")
-                metric_inc("stream_points_written", len(points))
-                if resampled_points:
-                    metric_inc("stream_points_written_resampled", len(resampled_points))
-                maybe_log_batch(time.time(), channel_counts, len(points))
-                if packet_rate_counts:
-                    rate_txt = ", ".join(f"{k}:{v}" for k, v in sorted(packet_rate_counts.items()))
-                    log_func(f"[mscl-stream] Packet rates ({rate_txt})")
-            maybe_log_drop(time.time())
-        except Exception as e:
-            log_func(f"[mscl-stream] Writer error: {e}")
-            metric_inc("stream_writer_errors")
-            time.sleep(idle_sleep)
+                    observe_stage("encode", time.perf_counter() - t2)
+                    point_count = encoder.lines
+                if point_count:
+                    sink.submit(
+                        encoder.take(),
+                        points=point_count,
+                        t_min_ns=min(batch.t_ns),
+                        t_max_ns=max(batch.t_ns),
+                        lag_times_ns=lag_times,
+                    )
+                    metric_inc("stream_write_calls")
+                    metric_inc("stream_points_written", point_count)
+                    maybe_log_batch(time.time(), channel_counts, point_count, packet_rate_counts)
+                if resampled_enabled:
+                    t0 = time.perf_counter()
+                    resampled = resampler.push(batch.node_idx, batch.channel_idx, batch.t_ns, batch.values, batch.rate_hz)
+                    t1 = time.perf_counter()
+                    observe_stage("resample", t1 - t0)
+                    write_resampled(resampled)
+                    observe_stage("encode_resampled", time.perf_counter() - t1)
+                maybe_log_drop(time.time())
+            except Exception as e:
+                log_func(f"[mscl-stream] Writer error: {e}", key="stream_writer_error")
+                metric_inc("stream_writer_errors")
+                time.sleep(idle_sleep)
+
+    for worker_idx, shard_queue in enumerate(packet_queue.shards[1:], start=1):
+        threading.Thread(target=encoder_worker, args=(worker_idx, shard_queue), daemon=True).start()
+    encoder_worker(0, packet_queue.shards[0])
 
 
 __all__ = ["run_stream_loop"]
@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import deque
+
+
+class SpooledWriteSink:
+    """Synchronous Influx writer that falls back to a LineProtocolSpool.
+
+    ``submit()`` only queues a line-protocol payload. ``inflight_writes`` sender
+    threads coalesce queued payloads (up to ``batch_points`` lines each) and
+    write them, so at most that many HTTP writes are in flight. A failed write
+    is retried ``write_retries`` times with doubling backoff starting at
+    ``retry_backoff_sec``; if it still fails, Influx is marked unhealthy and
+    payloads go to the spool instead. A
+    replayer thread probes Influx every ``retry_interval_sec`` with the oldest
+    spooled record and, once a write succeeds, drains the spool oldest-first at
+    no more than ``replay_points_per_sec``. Without a spool, payloads that
+    failed all retries are dropped, counted and logged. Write round trips go to ``write_hist`` (a
+    HistogramFamily), labelled ``stream`` or ``replay``. Sample times passed as
+    ``lag_times_ns`` are observed in ``lag_hist`` (a LatencyHistogram) as
+    ingest lag once Influx acknowledged the write; spooled points are not.
+    """
+
+    def __init__(
+        self,
+        *,
+        write_fn,
+        spool,
+        log_func,
+        metric_inc,
+        metric_set,
+        batch_points=5000,
+        inflight_writes=1,
+        queue_max_payloads=256,
+        flush_wait_sec=0.5,
+        retry_interval_sec=5.0,
+        write_retries=3,
+        retry_backoff_sec=0.5,
+        replay_points_per_sec=20000.0,
+        now_fn=time.monotonic,
+        sleep_fn=time.sleep,
+        write_hist=None,
+        lag_hist=None,
+        wall_ns_fn=time.time_ns,
+    ):
+        self._write_fn = write_fn
+        self._write_hist = write_hist
+        self._lag_hist = lag_hist
+        self._wall_ns_fn = wall_ns_fn
+        self.spool = spool
+        self._log = log_func
+        self._metric_inc = metric_inc
+        self._metric_set = metric_set
+        self.batch_points = max(1, int(batch_points))
+        self.inflight_writes = max(1, int(inflight_writes))
+        self.queue_max_payloads = max(1, int(queue_max_payloads))
+        self.flush_wait_sec = max(0.01, float(flush_wait_sec))
+        self.retry_interval_sec = max(0.1, float(retry_interval_sec))
+        self.replay_points_per_sec = max(1.0, float(replay_points_per_sec))
+        self.write_retries = max(0, int(write_retries))
+        self.retry_backoff_sec = max(0.0, float(retry_backoff_sec))
+        self._now_fn = now_fn
+        self._sleep_fn = sleep_fn
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self.healthy = True
+        self._next_probe = 0.0
+
+    def start(self):
+        for _ in range(self.inflight_writes):
+            threading.Thread(target=self._sender_loop, daemon=True).start()
+        if self.spool is not None:
+            threading.Thread(target=self._replayer_loop, daemon=True).start()
+
+    def submit(self, payload, *, points, t_min_ns=0, t_max_ns=0, lag_times_ns=None):
+        item = (payload, int(points), int(t_min_ns), int(t_max_ns), lag_times_ns)
+        overflow = None
+        with self._cond:
+            self._queue.append(item)
+            if len(self._queue) > self.queue_max_payloads:
+                overflow = self._queue.popleft()
+            self._cond.notify()
+        if overflow is not None:
+            # Influx is too slow to keep up: park the oldest payload on disk.
+            self._metric_inc("stream_sink_queue_overflows")
+            self._fallback(*overflow[:4])
+
+    def spill(self, payload, *, points, t_min_ns=0, t_max_ns=0):
+        """Send a payload straight to the spool; the replayer writes it later."""
+        self._fallback(payload, int(points), int(t_min_ns), int(t_max_ns))
+
+    def queued_payloads(self):
+        with self._cond:
+            return len(self._queue)
+
+    # -- sender -----------------------------------------------------------
+
+    def _sender_loop(self):
+        while True:
+            try:
+                self.send_pending(self.flush_wait_sec)
+            except Exception as e:
+                self._log(f"[mscl-stream] Sink sender error: {e}")
+                self._sleep_fn(self.flush_wait_sec)
+
+    def send_pending(self, wait_sec=0.0):
+        """Write (or spool) one coalesced batch of queued payloads."""
+        with self._cond:
+            if not self._queue and wait_sec > 0:
+                self._cond.wait(timeout=wait_sec)
+            if not self._queue:
+                return 0
+            parts = []
+            lag_parts = []
+            points = 0
+            t_min = None
+            t_max = None
+            while self._queue and (not parts or points + self._queue[0][1] <= self.batch_points):
+                payload, n, lo, hi, lag_times = self._queue.popleft()
+                parts.append(payload)
+                if lag_times:
+                    lag_parts.append(lag_times)
+                points += n
+                t_min = lo if t_min is None else min(t_min, lo)
+                t_max = hi if t_max is None else max(t_max, hi)
+        payload = parts[0] if len(parts) == 1 else b"".join(parts)
+        if self.healthy or self.spool is None:
+            if self._try_write(payload):
+                self._metric_inc("stream_influx_writes")
+                self._observe_ack_lag(lag_parts)
+                return points
+        self._fallback(payload, points, t_min, t_max)
+        return points
+
+    def _try_write(self, payload, kind="stream"):
+        # Replay has its own probe interval; live payloads get a few quick retries
+        # so one transient HTTP error neither spools nor (without a spool) drops them.
+        retries = self.write_retries if kind == "stream" else 0
+        backoff = self.retry_backoff_sec
+        for attempt in range(retries + 1):
+            t0 = time.perf_counter()
+            try:
+                self._write_fn(payload)
+            except Exception as e:
+                if self._write_hist is not None:
+                    self._write_hist.observe(kind, time.perf_counter() - t0)
+                self._metric_inc("stream_influx_write_errors")
+                if attempt < retries:
+                    self._metric_inc("stream_influx_write_retries")
+                    self._sleep_fn(backoff)
+                    backoff *= 2
+                    continue
+                if self.healthy:
+                    target = "spooling to disk" if self.spool is not None else "no spool"
+                    self._log(f"[mscl-stream] Influx write failed after {attempt + 1} attempts, {target}: {e}")
+                self._set_healthy(False)
+                return False
+            if self._write_hist is not None:
+                self._write_hist.observe(kind, time.perf_counter() - t0)
+            if self.spool is None and not self.healthy:
+                self._set_healthy(True)
+            return True
+
+    def _observe_ack_lag(self, lag_parts):
+        if self._lag_hist is None or not lag_parts:
+            return
+        ack_ns = self._wall_ns_fn()
+        self._lag_hist.observe_many((ack_ns - t) / 1e9 for part in lag_parts for t in part)
+
+    def _fallback(self, payload, points, t_min_ns, t_max_ns):
+        if self.spool is None:
+            self._log(f"[mscl-stream] No spool, dropped {points} points")
+            self._metric_inc("stream_write_dropped_points", points)
+            return
+        try:
+            self.spool.append(payload, points=points, t_min_ns=t_min_ns, t_max_ns=t_max_ns)
+        except Exception as e:
+            self._log(f"[mscl-stream] Spool append failed: {e}")
+            self._metric_inc("stream_write_dropped_points", points)
+            return
+        self._metric_inc("stream_spool_records_spooled")
+        self._metric_inc("stream_spool_points_spooled", points)
+        self.publish_metrics()
+
+    def _set_healthy(self, healthy):
+        if not healthy:
+            self._next_probe = self._now_fn() + self.retry_interval_sec
+        self.healthy = healthy
+        self._metric_set("stream_influx_healthy", 1 if healthy else 0)
+
+    # -- replayer ---------------------------------------------------------
+
+    def _replayer_loop(self):
+        while True:
+            try:
+                delay = self.replay_once()
+            except Exception as e:
+                self._log(f"[mscl-stream] Spool replay error: {e}")
+                delay = self.retry_interval_sec
+            self._sleep_fn(delay)
+
+    def replay_once(self):
+        """Replay the oldest spooled record; return how long to sleep before the next call."""
+        spool = self.spool
+        spool.sync_if_due()
+        self.publish_metrics()
+        if not spool.depth_records:
+            return self.flush_wait_sec
+        if not self.healthy:
+            wait = self._next_probe - self._now_fn()
+            if wait > 0:
+                return min(wait, self.flush_wait_sec)
+        record = spool.peek()
+        if record is None:
+            return self.flush_wait_sec
+        if not self._try_write(record.payload, "replay"):
+            return self.retry_interval_sec
+        spool.ack(record)
+        if not self.healthy:
+            self._log(f"[mscl-stream] Influx reachable again, replaying {spool.depth_records + 1} spooled records")
+            self._set_healthy(True)
+        self._metric_inc("stream_spool_records_replayed")
+        self._metric_inc("stream_spool_points_replayed", record.points)
+        self.publish_metrics()
+        return record.points / self.replay_points_per_sec
+
+    def publish_metrics(self):
+        spool = self.spool
+        if spool is None:
+            return
+        self._metric_set("stream_spool_depth_records", spool.depth_records)
+        self._metric_set("stream_spool_depth_bytes", spool.depth_bytes)
+        self._metric_set("stream_spool_dropped_records", spool.dropped_records)
+        self._metric_set("stream_spool_replay_lag_sec", round(spool.replay_lag_sec(), 3))
+
+
+__all__ = ["SpooledWriteSink"]
@@ -0,0 +1,306 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+# magic, compressed length, crc32(compressed), enqueued_ns, t_min_ns, t_max_ns, points
+_RECORD_HEADER = struct.Struct("<IIIqqqI")
+_RECORD_MAGIC = 0x4C505331  # "LPS1"
+_SEGMENT_PREFIX = "seg-"
+_SEGMENT_SUFFIX = ".lps"
+_CURSOR_FILE = "cursor"
+
+
+class SpoolRecord:
+    __slots__ = ("segment", "offset", "next_offset", "payload", "enqueued_ns", "t_min_ns", "t_max_ns", "points")
+
+    def __init__(self, segment, offset, next_offset, payload, enqueued_ns, t_min_ns, t_max_ns, points):
+        self.segment = segment
+        self.offset = offset
+        self.next_offset = next_offset
+        self.payload = payload
+        self.enqueued_ns = enqueued_ns
+        self.t_min_ns = t_min_ns
+        self.t_max_ns = t_max_ns
+        self.points = points
+
+
+class LineProtocolSpool:
+    """Append-only, segment-based on-disk spool of line-protocol payloads.
+
+    Records are zlib-compressed and CRC-checked. Appends are flushed to the OS
+    right away and fsync'ed in batches (every ``fsync_every`` records or
+    ``fsync_interval_sec``). Records are read back oldest-first; ``ack()``
+    advances a persisted cursor and deletes fully drained segments, including
+    the one being written to (the next append then starts a new segment).
+    Segments rotate on their file size; ``depth_bytes`` only counts records
+    not acknowledged yet. When the unacknowledged size exceeds ``max_total_bytes`` the oldest segments are dropped.
+    """
+
+    def __init__(
+        self,
+        directory,
+        *,
+        segment_max_bytes=8 * 1024 * 1024,
+        max_total_bytes=512 * 1024 * 1024,
+        fsync_interval_sec=1.0,
+        fsync_every=64,
+        compress_level=1,
+        now_fn=time.monotonic,
+    ):
+        self.directory = directory
+        self.segment_max_bytes = max(4096, int(segment_max_bytes))
+        self.max_total_bytes = max(self.segment_max_bytes, int(max_total_bytes))
+        self.fsync_interval_sec = max(0.0, float(fsync_interval_sec))
+        self.fsync_every = max(1, int(fsync_every))
+        self.compress_level = int(compress_level)
+        self._now_fn = now_fn
+        self._lock = threading.Lock()
+        self._segments = []
+        self._sizes = {}
+        self._file_sizes = {}
+        self._next_seq = 1
+        self._active_fh = None
+        self._active_seq = None
+        self._unsynced = 0
+        self._last_sync = now_fn()
+        self._read_seq = None
+        self._read_offset = 0
+        self.depth_records = 0
+        self.depth_bytes = 0
+        self.dropped_records = 0
+        self.oldest_enqueued_ns = None
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # -- public API -------------------------------------------------------
+
+    def append(self, payload, *, points=0, t_min_ns=0, t_max_ns=0):
+        data = zlib.compress(payload, self.compress_level)
+        enqueued_ns = time.time_ns()
+        header = _RECORD_HEADER.pack(
+            _RECORD_MAGIC, len(data), zlib.crc32(data), enqueued_ns, int(t_min_ns), int(t_max_ns), int(points)
+        )
+        with self._lock:
+            fh = self._writable_segment(len(header) + len(data))
+            fh.write(header)
+            fh.write(data)
+            fh.flush()
+            self._sizes[self._active_seq] += len(header) + len(data)
+            self._file_sizes[self._active_seq] += len(header) + len(data)
+            self.depth_bytes += len(header) + len(data)
+            self.depth_records += 1
+            if self.oldest_enqueued_ns is None:
+                self.oldest_enqueued_ns = enqueued_ns
+            self._unsynced += 1
+            self._sync_if_due_locked()
+            self._enforce_cap_locked()
+
+    def sync_if_due(self):
+        with self._lock:
+            self._sync_if_due_locked()
+
+    def peek(self):
+        """Return the oldest unacknowledged record, or None."""
+        with self._lock:
+            while self._segments:
+                seq = self._segments[0]
+                if self._read_seq != seq:
+                    self._read_seq = seq
+                    self._read_offset = 0
+                record = self._read_record(seq, self._read_offset)
+                if record is not None:
+                    return record
+                if seq == self._active_seq:
+                    return None
+                # Drained (or truncated) segment that is no longer written to.
+                self._remove_segment_locked(seq)
+            return None
+
+    def ack(self, record):
+        with self._lock:
+            if record.segment != self._read_seq or record.offset != self._read_offset:
+                return
+            size = record.next_offset - record.offset
+            self._read_offset = record.next_offset
+            self.depth_records = max(0, self.depth_records - 1)
+            self.depth_bytes = max(0, self.depth_bytes - size)
+            self._sizes[record.segment] = max(0, self._sizes.get(record.segment, 0) - size)
+            self._write_cursor_locked()
+            nxt = self._read_record(self._read_seq, self._read_offset)
+            if nxt is not None:
+                self.oldest_enqueued_ns = nxt.enqueued_ns
+            else:
+                # Drained; if it was the active segment the next append opens a new one.
+                self._remove_segment_locked(record.segment)
+                self._refresh_oldest_locked()
+
+    def replay_lag_sec(self, now_ns=None):
+        oldest = self.oldest_enqueued_ns
+        if oldest is None:
+            return 0.0
+        now_ns = time.time_ns() if now_ns is None else int(now_ns)
+        return max(0.0, (now_ns - oldest) / 1_000_000_000.0)
+
+    def close(self):
+        with self._lock:
+            if self._active_fh is not None:
+                self._active_fh.flush()
+                os.fsync(self._active_fh.fileno())
+                self._active_fh.close()
+                self._active_fh = None
+
+    # -- internals --------------------------------------------------------
+
+    def _segment_path(self, seq):
+        return os.path.join(self.directory, f"{_SEGMENT_PREFIX}{seq:012d}{_SEGMENT_SUFFIX}")
+
+    def _load(self):
+        seqs = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+                try:
+                    seqs.append(int(name[len(_SEGMENT_PREFIX) : -len(_SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        seqs.sort()
+        cursor_seq, cursor_offset = self._read_cursor()
+        # Never reuse a sequence number the cursor may still point into.
+        self._next_seq = max(seqs + [cursor_seq or 0]) + 1
+        for seq in seqs:
+            if cursor_seq is not None and seq < cursor_seq:
+                self._unlink(seq)
+                continue
+            start = cursor_offset if seq == cursor_seq else 0
+            offset = start
+            count = 0
+            while True:
+                record = self._read_record(seq, offset, with_payload=False)
+                if record is None:
+                    break
+                if self.oldest_enqueued_ns is None:
+                    self.oldest_enqueued_ns = record.enqueued_ns
+                offset = record.next_offset
+                count += 1
+            self._segments.append(seq)
+            self._sizes[seq] = offset - start
+            self._file_sizes[seq] = offset
+            self.depth_records += count
+            self.depth_bytes += offset - start
+        if cursor_seq is not None and cursor_seq in self._segments:
+            self._read_seq = cursor_seq
+            self._read_offset = cursor_offset
+
+    def _read_cursor(self):
+        try:
+            with open(os.path.join(self.directory, _CURSOR_FILE), "r", encoding="utf-8") as fh:
+                seq_txt, offset_txt = fh.read().split()
+            return int(seq_txt), int(offset_txt)
+        except Exception:
+            return None, 0
+
+    def _write_cursor_locked(self):
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(f"{self._read_seq} {self._read_offset}\n")
+        os.replace(tmp, path)
+
+    def _read_record(self, seq, offset, with_payload=True):
+        try:
+            with open(self._segment_path(seq), "rb") as fh:
+                fh.seek(offset)
+                header = fh.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    return None
+                magic, length, crc, enqueued_ns, t_min_ns, t_max_ns, points = _RECORD_HEADER.unpack(header)
+                if magic != _RECORD_MAGIC:
+                    return None
+                data = fh.read(length)
+        except OSError:
+            return None
+        if len(data) < length or zlib.crc32(data) != crc:
+            # Torn write from a crash: treat as end of segment.
+            return None
+        payload = zlib.decompress(data) if with_payload else None
+        next_offset = offset + _RECORD_HEADER.size + length
+        return SpoolRecord(seq, offset, next_offset, payload, enqueued_ns, t_min_ns, t_max_ns, points)
+
+    def _writable_segment(self, record_size):
+        if (
+            self._active_fh is not None
+            and self._file_sizes.get(self._active_seq, 0) + record_size > self.segment_max_bytes
+        ):
+            self._active_fh.flush()
+            os.fsync(self._active_fh.fileno())
+            self._active_fh.close()
+            self._active_fh = None
+            self._unsynced = 0
+        if self._active_fh is None:
+            # Always start a fresh segment, so a torn tail from a crash is never appended to.
+            seq = self._next_seq
+            self._next_seq += 1
+            self._active_fh = open(self._segment_path(seq), "ab")
+            self._active_seq = seq
+            self._segments.append(seq)
+            self._sizes[seq] = 0
+            self._file_sizes[seq] = 0
+        return self._active_fh
+
+    def _sync_if_due_locked(self):
+        if self._active_fh is None or not self._unsynced:
+            return
+        now = self._now_fn()
+        if self._unsynced >= self.fsync_every or (now - self._last_sync) >= self.fsync_interval_sec:
+            os.fsync(self._active_fh.fileno())
+            self._unsynced = 0
+            self._last_sync = now
+
+    def _enforce_cap_locked(self):
+        while self.depth_bytes > self.max_total_bytes and len(self._segments) > 1:
+            seq = self._segments[0]
+            dropped = 0
+            offset = self._read_offset if seq == self._read_seq else 0
+            while True:
+                record = self._read_record(seq, offset, with_payload=False)
+                if record is None:
+                    break
+                dropped += 1
+                offset = record.next_offset
+            self.dropped_records += dropped
+            self.depth_records = max(0, self.depth_records - dropped)
+            self._remove_segment_locked(seq)
+            self._refresh_oldest_locked()
+
+    def _refresh_oldest_locked(self):
+        self.oldest_enqueued_ns = None
+        for seq in self._segments:
+            offset = self._read_offset if seq == self._read_seq else 0
+            record = self._read_record(seq, offset, with_payload=False)
+            if record is not None:
+                self.oldest_enqueued_ns = record.enqueued_ns
+                return
+
+    def _remove_segment_locked(self, seq):
+        if seq == self._active_seq and self._active_fh is not None:
+            self._active_fh.close()
+            self._active_fh = None
+            self._active_seq = None
+        if seq in self._segments:
+            self._segments.remove(seq)
+        self.depth_bytes = max(0, self.depth_bytes - self._sizes.pop(seq, 0))
+        self._file_sizes.pop(seq, None)
+        if self._read_seq == seq:
+            self._read_seq = None
+            self._read_offset = 0
+        self._unlink(seq)
+
+    def _unlink(self, seq):
+        try:
+            os.remove(self._segment_path(seq))
+        except OSError:
+            pass
+
+
+__all__ = ["LineProtocolSpool", "SpoolRecord"]
@@ -36,6 +36,23 @@
         return `${yyyy}-${mm}-${dd} ${hh}:${mi}:${ss}`;
     }
 
+    async function fetchJob(url, options, onProgress) {
+        // Ask long node operations for a job id (202); poll it, then fetch the stored result.
+        const opts = { ...(options || {}) };
+        opts.headers = { ...(opts.headers || {}), "Prefer": "respond-async" };
+        const res = await fetch(url, opts);
+        if (res.status !== 202) return res;
+        const job = await res.json();
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 500));
+            const st = await (await fetch(job.status_url)).json();
+            if (!st.success) throw new Error(st.error || "Job lost");
+            if (st.job.status === "done" || st.job.status === "failed") break;
+            if (onProgress) onProgress(st.job);
+        }
+        return fetch(job.result_url);
+    }
+
     function updateSampleRateHint() {
         const hint = document.getElementById('sampleRateHint');
         const lpSel = document.getElementById('lowPassFilter');
@@ -147,7 +164,7 @@
         document.getElementById('configCard').style.display = "none";
         
         try {
-            const res = await fetch(`/api/read/${id}`);
+            const res = await fetchJob(`/api/read/${id}`);
             const data = await res.json();
             if(data.success) {
                 statusDiv.className = "mt-2 text-center status-ok";
@@ -833,7 +850,7 @@
         statusDiv.className = "mt-2 text-center text-primary";
         statusDiv.innerHTML = "Clearing storage...";
         try {
-            const res = await fetch(`/api/clear_storage/${id}`, {method:'POST'});
+            const res = await fetchJob(`/api/clear_storage/${id}`, {method:'POST'});
             const data = await res.json();
             if (data.success) {
                 statusDiv.className = "mt-2 text-center status-ok";
@@ -850,6 +867,14 @@
         }
     }
 
+    function exportProgressText(p) {
+        const pct = Number(p.pct);
+        let text = `${p.sweeps || 0} sweeps, ${p.points || 0} points`;
+        if (Number.isFinite(pct) && pct >= 0) text = `${pct.toFixed(1)}% (${text})`;
+        if (p.errors) text += `, ${p.errors} retries`;
+        return text;
+    }
+
     async function exportStorageCsv() {
         const id = document.getElementById('nodeId').value;
         const statusDiv = document.getElementById('readStatus');
@@ -880,7 +905,10 @@
         statusDiv.className = "mt-2 text-center text-primary";
         statusDiv.innerHTML = "Exporting CSV from node storage...";
         try {
-            const res = await fetch(`/api/export_storage/${id}?format=csv&ingest_influx=0${timeWindowParams}`);
+            const res = await fetchJob(`/api/export_storage/${id}?format=csv&ingest_influx=0${timeWindowParams}`, { method: "POST" }, job => {
+                const p = job.progress || {};
+                if (p.stage === "download") statusDiv.innerHTML = `Exporting CSV from node storage... ${exportProgressText(p)}`;
+            });
             if (!res.ok) {
                 let err = "Export failed";
                 try {
@@ -922,7 +950,11 @@
         statusDiv.className = "mt-2 text-center text-primary";
         statusDiv.innerHTML = "Exporting node storage to Influx node-export stream...";
         try {
-            const res = await fetch(`/api/export_storage/${id}?format=none&ingest_influx=1&align_clock=host`);
+            const res = await fetchJob(`/api/export_storage/${id}?format=none&ingest_influx=1&align_clock=host`, { method: "POST" }, job => {
+                const p = job.progress || {};
+                if (p.stage === "download") statusDiv.innerHTML = `Exporting node storage to Influx... ${exportProgressText(p)}`;
+                if (p.stage === "backfill") statusDiv.innerHTML = `Writing ${p.points || 0} points to Influx...`;
+            });
             const data = await res.json().catch(() => ({}));
             if (!res.ok || !data.success) {
                 throw new Error(data.error || "Export to Influx failed");
@@ -1020,7 +1052,7 @@
                 payload.wire_type = wireTypeRaw === "" ? null : parseInt(wireTypeRaw);
             }
 
-            const res = await fetch('/api/write', {
+            const res = await fetchJob('/api/write', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify(payload)
@@ -1173,13 +1205,21 @@
         } catch (e) { }
     }
 
+    let logLines = [];
+    let logSeq = 0;
+    const LOG_VIEW_MAX = 500;
+
     async function refreshLogs() {
         try {
-            const res = await fetch('/api/logs');
+            // Only entries after the last seen sequence number are sent; `reset` means start over.
+            const res = await fetch(`/api/logs?since=${logSeq}`);
             const data = await res.json();
+            if (data.reset) logLines = [];
+            logLines = logLines.concat((data.entries || []).map(e => e.text));
+            if (logLines.length > LOG_VIEW_MAX) logLines = logLines.slice(-LOG_VIEW_MAX);
+            logSeq = data.seq || 0;
             const box = document.getElementById('logBox');
-            const joined = (data.logs || []).join('\n');
-            box.textContent = joined.replace(/\\n/g, '\n');
+            box.textContent = logLines.join('\n').replace(/\\n/g, '\n');
         } catch (e) { }
     }
 
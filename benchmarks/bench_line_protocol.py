@@ -0,0 +1,82 @@
+"""Per-point serialization cost: influxdb_client.Point vs LineProtocolEncoder.
+
+Needs the real influxdb-client package. Run from the same root as the unit tests:
+
+    python -m benchmarks.bench_line_protocol
+"""
+
+import time
+from array import array
+
+from influxdb_client import Point  # type: ignore
+from influxdb_client.domain.write_precision import WritePrecision  # type: ignore
+
+from app.mscl_line_protocol import LineProtocolEncoder
+
+NODES = 8
+CHANNELS = 2
+POINTS = 20_000
+
+
+def _columns():
+    node_idx = array("i", (i % NODES for i in range(POINTS)))
+    channel_idx = array("i", ((i // NODES) % CHANNELS for i in range(POINTS)))
+    values = array("d", (20.0 + (i % 1000) * 0.001 for i in range(POINTS)))
+    times = array("q", (1_700_000_000_000_000_000 + i * 977 for i in range(POINTS)))
+    node_ids = [str(16900 + n) for n in range(NODES)]
+    channels = [f"ch{c + 1}" for c in range(CHANNELS)]
+    return node_ids, channels, node_idx, channel_idx, values, times
+
+
+def _points(cols):
+    node_ids, channels, node_idx, channel_idx, values, times = cols
+    points = []
+    for i, t_ns in enumerate(times):
+        points.append(
+            Point("mscl_sensors")
+            .tag("node_id", node_ids[node_idx[i]])
+            .tag("channel", channels[channel_idx[i]])
+            .tag("source", "mscl_config_stream")
+            .field("value", values[i])
+            .time(t_ns, WritePrecision.NS)
+        )
+    return "\n".join(p.to_line_protocol() for p in points).encode("utf-8")
+
+
+def _encoder(cols, enc):
+    node_ids, channels, node_idx, channel_idx, values, times = cols
+    enc.add_series(
+        measurement="mscl_sensors",
+        source="mscl_config_stream",
+        node_ids=node_ids,
+        channels=channels,
+        node_idx=node_idx,
+        channel_idx=channel_idx,
+        values=values,
+        times=times,
+    )
+    return enc.take()
+
+
+def _bench(label, fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    print(f"{label:>8}: {best * 1e9 / POINTS:,.0f} ns/point")
+    return best
+
+
+def main():
+    cols = _columns()
+    enc = LineProtocolEncoder()
+    assert _points(cols) + b"\n" == _encoder(cols, enc)
+    slow = _bench("Point", lambda: _points(cols))
+    fast = _bench("encoder", lambda: _encoder(cols, enc))
+    print(f" speedup: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
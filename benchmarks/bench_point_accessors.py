@@ -0,0 +1,87 @@
+"""Per-datapoint value lookup: ``point_value`` try-chain vs DatapointAccessorCache.
+
+Uses fake datapoints whose typed accessors raise unless they match the stored
+type, as MSCL's do for non-convertible types.
+
+    python -m benchmarks.bench_point_accessors
+"""
+
+import time
+
+from app.mscl_stream_helpers import DatapointAccessorCache, point_value
+
+POINTS = 200_000
+
+
+class _FakeStoredDatapoint:
+    __slots__ = ("_stored_as", "_value")
+
+    def __init__(self, stored_as, value):
+        self._stored_as = stored_as
+        self._value = value
+
+    def storedAs(self):
+        return self._stored_as
+
+    def _get(self, name):
+        if name != self._stored_as:
+            raise TypeError(f"{name} not supported for {self._stored_as}")
+        return self._value
+
+    def as_float(self):
+        return self._get("as_float")
+
+    def as_double(self):
+        return self._get("as_double")
+
+    def as_int32(self):
+        return self._get("as_int32")
+
+    def as_uint32(self):
+        return self._get("as_uint32")
+
+    def as_int16(self):
+        return self._get("as_int16")
+
+    def as_uint16(self):
+        return self._get("as_uint16")
+
+    def as_int8(self):
+        return self._get("as_int8")
+
+    def as_uint8(self):
+        return self._get("as_uint8")
+
+    def value(self):
+        return self._value
+
+
+def _bench(label, stored_as):
+    points = [_FakeStoredDatapoint(stored_as, float(i)) for i in range(POINTS)]
+    cache = DatapointAccessorCache()
+
+    t0 = time.perf_counter()
+    for dp in points:
+        point_value(dp)
+    chain = time.perf_counter() - t0
+
+    value = cache.value
+    t0 = time.perf_counter()
+    for dp in points:
+        value(1, "ch1", dp)
+    cached = time.perf_counter() - t0
+
+    print(
+        f"{label:>10}: chain {chain / POINTS * 1e9:7.0f} ns/point, cached {cached / POINTS * 1e9:7.0f} ns/point"
+        f" -> {chain / cached:.1f}x"
+    )
+
+
+def main():
+    _bench("float", "as_float")
+    _bench("uint16", "as_uint16")
+    _bench("uint8", "as_uint8")
+
+
+if __name__ == "__main__":
+    main()
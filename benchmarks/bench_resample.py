@@ -0,0 +1,52 @@
+"""Uniform-second resampler: pure-Python vs numpy, across batch sizes.
+
+Run from the same root as the unit tests:
+
+    python -m benchmarks.bench_resample
+"""
+
+import random
+import time
+from array import array
+
+from app.mscl_stream_batch import resample_uniform_second_np, resample_uniform_second_py
+
+NODES = 8
+CHANNELS = 2
+RATE_HZ = 128.0
+
+
+def _columns(n, rng):
+    t0 = 1_700_000_000_000_000_000
+    step = int(1_000_000_000 / RATE_HZ)
+    series = NODES * CHANNELS
+    node_idx = array("i", ((i % series) // CHANNELS for i in range(n)))
+    channel_idx = array("i", (i % CHANNELS for i in range(n)))
+    t_ns = array("q", (t0 + (i // series) * step + rng.randrange(1000) for i in range(n)))
+    rate_hz = array("d", (RATE_HZ for _ in range(n)))
+    return node_idx, channel_idx, t_ns, rate_hz
+
+
+def _best(fn, cols, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*cols)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'rows':>8} {'python ms':>10} {'numpy ms':>9} {'ns/row np':>10} {'speedup':>8}")
+    for n in (256, 1_000, 10_000, 100_000, 400_000):
+        cols = _columns(n, rng)
+        assert resample_uniform_second_np(*cols) == resample_uniform_second_py(*cols)
+        py = _best(resample_uniform_second_py, cols)
+        vec = _best(resample_uniform_second_np, cols)
+        print(f"{n:>8} {py * 1000:>10.2f} {vec * 1000:>9.2f} {vec * 1e9 / n:>10.0f} {py / vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Writer-path throughput: legacy dict rows vs StreamBatch columns.
+
+Covers decode, dedupe and resample; Point/line-protocol serialization is the
+same per-point work in both paths and is left out.
+
+Run from the same root as the unit tests (``app`` importable as a package):
+
+    python -m benchmarks.bench_stream_batch
+"""
+
+import time
+
+from app.mscl_stream_batch import StreamBatch, dedupe_series_times, resample_uniform_second
+
+NODES = 8
+CHANNELS = 2
+RATE_HZ = 128
+SECONDS = 10
+
+
+class _FakeTimestamp:
+    __slots__ = ("_ns",)
+
+    def __init__(self, ns):
+        self._ns = ns
+
+    def seconds(self):
+        return self._ns // 1_000_000_000
+
+    def nanoseconds(self):
+        return self._ns % 1_000_000_000
+
+
+class _FakeDatapoint:
+    __slots__ = ("_channel", "_value", "_ts")
+
+    def __init__(self, channel, value, ts_ns):
+        self._channel = channel
+        self._value = value
+        self._ts = _FakeTimestamp(ts_ns)
+
+    def channelName(self):
+        return self._channel
+
+    def as_float(self):
+        return self._value
+
+    def as_Timestamp(self):
+        return self._ts
+
+
+class _FakePacket:
+    __slots__ = ("_node", "_data")
+
+    def __init__(self, node, data):
+        self._node = node
+        self._data = data
+
+    def nodeAddress(self):
+        return self._node
+
+    def data(self):
+        return self._data
+
+
+def _packets():
+    t0 = 1_700_000_000_000_000_000
+    step = 1_000_000_000 // RATE_HZ
+    out = []
+    for k in range(RATE_HZ * SECONDS):
+        for node in range(NODES):
+            t_ns = t0 + k * step + node
+            out.append(
+                _FakePacket(
+                    16900 + node,
+                    [_FakeDatapoint(f"ch{c + 1}", float(k + c), t_ns) for c in range(CHANNELS)],
+                )
+            )
+    return out
+
+
+def _point_time_ns(dp):
+    ts = dp.as_Timestamp()
+    return int(ts.seconds()) * 1_000_000_000 + int(ts.nanoseconds())
+
+
+def _legacy(packets):
+    raw_rows = []
+    for packet in packets:
+        node_address = str(packet.nodeAddress())
+        for dp in packet.data():
+            raw_rows.append(
+                {
+                    "node_id": node_address,
+                    "channel": str(dp.channelName()),
+                    "source": "bench",
+                    "value": float(dp.as_float()),
+                    "t_ns": int(_point_time_ns(dp)),
+                    "rate_hz": float(RATE_HZ),
+                }
+            )
+    point_times = []
+    counts = {}
+    for row in raw_rows:
+        key = (row["node_id"], row["channel"], row["t_ns"])
+        dup = counts.get(key, 0)
+        counts[key] = dup + 1
+        point_times.append(row["t_ns"] + dup)
+
+    resampled_rows = []
+    grouped = {}
+    for row in raw_rows:
+        key = (row["node_id"], row["channel"], row["t_ns"] // 1_000_000_000)
+        grouped.setdefault(key, []).append(row)
+    for (_n, _c, sec), rows in grouped.items():
+        rows_sorted = sorted(rows, key=lambda r: int(r["t_ns"]))
+        n = len(rows_sorted)
+        step_ns = max(1, int(round(1_000_000_000.0 / max(r["rate_hz"] for r in rows_sorted))))
+        if step_ns * (n - 1) > 999_999_999:
+            step_ns = max(1, 999_999_999 // max(1, n - 1))
+        start_ns = sec * 1_000_000_000 + ((999_999_999 - step_ns * (n - 1)) // 2)
+        for idx, row in enumerate(rows_sorted):
+            row_out = dict(row)
+            row_out["t_resampled_ns"] = start_ns + idx * step_ns
+            resampled_rows.append(row_out)
+    counts = {}
+    for row in resampled_rows:
+        key = (row["node_id"], row["channel"], row["t_resampled_ns"])
+        counts[key] = counts.get(key, 0) + 1
+    return len(raw_rows)
+
+
+def _columnar(packets, batch):
+    batch.clear()
+    node_idx_append = batch.node_idx.append
+    channel_idx_append = batch.channel_idx.append
+    values_append = batch.values.append
+    t_ns_append = batch.t_ns.append
+    rate_hz_append = batch.rate_hz.append
+    for packet in packets:
+        node_i = batch.intern_node(str(packet.nodeAddress()))
+        for dp in packet.data():
+            node_idx_append(node_i)
+            channel_idx_append(batch.intern_channel(str(dp.channelName())))
+            values_append(float(dp.as_float()))
+            t_ns_append(int(_point_time_ns(dp)))
+            rate_hz_append(float(RATE_HZ))
+    node_idx = batch.node_idx
+    channel_idx = batch.channel_idx
+    dedupe_series_times(node_idx, channel_idx, batch.t_ns)
+    resample_uniform_second(node_idx, channel_idx, batch.t_ns, batch.rate_hz)
+    return len(batch)
+
+
+def _bench(label, fn, repeat=5):
+    best = None
+    points = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        points = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    print(f"{label:>10}: {points} points in {best * 1000:.1f} ms -> {points / best:,.0f} points/s")
+    return points / best
+
+
+def main():
+    packets = _packets()
+    batch = StreamBatch()
+    legacy = _bench("legacy", lambda: _legacy(packets))
+    columnar = _bench("columnar", lambda: _columnar(packets, batch))
+    print(f"   speedup: {columnar / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from app.mscl_api_helpers import (
     cached_node_snapshot,
     map_export_storage_error,
     parse_raw_node_id,
+    wants_async_response,
 )
 
 
@@ -37,6 +38,14 @@ class MsclApiHelpersTests(unittest.TestCase):
         self.assertEqual(status_code, 500)
         self.assertEqual(msg, "Unexpected runtime error")
 
+    def test_wants_async_response(self):
+        self.assertFalse(wants_async_response({}, {}))
+        # POST /api/export_storage defaults to 202 + job id.
+        self.assertTrue(wants_async_response({}, {}, default=True))
+        self.assertFalse(wants_async_response({"async": "0"}, {}, default=True))
+        self.assertTrue(wants_async_response({"async": "1"}, {}))
+        self.assertTrue(wants_async_response({}, {"Prefer": "respond-async, wait=5"}))
+
 
 if __name__ == "__main__":
     unittest.main()
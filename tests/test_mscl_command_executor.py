@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+
+from app.mscl_command_executor import (
+    JOB_DONE,
+    JOB_FAILED,
+    CommandExecutor,
+    CommandQueueFull,
+)
+from app.mscl_op_lock import PRIORITY_DOWNLOAD, PRIORITY_INTERACTIVE, SharedOpLock
+
+
+class CommandExecutorTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.lock = SharedOpLock(os.path.join(self._tmp.name, "base.lock"))
+        self.metrics = {}
+        self.logs = []
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _executor(self, **kwargs):
+        def inc(name, amount=1):
+            self.metrics[name] = self.metrics.get(name, 0) + amount
+
+        def set_(name, value):
+            self.metrics[name] = value
+
+        return CommandExecutor(lock=self.lock, log_func=self.logs.append, metric_inc=inc, metric_set=set_, **kwargs)
+
+    def test_jobs_run_by_priority_then_fifo(self):
+        ex = self._executor()
+        order = []
+        jobs = [
+            ex.submit("download", lambda job: order.append("download"), priority=PRIORITY_DOWNLOAD),
+            ex.submit("read_a", lambda job: order.append("read_a")),
+            ex.submit("read_b", lambda job: order.append("read_b")),
+        ]
+        ex.start()
+        for job in jobs:
+            self.assertTrue(job.wait(2.0))
+        self.assertEqual(order, ["read_a", "read_b", "download"])
+        self.assertEqual(self.metrics["command_jobs_done"], 3)
+        self.assertEqual(sorted(self.lock.stats()), ["download", "read_a", "read_b"])
+
+    def test_result_error_and_progress(self):
+        ex = self._executor()
+        ex.start()
+
+        def work(job):
+            job.set_progress(stage="download", sweeps=10)
+            return {"ok": True}
+
+        def boom(job):
+            raise RuntimeError("radio gone")
+
+        ok_job = ex.submit("api_read", work, node_id=5)
+        bad_job = ex.submit("api_write", boom, node_id=5)
+        self.assertTrue(ok_job.wait(2.0) and bad_job.wait(2.0))
+        self.assertEqual(ok_job.status, JOB_DONE)
+        self.assertEqual(ok_job.result, {"ok": True})
+        self.assertEqual(ok_job.to_dict()["progress"], {"stage": "download", "sweeps": 10})
+        self.assertEqual(bad_job.status, JOB_FAILED)
+        self.assertEqual(bad_job.error, "radio gone")
+        self.assertIs(ex.get(ok_job.id), ok_job)
+        self.assertEqual(len(self.logs), 1)
+
+    def test_queue_is_bounded(self):
+        ex = self._executor(max_queued=2)
+        ex.submit("a", lambda job: None)
+        ex.submit("b", lambda job: None)
+        with self.assertRaises(CommandQueueFull):
+            ex.submit("c", lambda job: None)
+        self.assertEqual(self.metrics["command_jobs_rejected"], 1)
+
+    def test_preempt_point_runs_better_jobs_inline(self):
+        ex = self._executor()
+        order = []
+        holder = {}
+
+        def download(job):
+            order.append("download-start")
+            holder["read"] = ex.submit("api_read", lambda j: order.append("read"))
+            ex.submit("other_download", lambda j: order.append("other_download"), priority=PRIORITY_DOWNLOAD)
+            self.assertTrue(ex.preempt_point())
+            order.append("download-end")
+
+        job = ex.submit("export", download, priority=PRIORITY_DOWNLOAD)
+        ex.start()
+        self.assertTrue(job.wait(2.0))
+        self.assertTrue(holder["read"].wait(2.0))
+        self.assertEqual(order[:3], ["download-start", "read", "download-end"])
+        self.assertEqual(self.metrics["command_jobs_preempted"], 1)
+        self.assertFalse(ex.preempt_point())
+
+    def test_preempt_point_skips_jobs_for_the_running_node(self):
+        ex = self._executor()
+        order = []
+        holder = {}
+
+        def download(job):
+            holder["clear"] = ex.submit("clear_storage", lambda j: order.append("clear-5"), node_id=5)
+            holder["read"] = ex.submit("api_read", lambda j: order.append("read-6"), node_id=6)
+            ex.preempt_point()
+            order.append("download-end")
+
+        job = ex.submit("export", download, node_id=5, priority=PRIORITY_DOWNLOAD)
+        ex.start()
+        self.assertTrue(job.wait(2.0))
+        self.assertTrue(holder["clear"].wait(2.0))
+        self.assertEqual(order, ["read-6", "download-end", "clear-5"])
+        self.assertEqual(self.metrics["command_jobs_preempted"], 1)
+
+    def test_finished_jobs_are_pruned(self):
+        now = [1000.0]
+        ex = self._executor(keep_finished=2, finished_ttl_sec=60.0, now_fn=lambda: now[0])
+        ex.start()
+        first = ex.submit("a", lambda job: None, priority=PRIORITY_INTERACTIVE)
+        first.wait(2.0)
+        now[0] += 120.0
+        second = ex.submit("b", lambda job: None)
+        second.wait(2.0)
+        self.assertIsNone(ex.get(first.id))
+        self.assertIs(ex.get(second.id), second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from app.mscl_datalog_rows import DatalogRowFile, RowView
+
+
+def _row(ts_ns, value, *, channel="ch1", tick=1, session_index=0, cal_applied=True, channel_id=1):
+    return {
+        "timestamp_utc": None,
+        "timestamp_ns": ts_ns,
+        "node_id": 7,
+        "session_index": session_index,
+        "sample_rate": "64 Hz",
+        "channel": channel,
+        "channel_id": channel_id,
+        "value": value,
+        "tick": tick,
+        "cal_applied": cal_applied,
+    }
+
+
+class DatalogRowFileTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "sub", "node_7.rows")
+
+    def test_round_trip_keeps_values_and_nones(self):
+        rows = DatalogRowFile.create(self.path, 7)
+        rows.append_rows([_row(1_700_000_000_000_000_000, 1.5), _row(1_700_000_000_000_000_000, -2.0, channel="ch2")])
+        rows.append_rows([_row(1_700_000_001_000_000_000, 3.25, tick=None, session_index=None, cal_applied=None, channel_id=None)])
+
+        out = list(rows)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([r["value"] for r in out], [1.5, -2.0, 3.25])
+        self.assertEqual([r["channel"] for r in out], ["ch1", "ch2", "ch1"])
+        self.assertEqual(out[0]["timestamp_utc"], "2023-11-14T22:13:20.000000000Z")
+        self.assertEqual(out[0]["node_id"], 7)
+        self.assertEqual(out[0]["sample_rate"], "64 Hz")
+        self.assertEqual(out[2]["tick"], None)
+        self.assertEqual(out[2]["session_index"], None)
+        self.assertEqual(out[2]["channel_id"], None)
+        self.assertEqual(out[2]["cal_applied"], None)
+        self.assertEqual(rows.max_timestamp_ns, 1_700_000_001_000_000_000)
+        # Re-iterable, also after close.
+        rows.close()
+        self.assertEqual(list(rows), out)
+
+    def test_reads_across_chunk_boundaries(self):
+        import app.mscl_datalog_rows as mod
+
+        rows = DatalogRowFile.create(self.path, 7)
+        rows.append_rows(_row(i, float(i), channel=f"c{i % 3}") for i in range(1, 500))
+        old = mod._READ_CHUNK
+        mod._READ_CHUNK = 7
+        try:
+            self.assertEqual([r["value"] for r in rows], [float(i) for i in range(1, 500)])
+        finally:
+            mod._READ_CHUNK = old
+
+    def test_discard_removes_file(self):
+        rows = DatalogRowFile.create(self.path, 7)
+        rows.append_rows([_row(1, 1.0)])
+        rows.discard()
+        self.assertFalse(os.path.exists(self.path))
+        rows.discard()
+
+    def test_open_existing_file(self):
+        rows = DatalogRowFile.create(self.path, 7)
+        rows.append_rows([_row(1, 1.0), _row(2, 2.0)])
+        rows.close()
+        reopened = DatalogRowFile.open(self.path)
+        self.assertEqual((reopened.node_id, len(reopened)), (7, 2))
+        self.assertEqual([r["value"] for r in reopened], [1.0, 2.0])
+        self.assertEqual(len(DatalogRowFile.open(self.path, count=2)), 2)
+
+
+class RowViewTests(unittest.TestCase):
+    def test_counts_lazily_and_iterates_again(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return iter([1, 2, 3])
+
+        view = RowView(factory)
+        self.assertEqual(calls, [])
+        self.assertEqual(len(view), 3)
+        self.assertTrue(view)
+        self.assertEqual(list(view), [1, 2, 3])
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(RowView(lambda: iter(()), count=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,14 @@
+import csv
+import io
+import json
 import unittest
 
 from app.mscl_export_helpers import (
+    StreamBody,
     filter_rows_by_host_window,
+    iter_csv_chunks,
+    iter_json_chunks,
+    iter_ndjson_chunks,
     parse_iso_utc_to_ns,
     resolve_export_time_window,
 )
@@ -55,5 +62,30 @@ class ExportHelpersTests(unittest.TestCase):
         self.assertEqual(len(out), 1)
 
 
+class ExportChunkTests(unittest.TestCase):
+    ROWS = [{"a": i, "b": f"x{i}"} for i in range(5)]
+
+    def test_csv_chunks(self):
+        chunks = list(iter_csv_chunks(self.ROWS, ["a", "b"], chunk_rows=2))
+        self.assertEqual(len(chunks), 3)
+        parsed = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        self.assertEqual([r["b"] for r in parsed], ["x0", "x1", "x2", "x3", "x4"])
+
+    def test_ndjson_ends_with_summary(self):
+        lines = b"".join(iter_ndjson_chunks(self.ROWS, {"point_count": 5}, chunk_rows=2)).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines[:-1]], self.ROWS)
+        self.assertEqual(json.loads(lines[-1]), {"summary": {"point_count": 5}})
+
+    def test_json_chunks_match_single_dump(self):
+        payload = {"node_id": 7, "point_count": 5}
+        for rows in (self.ROWS, []):
+            body = b"".join(iter_json_chunks(payload, rows, chunk_rows=2)).decode("utf-8")
+            self.assertEqual(body, json.dumps({**payload, "rows": rows}))
+
+    def test_stream_body_can_be_replayed(self):
+        body = StreamBody(lambda: iter_csv_chunks(self.ROWS, ["a", "b"]))
+        self.assertEqual(list(body), list(body))
+
+
 if __name__ == "__main__":
     unittest.main()
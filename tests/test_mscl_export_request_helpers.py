@@ -49,6 +49,20 @@ class ExportRequestHelpersTests(unittest.TestCase):
         self.assertEqual(out["ui_window_from_ns"], 100)
         self.assertEqual(out["ui_window_to_ns"], 200)
 
+    def test_parse_ndjson_format(self):
+        out = parse_export_storage_request({"format": "NDJSON"}, _parse_iso_stub)
+        self.assertEqual(out["export_format"], "ndjson")
+        self.assertTrue(out["use_session_cache"])
+
+    def test_cache_can_be_bypassed(self):
+        out = parse_export_storage_request({"cache": "0"}, _parse_iso_stub)
+        self.assertFalse(out["use_session_cache"])
+        self.assertFalse(out["incremental"])
+
+    def test_parse_incremental(self):
+        out = parse_export_storage_request({"format": "none", "incremental": "1"}, _parse_iso_stub)
+        self.assertTrue(out["incremental"])
+
     def test_table_invalid_cases(self):
         cases = [
             ({"format": "xml"}, "Unsupported format"),
@@ -57,6 +71,8 @@ class ExportRequestHelpersTests(unittest.TestCase):
             ({"ui_from": "bad", "ui_to": "200"}, "Invalid ui_from"),
             ({"host_hours": "abc"}, "Invalid host_hours"),
             ({"host_hours": "0"}, "host_hours must be > 0"),
+            ({"incremental": "1", "ui_from": "100", "ui_to": "200"}, "incremental cannot be combined"),
+            ({"incremental": "1", "host_hours": "2"}, "incremental cannot be combined"),
         ]
         for args, msg in cases:
             with self.assertRaises(ExportRequestValidationError) as cm:
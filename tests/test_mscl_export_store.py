@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from app.mscl_export_store import ExportStore
+
+
+def _rows(n, ts=1):
+    return [
+        {"timestamp_ns": ts + i, "session_index": 0, "sample_rate": "64 Hz", "channel": "ch1",
+         "channel_id": 1, "value": float(i), "tick": i, "cal_applied": True}
+        for i in range(n)
+    ]
+
+
+class ExportStoreTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.now = [1000.0]
+        self.store = ExportStore(self._tmp.name, max_bytes=10_000, max_entries=3, now_fn=lambda: self.now[0])
+
+    def _export(self, n=10, node_id=7):
+        rows = self.store.new_row_file(node_id)
+        rows.append_rows(_rows(n))
+        return self.store.commit(rows, {"format": "csv", "summary": {"point_count": n}})
+
+    def _age(self, export_id, mtime):
+        os.utime(os.path.join(self._tmp.name, f"{export_id}.json"), (mtime, mtime))
+
+    def test_commit_and_get(self):
+        export_id = self._export(5)
+        meta, rows = self.store.get(export_id)
+        self.assertEqual(meta["format"], "csv")
+        self.assertEqual(meta["node_id"], 7)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([r["tick"] for r in rows], [0, 1, 2, 3, 4])
+        self.assertIsNone(self.store.get("missing"))
+        self.assertIsNone(self.store.get("../etc/passwd"))
+
+    def test_evicts_least_recently_used_over_entry_limit(self):
+        ids = [self._export() for _ in range(3)]
+        for i, export_id in enumerate(ids):
+            self._age(export_id, 100 + i)
+        # Reading the oldest one makes it recently used.
+        self.store.get(ids[0])
+        new_id = self._export()
+        remaining = {m["export_id"] for m in self.store.entries()}
+        self.assertEqual(remaining, {ids[0], ids[2], new_id})
+        self.assertFalse(os.path.exists(os.path.join(self._tmp.name, f"{ids[1]}.rows")))
+        self.assertEqual(self.store.evicted, 1)
+
+    def test_evicts_by_size_but_keeps_new_entry(self):
+        old_id = self._export(100)
+        self._age(old_id, 100)
+        new_id = self._export(400)
+        self.assertEqual([m["export_id"] for m in self.store.entries()], [new_id])
+
+    def test_orphaned_row_files_are_removed(self):
+        pending = self.store.new_row_file(7)
+        orphan = os.path.join(self._tmp.name, "node7-old.rows")
+        open(orphan, "wb").close()
+        self.store.evict()
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(pending.path))
+
+    def test_remove(self):
+        export_id = self._export()
+        self.assertTrue(self.store.remove(export_id))
+        self.assertFalse(self.store.remove(export_id))
+        self.assertEqual(self.store.entries(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+from app.mscl_harvest_service import (
+    DownloadCheckpoint,
+    HarvestCursorFile,
+    cursor_fields,
+    cursor_from_fields,
+    cursor_is_stale,
+    is_after_cursor,
+    iter_rows_after_cursor,
+    last_position,
+    persist_harvest_cursor,
+    storage_unchanged,
+)
+
+
+class HarvestCursorTests(unittest.TestCase):
+    CURSOR = {"session_index": 2, "tick": 100, "session_count": 3, "percent_full": 10.0}
+
+    def test_is_after_cursor(self):
+        self.assertTrue(is_after_cursor(None, 0, 0))
+        self.assertFalse(is_after_cursor(self.CURSOR, 1, 5000))
+        self.assertFalse(is_after_cursor(self.CURSOR, 2, 100))
+        self.assertTrue(is_after_cursor(self.CURSOR, 2, 101))
+        self.assertTrue(is_after_cursor(self.CURSOR, 3, 0))
+        # Rows without a position cannot be placed and are kept.
+        self.assertTrue(is_after_cursor(self.CURSOR, None, 0))
+
+    def test_rows_after_cursor_and_last_position(self):
+        rows = [{"session_index": s, "tick": t} for s, t in ((2, 99), (2, 100), (2, 101), (3, 1), (3, None))]
+        out = list(iter_rows_after_cursor(rows, self.CURSOR))
+        self.assertEqual([(r["session_index"], r["tick"]) for r in out], [(2, 101), (3, 1), (3, None)])
+        self.assertEqual(last_position(rows), {"session_index": 3, "tick": 1})
+        self.assertIsNone(last_position([{"session_index": None, "tick": None}]))
+
+    def test_stale_when_storage_shrank(self):
+        self.assertFalse(cursor_is_stale(self.CURSOR, {"session_count": 4, "percent_full": 12.0}))
+        self.assertTrue(cursor_is_stale(self.CURSOR, {"session_count": 1, "percent_full": 12.0}))
+        self.assertTrue(cursor_is_stale(self.CURSOR, {"session_count": 3, "percent_full": 0.5}))
+        self.assertFalse(cursor_is_stale(self.CURSOR, None))
+
+    def test_storage_unchanged_needs_an_exact_fingerprint(self):
+        self.assertTrue(storage_unchanged(self.CURSOR, {"session_count": 3, "percent_full": 10.0}))
+        self.assertFalse(storage_unchanged(self.CURSOR, {"session_count": 3, "percent_full": 10.0001}))
+        self.assertFalse(storage_unchanged(self.CURSOR, {"session_count": 3, "percent_full": None}))
+        no_fingerprint = {"session_index": 2, "tick": 100}
+        self.assertFalse(storage_unchanged(no_fingerprint, {"session_count": 3, "percent_full": 10.0}))
+        self.assertFalse(storage_unchanged(None, {"session_count": 3, "percent_full": 10.0}))
+
+    def test_checkpoint_skips_captured_sweeps_after_restart(self):
+        checkpoint = DownloadCheckpoint()
+        for tick in (1, 2, 3):
+            self.assertFalse(checkpoint.should_skip(0, tick))
+            checkpoint.record(0, tick)
+        checkpoint.restart()
+        self.assertTrue(checkpoint.skipping)
+        kept = [tick for tick in (1, 2, 3, 3, 4, 5) if not checkpoint.should_skip(0, tick)]
+        # The re-delivered boundary sweep (tick 3) is dropped as well.
+        self.assertEqual(kept, [4, 5])
+        self.assertEqual(checkpoint.skipped, 4)
+        self.assertFalse(checkpoint.skipping)
+
+    def test_checkpoint_without_ticks_skips_by_count(self):
+        checkpoint = DownloadCheckpoint()
+        checkpoint.record(None, None)
+        checkpoint.record(None, None)
+        checkpoint.restart()
+        self.assertEqual([checkpoint.should_skip(None, None) for _ in range(3)], [True, True, False])
+
+    def test_cursor_fields_are_complete_and_round_trip(self):
+        self.assertEqual(cursor_from_fields(cursor_fields(self.CURSOR)), self.CURSOR)
+        reset = cursor_fields(None)
+        self.assertEqual(reset, {"session_index": -1, "tick": -1, "session_count": -1, "percent_full": -1.0})
+        self.assertIsNone(cursor_from_fields(reset))
+        partial = cursor_fields({"session_index": 1, "tick": 5})
+        self.assertEqual(
+            cursor_from_fields(partial), {"session_index": 1, "tick": 5, "session_count": None, "percent_full": None}
+        )
+        # A row missing fields (e.g. written by an older version) is not trusted.
+        self.assertIsNone(cursor_from_fields({"session_index": 1, "tick": 5}))
+
+    def test_cursor_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cursors = HarvestCursorFile(os.path.join(tmp, "sub", "cursors.state"))
+            self.assertIsNone(cursors.get(7))
+            cursors.set(7, self.CURSOR)
+            cursors.set(8, {"session_index": 0, "tick": 1})
+            self.assertEqual(HarvestCursorFile(cursors.path).get(7), self.CURSOR)
+            cursors.set(7, None)
+            self.assertIsNone(cursors.get(7))
+            self.assertEqual(cursors.get(8)["tick"], 1)
+
+    def test_persist_without_influx_config_is_noop(self):
+        persist_harvest_cursor(
+            node_id=7,
+            cursor=self.CURSOR,
+            influx_url="http://unused",
+            influx_token=None,
+            influx_org=None,
+            influx_bucket=None,
+            measurement="mscl_meta",
+            metric="datalog_harvest_cursor",
+            log_func=lambda _msg: self.fail("should not log"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
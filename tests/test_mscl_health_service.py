@@ -1,15 +1,21 @@
 import unittest
 
 from app.mscl_health_service import build_health_payload
+from app.mscl_state_snapshot import StateSnapshot
 
 
-class _FakeState:
-    def __init__(self):
-        self.BASE_STATION = object()
-        self.LAST_PING_OK_TS = 0.0
-        self.STREAM_PAUSE_UNTIL = 0.0
-        self.PING_TTL_SEC = 10.0
-        self.CURRENT_PORT = "/dev/ttyUSB1"
+def _snapshot(now, **overrides):
+    fields = dict(
+        ts=now,
+        BASE_STATION=object(),
+        LAST_PING_OK_TS=0.0,
+        PING_TTL_SEC=10.0,
+        CURRENT_PORT="/dev/ttyUSB1",
+        stream_wait_sec=0.0,
+        metrics={},
+    )
+    fields.update(overrides)
+    return StateSnapshot(**fields)
 
 
 class HealthServiceTests(unittest.TestCase):
@@ -20,7 +26,7 @@ class HealthServiceTests(unittest.TestCase):
                 "name": "ok",
                 "connected": True,
                 "last_ping_delta": 2.0,
-                "pause_delta": -1.0,
+                "stream_wait": 0.0,
                 "expected_status": "ok",
                 "expected_reasons": [],
             },
@@ -28,7 +34,7 @@ class HealthServiceTests(unittest.TestCase):
                 "name": "base_disconnected",
                 "connected": False,
                 "last_ping_delta": None,
-                "pause_delta": -1.0,
+                "stream_wait": 0.0,
                 "expected_status": "degraded",
                 "expected_reasons": ["base_disconnected"],
             },
@@ -36,7 +42,7 @@ class HealthServiceTests(unittest.TestCase):
                 "name": "ping_stale",
                 "connected": True,
                 "last_ping_delta": 20.0,
-                "pause_delta": -1.0,
+                "stream_wait": 0.0,
                 "expected_status": "degraded",
                 "expected_reasons": ["ping_stale"],
             },
@@ -44,7 +50,7 @@ class HealthServiceTests(unittest.TestCase):
                 "name": "stream_paused",
                 "connected": True,
                 "last_ping_delta": 2.0,
-                "pause_delta": 5.0,
+                "stream_wait": 5.0,
                 "expected_status": "degraded",
                 "expected_reasons": ["stream_paused"],
             },
@@ -52,38 +58,63 @@ class HealthServiceTests(unittest.TestCase):
                 "name": "all_reasons",
                 "connected": False,
                 "last_ping_delta": 20.0,
-                "pause_delta": 5.0,
+                "stream_wait": 5.0,
                 "expected_status": "degraded",
                 "expected_reasons": ["base_disconnected", "ping_stale", "stream_paused"],
             },
         ]
 
         for case in cases:
-            st = _FakeState()
-            st.BASE_STATION = object() if case["connected"] else None
             if case["last_ping_delta"] is None:
-                st.LAST_PING_OK_TS = 0.0
+                last_ping = 0.0
             else:
-                st.LAST_PING_OK_TS = now - float(case["last_ping_delta"])
-            st.STREAM_PAUSE_UNTIL = now + float(case["pause_delta"])
-
-            payload = build_health_payload(
-                state=st,
-                now=now,
-                metric_snapshot_fn=lambda: {"stream_queue_depth": 7},
+                last_ping = now - float(case["last_ping_delta"])
+            snap = _snapshot(
+                now,
+                BASE_STATION=object() if case["connected"] else None,
+                LAST_PING_OK_TS=last_ping,
+                stream_wait_sec=float(case["stream_wait"]),
+                metrics={"stream_queue_depth": 7},
             )
+
+            payload = build_health_payload(snapshot=snap, now=now)
             self.assertEqual(payload["status"], case["expected_status"])
             self.assertEqual(payload["reasons"], case["expected_reasons"])
             self.assertEqual(payload["stream_queue_depth"], 7)
 
-    def test_pause_remaining(self):
-        st = _FakeState()
+    def test_stream_wait(self):
         now = 1000.0
-        st.LAST_PING_OK_TS = now - 1.0
-        st.STREAM_PAUSE_UNTIL = now + 3.25
-        payload = build_health_payload(state=st, now=now, metric_snapshot_fn=lambda: {})
+        snap = _snapshot(now, LAST_PING_OK_TS=now - 1.0, stream_wait_sec=3.25)
+        payload = build_health_payload(snapshot=snap, now=now)
         self.assertEqual(payload["stream_paused"], True)
-        self.assertAlmostEqual(payload["stream_pause_remaining_sec"], 3.25, places=2)
+        self.assertAlmostEqual(payload["stream_wait_sec"], 3.25, places=2)
+
+    def test_recent_packets_keep_link_fresh_without_pings(self):
+        now = 1000.0
+        snap = _snapshot(now, LAST_PING_OK_TS=now - 60.0, LAST_PACKET_TS=now - 0.5)
+        payload = build_health_payload(snapshot=snap, now=now)
+        self.assertEqual(payload["status"], "ok")
+        self.assertAlmostEqual(payload["ping_age_sec"], 0.5, places=3)
+        self.assertAlmostEqual(payload["packet_age_sec"], 0.5, places=3)
+
+    def test_high_ingest_lag_degrades(self):
+        snap = _snapshot(1000.0, ingest_lag_p99_sec=45.0)
+        payload = build_health_payload(snapshot=snap, now=1000.0)
+        self.assertEqual(payload["status"], "degraded")
+        self.assertEqual(payload["reasons"], ["ingest_lag_high"])
+        self.assertAlmostEqual(payload["ingest_lag_p99_sec"], 45.0)
+
+    def test_short_stream_wait_is_not_paused(self):
+        snap = _snapshot(1000.0, stream_wait_sec=0.2)
+        payload = build_health_payload(snapshot=snap, now=1000.0)
+        self.assertEqual(payload["stream_paused"], False)
+        self.assertEqual(payload["reasons"], [])
+
+    def test_stale_snapshot_degrades(self):
+        snap = _snapshot(1000.0)
+        payload = build_health_payload(snapshot=snap, now=1010.0)
+        self.assertEqual(payload["reasons"], ["snapshot_stale"])
+        self.assertAlmostEqual(payload["snapshot_age_sec"], 10.0)
 
 
 if __name__ == "__main__":
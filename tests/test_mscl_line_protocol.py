@@ -0,0 +1,71 @@
+import unittest
+from array import array
+
+from app.mscl_line_protocol import LineProtocolEncoder, format_float_field
+
+
+class LineProtocolEncoderTests(unittest.TestCase):
+    def test_float_formatting_matches_point(self):
+        self.assertEqual(format_float_field(21.0), b"21")
+        self.assertEqual(format_float_field(-0.25), b"-0.25")
+        self.assertEqual(format_float_field(1e20), b"1e+20")
+        self.assertIsNone(format_float_field(float("nan")))
+        self.assertIsNone(format_float_field(float("inf")))
+
+    def test_prefix_escapes_and_sorts_tags(self):
+        enc = LineProtocolEncoder()
+        prefix = enc.prefix("mscl sensors", "169 04", "ch=1,x", "src", "resampled_uniform_second")
+        self.assertEqual(
+            prefix,
+            b"mscl\\ sensors,channel=ch\\=1\\,x,node_id=169\\ 04,source=src,time_model=resampled_uniform_second",
+        )
+        self.assertIs(enc.prefix("mscl sensors", "169 04", "ch=1,x", "src", "resampled_uniform_second"), prefix)
+        self.assertEqual(enc.prefix("m", "1", "ch1", ""), b"m,channel=ch1,node_id=1")
+
+    def test_backslash_in_tag_value_matches_point(self):
+        enc = LineProtocolEncoder()
+        self.assertEqual(enc.prefix("m", "1", "a\\b", "src"), b"m,channel=a\\b,node_id=1,source=src")
+        # Point appends a space after a trailing backslash so it does not escape the separator.
+        self.assertEqual(enc.prefix("m", "1", "a\\", "src"), b"m,channel=a\\ ,node_id=1,source=src")
+
+    def test_add_lines_and_take_resets(self):
+        enc = LineProtocolEncoder()
+        prefix = enc.prefix("m", "1", "ch1", "s")
+        self.assertTrue(enc.add(prefix, 1.5, 100))
+        self.assertTrue(enc.add(prefix, 2.0, 101, raw_ts_ns=99))
+        self.assertFalse(enc.add(prefix, float("nan"), 102))
+        self.assertTrue(enc.add(prefix, float("nan"), 103, raw_ts_ns=98))
+        self.assertEqual(enc.lines, 3)
+        self.assertEqual(
+            enc.take(),
+            b"m,channel=ch1,node_id=1,source=s value=1.5 100\n"
+            b"m,channel=ch1,node_id=1,source=s raw_ts_ns=99i,value=2 101\n"
+            b"m,channel=ch1,node_id=1,source=s raw_ts_ns=98i 103\n",
+        )
+        self.assertEqual(enc.lines, 0)
+        self.assertEqual(enc.take(), b"")
+
+    def test_add_series_with_order(self):
+        enc = LineProtocolEncoder()
+        enc.add_series(
+            measurement="r",
+            source="s",
+            node_ids=["10", "20"],
+            channels=["ch1"],
+            node_idx=array("i", [0, 1, 0]),
+            channel_idx=array("i", [0, 0, 0]),
+            values=array("d", [1.0, 2.0, 3.0]),
+            times=array("q", [500, 600]),
+            order=array("q", [2, 1]),
+            raw_times=array("q", [7, 8, 9]),
+            time_model="tm",
+        )
+        self.assertEqual(
+            enc.take(),
+            b"r,channel=ch1,node_id=10,source=s,time_model=tm raw_ts_ns=9i,value=3 500\n"
+            b"r,channel=ch1,node_id=20,source=s,time_model=tm raw_ts_ns=8i,value=2 600\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
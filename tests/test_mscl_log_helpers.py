@@ -0,0 +1,67 @@
+import io
+import unittest
+
+from app.mscl_log_helpers import KeyRateLimiter, LogRing, StdoutLogWriter, format_log_entry
+
+
+class LogRingTests(unittest.TestCase):
+    def test_since_returns_only_new_entries(self):
+        ring = LogRing(maxlen=10, now_fn=lambda: 0.0)
+        ring.append("a")
+        seq = ring.append("b")
+        ring.append("c")
+
+        entries, last_seq, reset = ring.since(seq)
+        self.assertEqual([e["msg"] for e in entries], ["c"])
+        self.assertEqual(last_seq, 3)
+        self.assertFalse(reset)
+        self.assertEqual(ring.since(last_seq), ([], 3, False))
+
+    def test_cursor_older_than_ring_resets(self):
+        ring = LogRing(maxlen=2)
+        for msg in "abcd":
+            ring.append(msg)
+        entries, last_seq, reset = ring.since(1)
+        self.assertTrue(reset)
+        self.assertEqual([e["msg"] for e in entries], ["c", "d"])
+        self.assertEqual(last_seq, 4)
+
+    def test_cursor_from_previous_process_resets(self):
+        ring = LogRing(maxlen=5)
+        ring.append("fresh")
+        entries, _last_seq, reset = ring.since(42)
+        self.assertTrue(reset)
+        self.assertEqual([e["msg"] for e in entries], ["fresh"])
+
+    def test_format_entry(self):
+        ring = LogRing(maxlen=2, now_fn=lambda: 0.0)
+        ring.append("[mscl-web] hello")
+        line = format_log_entry(ring.since(0)[0][0])
+        self.assertTrue(line.endswith(" [mscl-web] hello"))
+
+
+class KeyRateLimiterTests(unittest.TestCase):
+    def test_limits_per_key_and_reports_suppressed(self):
+        now = [0.0]
+        limiter = KeyRateLimiter(interval_sec=5.0, now_fn=lambda: now[0])
+        self.assertEqual(limiter.allow("k"), (True, 0))
+        self.assertEqual(limiter.allow("k"), (False, 0))
+        self.assertEqual(limiter.allow("k"), (False, 0))
+        self.assertEqual(limiter.allow("other"), (True, 0))
+        self.assertEqual(limiter.allow(None), (True, 0))
+        now[0] = 5.0
+        self.assertEqual(limiter.allow("k"), (True, 2))
+
+
+class StdoutLogWriterTests(unittest.TestCase):
+    def test_writes_in_background(self):
+        out = io.StringIO()
+        writer = StdoutLogWriter(stream=out)
+        writer.write("one")
+        writer.write("two")
+        writer.flush()
+        self.assertEqual(out.getvalue().splitlines(), ["one", "two"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from app.mscl_metrics_helpers import (
+    HistogramFamily,
+    HistogramWindow,
+    LatencyHistogram,
+    prometheus_name,
+    render_prometheus,
+)
+
+
+class LatencyHistogramTests(unittest.TestCase):
+    def test_empty_snapshot(self):
+        snap = LatencyHistogram().snapshot()
+        self.assertEqual(snap["count"], 0)
+        self.assertEqual(snap["p99_sec"], 0.0)
+
+    def test_quantiles_interpolate_within_buckets(self):
+        hist = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+        for _ in range(90):
+            hist.observe(0.005)
+        for _ in range(10):
+            hist.observe(0.5)
+        self.assertAlmostEqual(hist.quantile(0.5), 0.01 * 50 / 90)
+        self.assertAlmostEqual(hist.quantile(0.95), 0.1 + 0.9 * 5 / 10)
+        self.assertEqual(hist.cumulative_counts()[-1], (float("inf"), 100))
+        snap = hist.snapshot()
+        self.assertEqual(snap["count"], 100)
+        self.assertEqual(snap["max_sec"], 0.5)
+        self.assertAlmostEqual(snap["avg_sec"], (90 * 0.005 + 10 * 0.5) / 100)
+
+    def test_overflow_bucket_reports_max(self):
+        hist = LatencyHistogram(buckets=(0.1,))
+        hist.observe(7.0)
+        self.assertEqual(hist.quantile(0.99), 7.0)
+
+    def test_observe_many_matches_observe(self):
+        one = LatencyHistogram(buckets=(0.01, 0.1))
+        many = LatencyHistogram(buckets=(0.01, 0.1))
+        values = [0.001, 0.05, 0.05, 2.0, -1.0]
+        for v in values:
+            one.observe(v)
+        many.observe_many(values)
+        self.assertEqual(one.cumulative_counts(), many.cumulative_counts())
+        self.assertEqual(one.snapshot(), many.snapshot())
+
+    def test_window_forgets_old_observations(self):
+        hist = LatencyHistogram(buckets=(0.1, 1.0, 10.0))
+        window = HistogramWindow(hist, window_sec=60.0)
+        hist.observe_many([0.05] * 1000)
+        self.assertLessEqual(window.quantile(0.99, now=0.0), 0.1)
+        hist.observe_many([5.0] * 20)
+        # The 1000 fast samples were already counted at t=0; only the slow ones are new.
+        self.assertGreater(window.quantile(0.5, now=70.0), 1.0)
+        self.assertGreater(hist.quantile(0.99), 1.0)
+        self.assertLessEqual(hist.quantile(0.5), 0.1)
+
+    def test_family_creates_per_label(self):
+        family = HistogramFamily()
+        family.observe("b", 0.2)
+        family.observe("a", 0.1)
+        family.observe("a", 0.3)
+        self.assertEqual([label for label, _ in family.items()], ["a", "b"])
+        self.assertEqual(family.snapshot()["a"]["count"], 2)
+
+
+class PrometheusRenderTests(unittest.TestCase):
+    def test_values_and_histograms(self):
+        family = HistogramFamily(buckets=(0.01, 0.1))
+        family.observe("decode", 0.005)
+        family.observe("decode", 0.05)
+        family.observe("decode", 3.0)
+        text = render_prometheus(
+            values={"stream_packets_read": 12, "stream_influx_healthy": True, "base_port": "/dev/ttyACM0"},
+            histograms=[("stream_stage", "stage", family, "Stage duration.")],
+        )
+        lines = text.splitlines()
+        self.assertIn("mscl_stream_packets_read 12", lines)
+        self.assertIn("mscl_stream_influx_healthy 1", lines)
+        self.assertFalse(any("base_port" in line for line in lines))
+        self.assertIn("# TYPE mscl_stream_stage_seconds histogram", lines)
+        self.assertIn('mscl_stream_stage_seconds_bucket{stage="decode",le="0.01"} 1', lines)
+        self.assertIn('mscl_stream_stage_seconds_bucket{stage="decode",le="0.1"} 2', lines)
+        self.assertIn('mscl_stream_stage_seconds_bucket{stage="decode",le="+Inf"} 3', lines)
+        self.assertIn('mscl_stream_stage_seconds_count{stage="decode"} 3', lines)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_label_values_are_escaped(self):
+        family = HistogramFamily(buckets=(1.0,))
+        family.observe('a"b', 0.1)
+        text = render_prometheus(histograms=[("x", "tag", family, "X.")])
+        self.assertIn('mscl_x_seconds_count{tag="a\\"b"} 1', text)
+
+    def test_metric_names_are_sanitized(self):
+        self.assertEqual(prometheus_name("stream.queue-depth"), "stream_queue_depth")
+        self.assertEqual(prometheus_name("9lives"), "_9lives")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app import mscl_op_lock
+from app.mscl_op_lock import (
+    PRIORITY_DOWNLOAD,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_STREAM,
+    SharedOpLock,
+)
+
+
+class SharedOpLockTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "sub", "base.lock")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_lock_file_opened_once(self):
+        lock = SharedOpLock(self.path)
+        real_open = open
+        with mock.patch("builtins.open", side_effect=real_open) as opened:
+            for _ in range(5):
+                with lock.tagged("stream_reader"):
+                    pass
+            with lock:
+                pass
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(lock.acquisitions, 6)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_reentrant_acquire_counts_outermost_only(self):
+        lock = SharedOpLock(self.path)
+        with lock.tagged("api_read"):
+            with lock.tagged("inner"):
+                pass
+        stats = lock.stats()
+        self.assertEqual(lock.acquisitions, 1)
+        self.assertEqual(list(stats), ["api_read"])
+        self.assertEqual(stats["api_read"]["hold"]["count"], 1)
+
+    def test_wait_time_recorded_per_tag(self):
+        lock = SharedOpLock(self.path)
+        holding = threading.Event()
+
+        def holder():
+            with lock.tagged("export"):
+                holding.set()
+                time.sleep(0.05)
+
+        t = threading.Thread(target=holder)
+        t.start()
+        holding.wait(1.0)
+        with lock.tagged("api_read"):
+            pass
+        t.join()
+        stats = lock.stats()
+        self.assertGreaterEqual(stats["api_read"]["wait"]["max_sec"], 0.03)
+        self.assertGreaterEqual(stats["export"]["hold"]["max_sec"], 0.04)
+
+    def test_failed_flock_releases_thread_lock(self):
+        lock = SharedOpLock(self.path)
+        with mock.patch.object(mscl_op_lock.fcntl, "flock", side_effect=OSError("boom")):
+            with self.assertRaises(OSError):
+                with lock:
+                    pass
+        acquired = []
+
+        def other():
+            with lock.tagged("api_read"):
+                acquired.append(True)
+
+        t = threading.Thread(target=other)
+        t.start()
+        t.join(1.0)
+        self.assertEqual(acquired, [True])
+
+    def _queue_waiters(self, lock, specs, order):
+        threads = []
+        for tag, priority in specs:
+            t = threading.Thread(target=self._take, args=(lock, tag, priority, order))
+            t.start()
+            threads.append(t)
+            # Wait until the thread is queued so arrival order is deterministic.
+            deadline = time.monotonic() + 1.0
+            while len(lock._waiters) < len(threads) and time.monotonic() < deadline:
+                time.sleep(0.001)
+        return threads
+
+    @staticmethod
+    def _take(lock, tag, priority, order):
+        with lock.tagged(tag, priority):
+            order.append(tag)
+
+    def test_release_hands_off_by_priority_then_arrival(self):
+        lock = SharedOpLock(self.path)
+        order = []
+        with lock.tagged("holder"):
+            threads = self._queue_waiters(
+                lock,
+                [
+                    ("stream", PRIORITY_STREAM),
+                    ("download", PRIORITY_DOWNLOAD),
+                    ("read_a", PRIORITY_INTERACTIVE),
+                    ("read_b", PRIORITY_INTERACTIVE),
+                ],
+                order,
+            )
+            self.assertEqual(lock.status()["waiting"], {"stream": 1, "download": 1, "interactive": 2})
+            self.assertGreater(lock.wait_age_sec(PRIORITY_STREAM), 0.0)
+        for t in threads:
+            t.join(1.0)
+        self.assertEqual(order, ["read_a", "read_b", "download", "stream"])
+        self.assertEqual(lock.wait_age_sec(PRIORITY_STREAM), 0.0)
+
+    def test_yield_if_preempted_lets_better_class_in(self):
+        lock = SharedOpLock(self.path)
+        order = []
+        with lock.tagged("export", PRIORITY_DOWNLOAD):
+            with lock.tagged("nested", PRIORITY_DOWNLOAD):
+                self.assertFalse(lock.yield_if_preempted())
+                threads = self._queue_waiters(lock, [("stream", PRIORITY_STREAM)], order)
+                self.assertFalse(lock.preempt_pending())
+                self.assertFalse(lock.yield_if_preempted())
+                threads += self._queue_waiters(lock, [("api_read", PRIORITY_INTERACTIVE)], order)
+                self.assertTrue(lock.preempt_pending())
+                self.assertTrue(lock.yield_if_preempted())
+                order.append("export")
+                self.assertEqual(lock.status()["holder"], "export")
+        for t in threads:
+            t.join(1.0)
+        self.assertEqual(order, ["api_read", "export", "stream"])
+        self.assertEqual(lock.preemptions, 1)
+        self.assertIsNone(lock.status()["holder"])
+
+    def test_yield_outside_lock_is_noop(self):
+        lock = SharedOpLock(self.path)
+        self.assertFalse(lock.yield_if_preempted())
+        with self.assertRaises(RuntimeError):
+            lock.release()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from app.mscl_port_helpers import PortWatcher, resolve_port
+
+
+def _fake_glob(entries):
+    def glob_fn(pattern):
+        prefix = pattern.rstrip("*")
+        return [e for e in entries if e.startswith(prefix)]
+
+    return glob_fn
+
+
+class ResolvePortTests(unittest.TestCase):
+    def test_configured_port_wins_while_present(self):
+        entries = ["/dev/serial/by-id/usb-base-if00", "/dev/ttyACM0"]
+        port = resolve_port(
+            "/dev/ttyUSB3",
+            glob_fn=_fake_glob(entries),
+            exists_fn=lambda p: p == "/dev/ttyUSB3",
+        )
+        self.assertEqual(port, "/dev/ttyUSB3")
+
+    def test_missing_configured_port_falls_back_to_by_id(self):
+        entries = ["/dev/serial/by-id/usb-b-if00", "/dev/serial/by-id/usb-a-if00", "/dev/ttyACM0"]
+        port = resolve_port("/dev/ttyUSB3", glob_fn=_fake_glob(entries), exists_fn=lambda _p: False)
+        self.assertEqual(port, "/dev/serial/by-id/usb-a-if00")
+
+    def test_tty_nodes_used_without_by_id_links(self):
+        entries = ["/dev/ttyUSB1", "/dev/ttyUSB0"]
+        self.assertEqual(resolve_port(glob_fn=_fake_glob(entries)), "/dev/ttyUSB0")
+        entries.append("/dev/ttyACM2")
+        self.assertEqual(resolve_port(glob_fn=_fake_glob(entries)), "/dev/ttyACM2")
+
+    def test_nothing_plugged_in(self):
+        self.assertIsNone(resolve_port(glob_fn=_fake_glob([])))
+
+
+class PortWatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.port = None
+        self.changes = []
+        self.watcher = PortWatcher(
+            resolve_fn=lambda: self.port,
+            on_change=lambda port, present: self.changes.append((port, present)),
+        )
+
+    def test_reports_appear_and_remove(self):
+        self.assertFalse(self.watcher.check())
+        self.port = "/dev/ttyACM0"
+        self.assertTrue(self.watcher.check())
+        self.assertFalse(self.watcher.check())
+        self.port = None
+        self.assertTrue(self.watcher.check())
+        self.assertEqual(self.changes, [("/dev/ttyACM0", True), ("/dev/ttyACM0", False)])
+        self.assertEqual(self.watcher.events, 2)
+
+    def test_port_rename_reports_both_sides(self):
+        self.port = "/dev/ttyACM0"
+        self.watcher.check()
+        self.port = "/dev/ttyACM1"
+        self.watcher.check()
+        self.assertEqual(
+            self.changes,
+            [("/dev/ttyACM0", True), ("/dev/ttyACM0", False), ("/dev/ttyACM1", True)],
+        )
+
+    def test_replaced_device_node_counts_as_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.port = os.path.join(tmp, "ttyACM0")
+            open(self.port, "w").close()
+            self.watcher.check()
+            # Keep the old inode alive so the new file cannot reuse it.
+            os.rename(self.port, self.port + ".old")
+            open(self.port, "w").close()
+            self.assertTrue(self.watcher.check())
+        self.assertEqual(self.changes, [(self.port, True), (self.port, False), (self.port, True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from app.mscl_reader_helpers import AdaptiveReadTimeout, RateMeter, ThreadCpuMeter
+
+
+class _Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class AdaptiveReadTimeoutTests(unittest.TestCase):
+    def test_idle_reads_back_off_to_max(self):
+        timeout = AdaptiveReadTimeout(min_ms=20, max_ms=250)
+        self.assertEqual(timeout.update(0, 0.02), 250)
+        self.assertEqual(timeout.timeout_ms, 250)
+
+    def test_busy_reads_stay_at_min(self):
+        timeout = AdaptiveReadTimeout(min_ms=20, max_ms=250)
+        for _ in range(5):
+            timeout.update(50, 0.02)
+        self.assertEqual(timeout.timeout_ms, 20)
+
+    def test_timeout_follows_rate_and_decays_when_idle(self):
+        timeout = AdaptiveReadTimeout(min_ms=20, max_ms=1000, alpha=1.0)
+        self.assertEqual(timeout.update(1, 0.1), 200)  # 10 packets/s -> 2 inter-arrivals = 200 ms
+        timeout = AdaptiveReadTimeout(min_ms=20, max_ms=1000, alpha=0.5)
+        timeout.update(10, 0.1)
+        previous = timeout.timeout_ms
+        timeout.update(0, 0.25)
+        self.assertGreater(timeout.timeout_ms, previous)
+
+
+    def test_locked_wait_is_capped(self):
+        timeout = AdaptiveReadTimeout(min_ms=20, max_ms=250, lock_cap_ms=50)
+        timeout.update(0, 0.05)
+        self.assertEqual(timeout.lock_ms, 50)
+        self.assertAlmostEqual(timeout.unlocked_wait_sec, 0.2)
+        for _ in range(5):
+            timeout.update(50, 0.02)
+        self.assertEqual(timeout.lock_ms, 20)
+        self.assertEqual(timeout.unlocked_wait_sec, 0.0)
+
+class MeterTests(unittest.TestCase):
+    def test_rate_meter(self):
+        clock = _Clock(10.0)
+        meter = RateMeter(now_fn=clock)
+        self.assertEqual(meter.sample(100), 0.0)
+        clock.now = 12.0
+        self.assertEqual(meter.sample(150), 25.0)
+
+    def test_thread_cpu_meter(self):
+        wall = _Clock(0.0)
+        cpu = _Clock(0.0)
+        meter = ThreadCpuMeter(now_fn=wall, cpu_fn=cpu)
+        wall.now, cpu.now = 2.0, 0.5
+        self.assertEqual(meter.sample(), 25.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
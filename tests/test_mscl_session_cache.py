@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from app.mscl_datalog_rows import DatalogRowFile
+from app.mscl_session_cache import SessionCache, SessionTracker, session_key, session_start_matches
+
+
+def _row(session_index, tick, value):
+    return {"timestamp_ns": 1_000 + tick, "session_index": session_index, "sample_rate": "64 Hz",
+            "channel": "ch1", "channel_id": 1, "value": value, "tick": tick, "cal_applied": True}
+
+
+class SessionCacheTests(unittest.TestCase):
+    FINGERPRINT = {"session_count": 2, "percent_full": 12.5}
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.cache = SessionCache(os.path.join(self._tmp.name, "sessions"))
+
+    def _download(self):
+        rows = DatalogRowFile.create(os.path.join(self._tmp.name, "dl.rows"), 7)
+        tracker = SessionTracker()
+        for session_index, ticks in ((0, (5, 6, 7)), (1, (0, 1))):
+            for tick in ticks:
+                sweep_rows = [_row(session_index, tick, float(tick)), _row(session_index, tick, -float(tick))]
+                rows.append_rows(sweep_rows)
+                tracker.add_sweep(session_index, "64 Hz", tick, len(sweep_rows))
+        # A sweep without datapoints still counts as a sweep of the session.
+        tracker.add_sweep(1, "64 Hz", None, 0)
+        rows.close()
+        return rows, tracker
+
+    def test_session_start_matches_first_cached_session(self):
+        _rows, tracker = self._download()
+        cached = self.cache.store(7, self.FINGERPRINT, tracker.segments, _rows)
+        first = SessionTracker()
+        first.add_sweep(0, "64 Hz", 5, 2)
+        self.assertTrue(session_start_matches(cached, first.segments))
+        for session_index, rate, tick in ((0, "64 Hz", 9), (2, "64 Hz", 5), (0, "128 Hz", 5)):
+            other = SessionTracker()
+            other.add_sweep(session_index, rate, tick, 2)
+            self.assertFalse(session_start_matches(cached, other.segments))
+        self.assertFalse(session_start_matches(cached, []))
+
+    def test_tracker_segments(self):
+        _rows, tracker = self._download()
+        self.assertEqual(
+            [(s["session_index"], s["first_tick"], s["sweeps"], s["points"]) for s in tracker.segments],
+            [(0, 5, 3, 6), (1, 0, 3, 4)],
+        )
+
+    def test_store_then_serve_from_cache(self):
+        rows, tracker = self._download()
+        stored = self.cache.store(7, self.FINGERPRINT, tracker.segments, rows)
+        self.assertEqual(stored[0]["key"], session_key(7, 0, "64 Hz", 5, 3))
+
+        self.assertIsNone(self.cache.lookup(7, {**self.FINGERPRINT, "percent_full": 13.0}))
+        self.assertIsNone(self.cache.lookup(8, self.FINGERPRINT))
+        segments = self.cache.lookup(7, self.FINGERPRINT)
+        out = DatalogRowFile.create(os.path.join(self._tmp.name, "out.rows"), 7)
+        self.cache.copy_into(segments, out)
+        self.assertEqual(list(out), list(rows))
+
+    def test_invalidate_removes_session_files(self):
+        rows, tracker = self._download()
+        self.cache.store(7, self.FINGERPRINT, tracker.segments, rows)
+        self.cache.invalidate(7)
+        self.assertIsNone(self.cache.lookup(7, self.FINGERPRINT))
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_unchanged_sessions_are_shared_between_downloads(self):
+        rows, tracker = self._download()
+        self.cache.store(7, self.FINGERPRINT, tracker.segments, rows)
+        before = os.path.getmtime(self.cache._rows_path(session_key(7, 0, "64 Hz", 5, 3)))
+        self.cache.store(7, {"session_count": 2, "percent_full": 13.0}, tracker.segments, rows)
+        self.assertEqual(os.path.getmtime(self.cache._rows_path(session_key(7, 0, "64 Hz", 5, 3))), before)
+        self.assertEqual(len([n for n in os.listdir(self.cache.directory) if n.endswith(".rows")]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from app.mscl_metrics_helpers import HistogramFamily, HistogramWindow
+from app.mscl_op_lock import SharedOpLock
+from app.mscl_state_snapshot import SnapshotPublisher, StateSnapshot, capture_state_snapshot
+from app.mscl_status_service import build_status_payload
+
+
+class _FakeState:
+    def __init__(self, lock_path):
+        self.OP_LOCK = SharedOpLock(lock_path)
+        self.BASE_STATION = None
+        self.CURRENT_PORT = "/dev/ttyUSB1"
+        self.LAST_BASE_STATUS = {"message": "Connected", "port": "/dev/ttyUSB1", "ts": "12:00:00"}
+        self.LAST_PING_OK_TS = 0.0
+        self.LAST_PACKET_TS = 0.0
+        self.PING_TTL_SEC = 10.0
+        self.BASE_BEACON_STATE = True
+        self.BAUDRATE = 3000000
+        self.NODE_READ_CACHE = {1: {}, 2: {}}
+        self.SAMPLE_RUNS = {}
+        self.IDLE_IN_PROGRESS = {3}
+        self.metrics = {"stream_queue_depth": 4}
+        self.STREAM_STAGE_HIST = HistogramFamily()
+        self.HTTP_REQUEST_HIST = HistogramFamily()
+        self.INFLUX_WRITE_HIST = HistogramFamily()
+        self.INGEST_LAG_HIST = HistogramFamily()
+        self.INGEST_LAG_WINDOW = HistogramWindow(self.INGEST_LAG_HIST.get("ack"))
+
+    def metric_snapshot(self):
+        return dict(self.metrics)
+
+
+class StateSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.state = _FakeState(os.path.join(self._tmp.name, "base.lock"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_capture_copies_state(self):
+        snap = capture_state_snapshot(state=self.state, now=1000.0)
+        self.state.metrics["stream_queue_depth"] = 9
+        self.state.LAST_BASE_STATUS["message"] = "changed"
+        self.assertEqual(snap.metrics["stream_queue_depth"], 4)
+        self.assertEqual(snap.LAST_BASE_STATUS["message"], "Connected")
+        self.assertEqual((snap.node_cache_size, snap.idle_in_progress_count), (2, 1))
+        self.assertEqual(snap.stream_wait_sec, 0.0)
+        with self.assertRaises(AttributeError):
+            snap.ts = 1.0
+        with self.assertRaises(TypeError):
+            snap.metrics["x"] = 1
+
+    def test_status_payload_accepts_snapshot(self):
+        snap = capture_state_snapshot(state=self.state, now=1000.0)
+        payload = build_status_payload(snap, 1000.0, base_info={})
+        self.assertFalse(payload["connected"])
+        self.assertEqual(payload["base_connection"], "Serial, /dev/ttyUSB1, 3000000")
+
+    def test_publisher_swaps_reference(self):
+        now = [1000.0]
+        pub = SnapshotPublisher(
+            capture_fn=lambda now: capture_state_snapshot(state=self.state, now=now),
+            now_fn=lambda: now[0],
+        )
+        first = pub.current
+        self.assertIsInstance(first, StateSnapshot)
+        now[0] += 1.0
+        self.state.metrics["stream_queue_depth"] = 5
+        second = pub.publish()
+        self.assertIs(pub.current, second)
+        self.assertEqual((first.ts, first.metrics["stream_queue_depth"]), (1000.0, 4))
+        self.assertEqual((second.ts, second.metrics["stream_queue_depth"]), (1001.0, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from app.mscl_status_service import build_status_payload, comm_age_sec, compute_link_health
+from app.mscl_status_service import BaseInfoCache, build_status_payload, comm_age_sec, compute_link_health
 
 
 class _FakeBase:
@@ -86,6 +86,14 @@ class StatusServiceTests(unittest.TestCase):
         payload = build_status_payload(state, now)
         self.assertEqual(payload["base_serial"], "SN-FALLBACK")
 
+    def test_build_status_payload_uses_packet_flow_as_liveness(self):
+        state = _FakeState(_FakeBase())
+        now = 1_770_813_000.0
+        state.LAST_PING_OK_TS = now - 120.0
+        state.LAST_PACKET_TS = now - 0.3
+        payload = build_status_payload(state, now)
+        self.assertAlmostEqual(payload["ping_age_sec"], 0.3, places=3)
+
     def test_build_status_payload_disconnected(self):
         state = _FakeState(base=None)
         now = 1_770_813_000.0
@@ -94,5 +102,65 @@ class StatusServiceTests(unittest.TestCase):
         self.assertEqual(payload["link_health"], "offline")
 
 
+class _CountingBase(_FakeBase):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def model(self):
+        self.calls.append("model")
+        return super().model()
+
+    def lastDeviceState(self):
+        self.calls.append("lastDeviceState")
+        return super().lastDeviceState()
+
+
+class BaseInfoCacheTests(unittest.TestCase):
+    def test_static_fields_read_once_per_connection(self):
+        now = [1000.0]
+        cache = BaseInfoCache(volatile_refresh_sec=5.0, now_fn=lambda: now[0])
+        base = _CountingBase(last_comm="2026-02-11 12:00:00.123")
+        self.assertIsNone(cache.get(base)["base_model"])
+        self.assertTrue(cache.refresh_due(base))
+        cache.refresh(base)
+        self.assertFalse(cache.refresh_due(base))
+        now[0] += 6.0
+        self.assertTrue(cache.refresh_due(base))
+        cache.refresh(base)
+        self.assertEqual(base.calls, ["model", "lastDeviceState", "lastDeviceState"])
+        info = cache.get(base)
+        self.assertEqual(info["base_model"], "63072040")
+        self.assertEqual(info["base_last_comm"], "2026-02-11 12:00:00")
+        self.assertEqual(info["base_info_age_sec"], 0.0)
+
+    def test_new_connection_rereads_and_disconnect_clears(self):
+        cache = BaseInfoCache()
+        first = _CountingBase()
+        cache.refresh(first)
+        second = _CountingBase()
+        self.assertIsNone(cache.get(second)["base_model"])
+        self.assertTrue(cache.refresh_due(second))
+        cache.refresh(second)
+        self.assertEqual(second.calls.count("model"), 1)
+        self.assertTrue(cache.refresh_due(None))
+        cache.refresh(None)
+        self.assertFalse(cache.refresh_due(None))
+        self.assertIsNone(cache.get(second)["base_model"])
+
+    def test_build_status_payload_uses_cached_info(self):
+        base = _CountingBase()
+        cache = BaseInfoCache()
+        cache.refresh(base)
+        base.calls.clear()
+        state = _FakeState(base)
+        now = 1_770_813_000.0
+        state.LAST_PING_OK_TS = now - 1.0
+        payload = build_status_payload(state, now, base_info=cache.get(base))
+        self.assertEqual(base.calls, [])
+        self.assertEqual(payload["base_model"], "63072040")
+        self.assertIsNotNone(payload["base_info_age_sec"])
+
+
 if __name__ == "__main__":
     unittest.main()
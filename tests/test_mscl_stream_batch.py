@@ -0,0 +1,145 @@
+import random
+import unittest
+from array import array
+
+from app.mscl_stream_batch import (
+    StreamBatch,
+    dedupe_series_times,
+    np,
+    resample_uniform_second,
+    resample_uniform_second_np,
+    resample_uniform_second_py,
+)
+
+
+def _legacy_resampled_rows(raw_rows):
+    # Dict-row algorithm previously inlined in run_stream_loop.
+    grouped = {}
+    for row in raw_rows:
+        key = (row["node_id"], row["channel"], int(row["t_ns"]) // 1_000_000_000)
+        grouped.setdefault(key, []).append(row)
+    out = []
+    for (_node_id, _channel, sec), rows in grouped.items():
+        if len(rows) <= 1:
+            out.append((rows[0], int(rows[0]["t_ns"])))
+            continue
+        rows_sorted = sorted(rows, key=lambda r: int(r["t_ns"]))
+        n = len(rows_sorted)
+        span_limit = 999_999_999
+        hz_vals = [float(r["rate_hz"]) for r in rows_sorted if isinstance(r["rate_hz"], (int, float)) and r["rate_hz"] > 0]
+        step_from_rate = max(1, int(round(1_000_000_000.0 / max(hz_vals)))) if hz_vals else None
+        step_auto = max(1, span_limit // max(1, n - 1))
+        if step_from_rate is not None and (step_from_rate * (n - 1)) <= span_limit:
+            step_ns = step_from_rate
+        else:
+            step_ns = step_auto
+        start_ns = int(sec) * 1_000_000_000 + ((span_limit - step_ns * (n - 1)) // 2)
+        for idx, row in enumerate(rows_sorted):
+            out.append((row, start_ns + idx * step_ns))
+    return out
+
+
+class StreamBatchTests(unittest.TestCase):
+    def test_interning_survives_clear(self):
+        batch = StreamBatch()
+        a = batch.intern_node("100")
+        b = batch.intern_node("200")
+        self.assertEqual((a, b), (0, 1))
+        self.assertEqual(batch.intern_node("100"), 0)
+        batch.append(a, batch.intern_channel("ch1"), 1.5, 10, 0.0)
+        self.assertEqual(len(batch), 1)
+        batch.clear()
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(batch.intern_node("200"), 1)
+        self.assertEqual(batch.node_ids, ["100", "200"])
+
+    def test_dedupe_shifts_repeats_per_series(self):
+        out = dedupe_series_times(
+            array("i", [0, 0, 0, 1, 0]),
+            array("i", [0, 0, 1, 0, 0]),
+            array("q", [5, 5, 5, 5, 5]),
+        )
+        self.assertEqual(list(out), [5, 6, 5, 5, 7])
+
+    def test_resample_single_sample_keeps_time(self):
+        order, t_out = resample_uniform_second(
+            array("i", [0]), array("i", [0]), array("q", [3_123_456_789]), array("d", [0.0])
+        )
+        self.assertEqual(list(order), [0])
+        self.assertEqual(list(t_out), [3_123_456_789])
+
+    def test_resample_uses_rate_step_when_it_fits(self):
+        base = 7_000_000_000
+        order, t_out = resample_uniform_second(
+            array("i", [0, 0, 0, 0]),
+            array("i", [0, 0, 0, 0]),
+            array("q", [base + 900, base + 100, base + 500, base + 300]),
+            array("d", [4.0, 4.0, 4.0, 4.0]),
+        )
+        self.assertEqual(list(order), [1, 3, 2, 0])
+        step = 250_000_000
+        start = base + (999_999_999 - 3 * step) // 2
+        self.assertEqual(list(t_out), [start, start + step, start + 2 * step, start + 3 * step])
+
+    def test_resample_matches_legacy_rows(self):
+        nodes = ["100", "200"]
+        channels = ["ch1", "ch2", "diagnostic_state"]
+        raw_rows = []
+        batch = StreamBatch()
+        seed = 12345
+        for i in range(600):
+            seed = (seed * 1103515245 + 12345) & 0x7FFFFFFF
+            node = nodes[seed % 2]
+            channel = channels[(seed >> 3) % 3]
+            t_ns = 1_700_000_000_000_000_000 + (seed % 4_000_000_000)
+            rate = (None, 8.0, 64.0)[(seed >> 5) % 3]
+            raw_rows.append({"node_id": node, "channel": channel, "t_ns": t_ns, "rate_hz": rate, "i": i})
+            batch.append(batch.intern_node(node), batch.intern_channel(channel), float(i), t_ns, rate or 0.0)
+
+        expected = [(row["i"], t) for row, t in _legacy_resampled_rows(raw_rows)]
+        order, t_out = resample_uniform_second(batch.node_idx, batch.channel_idx, batch.t_ns, batch.rate_hz)
+        self.assertEqual(list(zip(order, t_out)), expected)
+        keys = [(batch.node_idx[i], batch.channel_idx[i], t) for i, t in zip(order, t_out)]
+        self.assertEqual(len(set(keys)), len(keys))
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class NumpyResampleParityTests(unittest.TestCase):
+    def _random_columns(self, rng, n, nodes, channels, span_ns, rates):
+        t0 = 1_700_000_000_000_000_000
+        node_idx = array("i", (rng.randrange(nodes) for _ in range(n)))
+        channel_idx = array("i", (rng.randrange(channels) for _ in range(n)))
+        # Coarse timestamps so ties inside a group are common.
+        t_ns = array("q", (t0 + rng.randrange(span_ns) // 1000 * 1000 for _ in range(n)))
+        rate_hz = array("d", (rng.choice(rates) for _ in range(n)))
+        return node_idx, channel_idx, t_ns, rate_hz
+
+    def test_parity_random_batches(self):
+        rng = random.Random(7)
+        rates = (0.0, 0.5, 1.0, 8.0, 64.0, 128.0, 3.0, 1e-6, 1e12)
+        for n, nodes, channels, span_ns in (
+            (1, 1, 1, 10),
+            (2, 1, 1, 1_000_000),
+            (50, 3, 2, 3_000_000_000),
+            (500, 8, 2, 2_000_000_000),
+            (3000, 4, 3, 10_000_000_000),
+            (3000, 1, 1, 500_000),
+        ):
+            cols = self._random_columns(rng, n, nodes, channels, span_ns, rates)
+            py_order, py_t = resample_uniform_second_py(*cols)
+            np_order, np_t = resample_uniform_second_np(*cols)
+            self.assertEqual(list(np_order), list(py_order), msg=f"order n={n}")
+            self.assertEqual(list(np_t), list(py_t), msg=f"times n={n}")
+
+    def test_empty_batch(self):
+        order, t_out = resample_uniform_second_np(array("i"), array("i"), array("q"), array("d"))
+        self.assertEqual((len(order), len(t_out)), (0, 0))
+
+    def test_dispatch_uses_same_result(self):
+        rng = random.Random(11)
+        cols = self._random_columns(rng, 1000, 4, 2, 4_000_000_000, (0.0, 64.0))
+        self.assertEqual(resample_uniform_second(*cols), resample_uniform_second_py(*cols))
+
+
+if __name__ == "__main__":
+    unittest.main()
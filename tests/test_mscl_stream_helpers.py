@@ -1,6 +1,12 @@
 import unittest
 
-from app.mscl_stream_helpers import ns_to_iso_utc
+from app.mscl_stream_helpers import (
+    DatapointAccessorCache,
+    ns_to_iso_utc,
+    packet_time_ns,
+    point_value,
+    resolve_point_value,
+)
 from app.mscl_utils import sample_rate_text_to_hz
 
 
@@ -17,6 +23,96 @@ class StreamHelpersTests(unittest.TestCase):
     def test_rate_parser_reexport_used(self):
         self.assertEqual(sample_rate_text_to_hz("8 Hz"), 8.0)
 
+    def test_packet_time_ns_uses_sweep_timestamp(self):
+        class _Ts:
+            def __init__(self, sec, nsec):
+                self._sec, self._nsec = sec, nsec
+
+            def seconds(self):
+                return self._sec
+
+            def nanoseconds(self):
+                return self._nsec
+
+        class _Sweep:
+            def __init__(self, ts):
+                self._ts = ts
+
+            def timestamp(self):
+                return self._ts
+
+        self.assertEqual(packet_time_ns(_Sweep(_Ts(1_700_000_000, 5))), 1_700_000_000_000_000_005)
+        self.assertIsNone(packet_time_ns(_Sweep(_Ts(0, 0))))
+        self.assertIsNone(packet_time_ns(object()))
+
+
+class _StoredDatapoint:
+    """Fake MSCL datapoint whose typed accessors only work for its stored type."""
+
+    def __init__(self, stored_as, value, channel="ch1"):
+        self.stored_as = stored_as
+        self._value = value
+        self._channel = channel
+        self.calls = []
+
+    def _get(self, name):
+        self.calls.append(name)
+        if name != self.stored_as:
+            raise TypeError(name)
+        return self._value
+
+    def storedAs(self):
+        return self.stored_as
+
+    def channelName(self):
+        return self._channel
+
+    def channelId(self):
+        return 7
+
+    def as_float(self):
+        return self._get("as_float")
+
+    def as_double(self):
+        return self._get("as_double")
+
+    def as_int32(self):
+        return self._get("as_int32")
+
+    def as_uint16(self):
+        return self._get("as_uint16")
+
+
+class DatapointAccessorCacheTests(unittest.TestCase):
+    def test_resolve_reports_working_getter(self):
+        self.assertEqual(resolve_point_value(_StoredDatapoint("as_uint16", 5)), ("as_uint16", 5.0))
+        self.assertEqual(resolve_point_value(object()), (None, None))
+        self.assertEqual(point_value(_StoredDatapoint("as_double", 1.5)), 1.5)
+
+    def test_second_lookup_is_one_direct_call(self):
+        cache = DatapointAccessorCache()
+        self.assertEqual(cache.value(1, "ch1", _StoredDatapoint("as_uint16", 3)), 3.0)
+        dp = _StoredDatapoint("as_uint16", 4)
+        self.assertEqual(cache.value(1, "ch1", dp), 4.0)
+        self.assertEqual(dp.calls, ["as_uint16"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_type_change_reprobes(self):
+        cache = DatapointAccessorCache()
+        cache.value(1, "ch1", _StoredDatapoint("as_uint16", 3))
+        dp = _StoredDatapoint("as_int32", -2)
+        dp.storedAs = lambda: "as_uint16"  # stale storedAs: cached getter fails
+        self.assertEqual(cache.value(1, "ch1", dp), -2.0)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.value(1, "ch1", dp), -2.0)
+        self.assertEqual(cache.hits, 1)
+
+    def test_channel_falls_back_to_id(self):
+        cache = DatapointAccessorCache()
+        self.assertEqual(cache.channel(_StoredDatapoint("as_float", 1.0, channel="ch2")), "ch2")
+        self.assertEqual(cache.channel(_StoredDatapoint("as_float", 1.0, channel="")), "ch7")
+        self.assertIsNone(cache.value(1, "ch1", object()))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,114 @@
+import threading
+import time
+import unittest
+
+from app.mscl_stream_queue import (
+    FairPacketQueue,
+    ShardedPacketQueue,
+    estimate_packet_bytes,
+    normalize_overflow_policy,
+)
+
+
+class FairPacketQueueTests(unittest.TestCase):
+    def test_round_robin_drain_across_nodes(self):
+        q = FairPacketQueue()
+        for i in range(4):
+            q.put("A", f"a{i}", 10)
+        q.put("B", "b0", 10)
+        q.put("C", "c0", 10)
+        self.assertEqual(q.get_batch(1000), ["a0", "b0", "c0", "a1", "a2", "a3"])
+        self.assertEqual((len(q), q.points, q.bytes), (0, 0, 0))
+
+    def test_get_batch_respects_point_limit(self):
+        q = FairPacketQueue()
+        for i in range(5):
+            q.put("A", i, 100)
+        self.assertEqual(q.get_batch(250), [0, 1, 2])
+        self.assertEqual(q.points, 200)
+
+    def test_drop_oldest_evicts_chatty_node_first(self):
+        q = FairPacketQueue(max_points=100)
+        q.put("quiet", "q0", 10)
+        for i in range(12):
+            q.put("chatty", f"c{i}", 10)
+        self.assertLessEqual(q.points, 100)
+        self.assertEqual(q.dropped_packets, {"chatty": 3})
+        self.assertEqual(q.dropped_points, {"chatty": 30})
+        batch = q.get_batch(1000)
+        self.assertIn("q0", batch)
+        self.assertEqual(batch[1], "c3")
+
+    def test_drop_newest_rejects_incoming(self):
+        q = FairPacketQueue(max_points=20, policy="drop-newest")
+        self.assertEqual(q.put("A", "a0", 10), 0)
+        self.assertEqual(q.put("A", "a1", 10), 0)
+        self.assertEqual(q.put("B", "b0", 10), 1)
+        self.assertEqual(q.dropped_packets, {"B": 1})
+        self.assertEqual(q.get_batch(100), ["a0", "a1"])
+
+    def test_byte_budget_and_packet_cap(self):
+        q = FairPacketQueue(max_bytes=estimate_packet_bytes(5) * 2)
+        for i in range(3):
+            q.put("A", i, 5)
+        self.assertEqual(len(q), 2)
+        q = FairPacketQueue(max_packets=2)
+        for i in range(3):
+            q.put("A", i, 0)
+        self.assertEqual(q.get_batch(100), [1, 2])
+
+    def test_spill_hands_evicted_packets_to_callback(self):
+        spilled = []
+        q = FairPacketQueue(max_points=20, policy="spill", spill_fn=spilled.extend)
+        for i in range(4):
+            q.put("A", i, 10)
+        self.assertEqual(spilled, [0, 1])
+        self.assertEqual(q.spilled_packets, 2)
+        self.assertEqual(q.dropped_packets, {})
+
+    def test_spill_without_callback_falls_back(self):
+        self.assertEqual(FairPacketQueue(policy="spill").policy, "drop_oldest")
+        self.assertEqual(normalize_overflow_policy("bogus"), "drop_oldest")
+
+    def test_block_waits_for_consumer(self):
+        q = FairPacketQueue(max_points=10, policy="block", block_timeout_sec=2.0)
+        q.put("A", "a0", 10)
+        done = []
+        producer = threading.Thread(target=lambda: done.append(q.put("A", "a1", 10)))
+        producer.start()
+        time.sleep(0.05)
+        self.assertEqual(done, [])
+        self.assertEqual(q.get_batch(10), ["a0"])
+        producer.join(1.0)
+        self.assertEqual(done, [0])
+        self.assertEqual(q.get_batch(10), ["a1"])
+
+    def test_block_times_out_to_drop_oldest(self):
+        q = FairPacketQueue(max_points=10, policy="block", block_timeout_sec=0.01)
+        q.put("A", "a0", 10)
+        self.assertEqual(q.put("A", "a1", 10), 1)
+        self.assertEqual(q.get_batch(10), ["a1"])
+
+
+class ShardedPacketQueueTests(unittest.TestCase):
+    def test_nodes_pinned_and_balanced_across_shards(self):
+        q = ShardedPacketQueue(3, max_points=300)
+        for node in ("n1", "n2", "n3", "n4"):
+            q.put(node, f"{node}-a", 10)
+        q.put("n1", "n1-b", 10)
+        shards = [q.shard_of(node) for node in ("n1", "n2", "n3", "n4")]
+        self.assertEqual(shards, [0, 1, 2, 0])
+        self.assertEqual(q.shards[0].get_batch(100), ["n1-a", "n4-a", "n1-b"])
+        self.assertEqual((len(q), q.points), (2, 20))
+        self.assertEqual(q.shards[0].max_points, 100)
+
+    def test_dropped_counts_are_merged(self):
+        q = ShardedPacketQueue(2, max_points=20)
+        for i in range(3):
+            q.put("a", i, 10)
+            q.put("b", i, 10)
+        self.assertEqual(q.dropped_counts(), ({"a": 2, "b": 2}, {"a": 20, "b": 20}))
+
+
+if __name__ == "__main__":
+    unittest.main()
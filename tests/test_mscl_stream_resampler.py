@@ -0,0 +1,89 @@
+import unittest
+from array import array
+
+from app.mscl_stream_batch import resample_uniform_second_py
+from app.mscl_stream_resampler import StreamingResampler
+
+SEC = 1_000_000_000
+T0 = 1_700_000_000 * SEC
+
+
+def _cols(rows):
+    return (
+        array("i", [r[0] for r in rows]),
+        array("i", [r[1] for r in rows]),
+        array("q", [r[2] for r in rows]),
+        array("d", [r[3] for r in rows]),
+        array("d", [r[4] for r in rows]),
+    )
+
+
+def _pairs(out):
+    return [(out.t_ns[i], t) for i, t in zip(out.order, out.t_resampled)]
+
+
+class StreamingResamplerTests(unittest.TestCase):
+    def test_second_split_across_batches_is_resampled_once(self):
+        rs = StreamingResampler(lateness_sec=5.0)
+        first = [(0, 0, T0 + k * 125_000_000, float(k), 8.0) for k in range(5)]
+        second = [(0, 0, T0 + k * 125_000_000, float(k), 8.0) for k in range(5, 8)]
+        out1 = rs.push(*_cols(first), now=0.0)
+        self.assertEqual(len(out1), 0)
+        self.assertEqual(rs.open_samples(), 5)
+        out2 = rs.push(*_cols(second), now=0.2)
+        self.assertEqual(len(out2), 0)
+
+        out3 = rs.push(*_cols([(0, 0, T0 + SEC + 1, 9.0, 8.0)]), now=0.4)
+        all_rows = first + second
+        n_i, c_i, t_ns, _v, hz = _cols(all_rows)
+        _order, expected = resample_uniform_second_py(n_i, c_i, t_ns, hz)
+        self.assertEqual(list(out3.t_resampled), list(expected))
+        self.assertEqual(len(set(out3.t_resampled)), 8)
+        self.assertEqual(rs.open_samples(), 1)
+        self.assertEqual(rs.forced_flushes, 0)
+
+    def test_series_are_independent(self):
+        rs = StreamingResampler(lateness_sec=5.0)
+        rows = [(0, 0, T0 + 1, 1.0, 0.0), (1, 0, T0 + 2, 2.0, 0.0), (0, 0, T0 + SEC + 3, 3.0, 0.0)]
+        out = rs.push(*_cols(rows), now=0.0)
+        self.assertEqual(_pairs(out), [(T0 + 1, T0 + 1)])
+        self.assertEqual(rs.open_series(), 2)
+
+    def test_late_samples_are_counted_and_skipped(self):
+        rs = StreamingResampler(lateness_sec=5.0)
+        rs.push(*_cols([(0, 0, T0 + 1, 1.0, 0.0), (0, 0, T0 + SEC + 1, 2.0, 0.0)]), now=0.0)
+        out = rs.push(*_cols([(0, 0, T0 + 5, 3.0, 0.0)]), now=0.1)
+        self.assertEqual(len(out), 0)
+        self.assertEqual(rs.late_samples, 1)
+
+    def test_lateness_timeout_forces_flush(self):
+        rs = StreamingResampler(lateness_sec=1.0)
+        rs.push(*_cols([(0, 0, T0 + 10, 1.0, 0.0), (0, 0, T0 + 20, 2.0, 0.0)]), now=0.0)
+        self.assertEqual(len(rs.flush_expired(now=0.5)), 0)
+        out = rs.flush_expired(now=1.5)
+        self.assertEqual(len(out), 2)
+        self.assertEqual(rs.forced_flushes, 1)
+        self.assertEqual(rs.open_series(), 0)
+        self.assertEqual(rs.open_samples(), 0)
+        rs.push(*_cols([(0, 0, T0 + 30, 3.0, 0.0)]), now=1.6)
+        self.assertEqual(rs.late_samples, 1)
+
+    def test_zero_lateness_matches_per_batch_resampling(self):
+        rs = StreamingResampler(lateness_sec=0.0)
+        rows = [(0, 0, T0 + k * 250_000_000, float(k), 4.0) for k in range(4)]
+        out = rs.push(*_cols(rows), now=0.0)
+        n_i, c_i, t_ns, _v, hz = _cols(rows)
+        self.assertEqual(list(out.t_resampled), list(resample_uniform_second_py(n_i, c_i, t_ns, hz)[1]))
+
+    def test_capacity_cap_bounds_memory(self):
+        rs = StreamingResampler(lateness_sec=5.0, max_second_samples=3)
+        rows = [(0, 0, T0 + k, float(k), 0.0) for k in range(5)]
+        out = rs.push(*_cols(rows), now=0.0)
+        self.assertEqual(len(out), 3)
+        self.assertEqual(rs.late_samples, 2)
+        self.assertEqual(rs.forced_flushes, 1)
+        self.assertEqual(rs.open_samples(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import tempfile
+import unittest
+
+from app.mscl_metrics_helpers import HistogramFamily, LatencyHistogram
+from app.mscl_stream_sink import SpooledWriteSink
+from app.mscl_stream_spool import LineProtocolSpool
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class SpooledWriteSinkTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.spool = LineProtocolSpool(self._tmp.name)
+        self.clock = _Clock()
+        self.written = []
+        self.fail = False
+        self.fail_times = 0
+        self.sleeps = []
+        self.metrics = {}
+        self.logs = []
+
+    def tearDown(self):
+        self.spool.close()
+        self._tmp.cleanup()
+
+    def _write(self, payload):
+        if self.fail:
+            raise ConnectionError("influx down")
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("influx hiccup")
+        self.written.append(payload)
+
+    def _inc(self, name, amount=1):
+        self.metrics[name] = self.metrics.get(name, 0) + amount
+
+    def _set(self, name, value):
+        self.metrics[name] = value
+
+    def _sink(self, spool="default", **kwargs):
+        return SpooledWriteSink(
+            write_fn=self._write,
+            spool=self.spool if spool == "default" else spool,
+            log_func=self.logs.append,
+            metric_inc=self._inc,
+            metric_set=self._set,
+            retry_interval_sec=5.0,
+            now_fn=self.clock,
+            sleep_fn=self.sleeps.append,
+            **kwargs,
+        )
+
+    def test_coalesces_queued_payloads_up_to_batch_points(self):
+        sink = self._sink(batch_points=5)
+        for i in range(3):
+            sink.submit(b"a%d\n" % i, points=2)
+        self.assertEqual(sink.send_pending(), 4)
+        self.assertEqual(sink.send_pending(), 2)
+        self.assertEqual(self.written, [b"a0\na1\n", b"a2\n"])
+
+    def test_write_round_trips_are_recorded_per_kind(self):
+        hist = HistogramFamily()
+        sink = self._sink(write_hist=hist, write_retries=0)
+        sink.submit(b"a\n", points=1)
+        sink.send_pending()
+        self.fail = True
+        sink.submit(b"b\n", points=1)
+        sink.send_pending()
+        self.fail = False
+        self.clock.now += 5.0
+        sink.replay_once()
+        snap = hist.snapshot()
+        self.assertEqual(snap["stream"]["count"], 2)
+        self.assertEqual(snap["replay"]["count"], 1)
+
+    def test_ack_lag_observed_for_acknowledged_writes_only(self):
+        lag = LatencyHistogram(buckets=(1.0, 5.0))
+        sink = self._sink(lag_hist=lag, wall_ns_fn=lambda: 10_000_000_000)
+        sink.submit(b"a\n", points=2, lag_times_ns=[9_500_000_000, 7_000_000_000])
+        sink.send_pending()
+        self.fail = True
+        sink.submit(b"b\n", points=1, lag_times_ns=[1_000_000_000])
+        sink.send_pending()
+        self.assertEqual(lag.cumulative_counts(), [(1.0, 1), (5.0, 2), (float("inf"), 2)])
+
+    def test_failed_write_spools_and_replays_in_order_after_recovery(self):
+        sink = self._sink()
+        self.fail = True
+        sink.submit(b"one\n", points=1, t_min_ns=1, t_max_ns=1)
+        sink.send_pending()
+        self.assertFalse(sink.healthy)
+        sink.submit(b"two\n", points=1, t_min_ns=2, t_max_ns=2)
+        sink.send_pending()
+        self.assertEqual(self.spool.depth_records, 2)
+        self.assertEqual(self.metrics["stream_spool_depth_records"], 2)
+
+        # Probe is not due yet, then fails.
+        self.assertGreater(sink.replay_once(), 0)
+        self.assertEqual(self.written, [])
+        self.clock.now += 5.0
+        sink.replay_once()
+        self.assertEqual(self.spool.depth_records, 2)
+
+        self.fail = False
+        self.clock.now += 5.0
+        sink.replay_once()
+        self.assertTrue(sink.healthy)
+        sink.replay_once()
+        self.assertEqual(self.written, [b"one\n", b"two\n"])
+        self.assertEqual(self.metrics["stream_spool_records_replayed"], 2)
+        self.assertEqual(self.metrics["stream_spool_depth_records"], 0)
+        self.assertEqual(self.metrics["stream_influx_healthy"], 1)
+
+    def test_replay_is_rate_limited_by_points(self):
+        sink = self._sink(replay_points_per_sec=1000.0)
+        self.spool.append(b"x\n" * 500, points=500)
+        self.assertAlmostEqual(sink.replay_once(), 0.5)
+
+    def test_queue_overflow_goes_to_spool(self):
+        sink = self._sink(queue_max_payloads=2)
+        for i in range(3):
+            sink.submit(b"p%d\n" % i, points=1)
+        self.assertEqual(sink.queued_payloads(), 2)
+        self.assertEqual(self.spool.peek().payload, b"p0\n")
+        self.assertEqual(self.metrics["stream_sink_queue_overflows"], 1)
+
+    def test_transient_write_error_is_retried_with_backoff(self):
+        sink = self._sink()
+        self.fail_times = 2
+        sink.submit(b"a\n", points=1)
+        sink.send_pending()
+        self.assertEqual(self.written, [b"a\n"])
+        self.assertEqual(self.sleeps, [0.5, 1.0])
+        self.assertTrue(sink.healthy)
+        self.assertEqual(self.spool.depth_records, 0)
+        self.assertEqual(self.metrics["stream_influx_write_retries"], 2)
+
+    def test_without_spool_failed_points_are_counted(self):
+        sink = self._sink(spool=None)
+        self.fail = True
+        sink.submit(b"a\nb\n", points=2)
+        sink.send_pending()
+        self.assertEqual(self.sleeps, [0.5, 1.0, 2.0])
+        self.assertEqual(self.metrics["stream_write_dropped_points"], 2)
+        self.assertTrue(any("dropped 2 points" in line for line in self.logs))
+        # Still retried directly on the next batch.
+        self.fail = False
+        sink.submit(b"c\n", points=1)
+        sink.send_pending()
+        self.assertEqual(self.written, [b"c\n"])
+        self.assertTrue(sink.healthy)
+
+
+if __name__ == "__main__":
+    unittest.main()
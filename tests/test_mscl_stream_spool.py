@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+from app.mscl_stream_spool import LineProtocolSpool
+
+
+class LineProtocolSpoolTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _drain(self, spool):
+        out = []
+        while True:
+            record = spool.peek()
+            if record is None:
+                return out
+            out.append(record.payload)
+            spool.ack(record)
+
+    def test_fifo_roundtrip_across_segments(self):
+        spool = LineProtocolSpool(self.dir, segment_max_bytes=4096, fsync_every=1000, compress_level=0)
+        payloads = [(b"m,node_id=1 value=%d %d\n" % (i, i)) * 40 for i in range(30)]
+        for i, payload in enumerate(payloads):
+            spool.append(payload, points=40, t_min_ns=i, t_max_ns=i)
+        self.assertEqual(spool.depth_records, 30)
+        self.assertGreater(len(spool._segments), 1)
+        self.assertGreaterEqual(spool.replay_lag_sec(), 0.0)
+        self.assertEqual(self._drain(spool), payloads)
+        self.assertEqual(spool.depth_records, 0)
+        self.assertEqual(spool.replay_lag_sec(), 0.0)
+        spool.close()
+
+    def test_reopen_resumes_after_acked_records(self):
+        spool = LineProtocolSpool(self.dir)
+        for i in range(5):
+            spool.append(b"p%d" % i, points=1)
+        for _ in range(2):
+            spool.ack(spool.peek())
+        spool.close()
+
+        reopened = LineProtocolSpool(self.dir)
+        self.assertEqual(reopened.depth_records, 3)
+        reopened.append(b"p5", points=1)
+        self.assertEqual(self._drain(reopened), [b"p2", b"p3", b"p4", b"p5"])
+
+    def test_torn_tail_is_ignored(self):
+        spool = LineProtocolSpool(self.dir)
+        spool.append(b"complete", points=1)
+        spool.append(b"torn record payload", points=1)
+        spool.close()
+        path = spool._segment_path(spool._segments[-1])
+        with open(path, "r+b") as fh:
+            fh.truncate(os.path.getsize(path) - 3)
+
+        reopened = LineProtocolSpool(self.dir)
+        self.assertEqual(reopened.depth_records, 1)
+        reopened.append(b"after restart", points=1)
+        self.assertEqual(self._drain(reopened), [b"complete", b"after restart"])
+
+    def test_size_cap_drops_oldest_segments(self):
+        spool = LineProtocolSpool(self.dir, segment_max_bytes=4096, max_total_bytes=8192, compress_level=0)
+        payloads = [os.urandom(900) for _ in range(40)]
+        for payload in payloads:
+            spool.append(payload, points=1)
+        self.assertLessEqual(spool.depth_bytes, 8192)
+        self.assertGreater(spool.dropped_records, 0)
+        self.assertEqual(spool.depth_records + spool.dropped_records, 40)
+        self.assertEqual(self._drain(spool), payloads[spool.dropped_records :])
+
+
+    def test_interleaved_append_and_ack_keeps_disk_bounded(self):
+        spool = LineProtocolSpool(self.dir, segment_max_bytes=4096, compress_level=0)
+        for _ in range(200):
+            spool.append(os.urandom(1000), points=1)
+            spool.ack(spool.peek())
+        self.assertEqual(spool.depth_bytes, 0)
+        self.assertEqual([n for n in os.listdir(self.dir) if n.endswith(".lps")], [])
+
+        # One record always pending: the active segment never drains, but still rotates.
+        spool.append(b"pending", points=1)
+        for _ in range(200):
+            spool.append(os.urandom(1000), points=1)
+            spool.ack(spool.peek())
+        on_disk = sum(os.path.getsize(spool._segment_path(seq)) for seq in spool._segments)
+        self.assertEqual(spool.depth_records, 1)
+        self.assertLessEqual(on_disk, 2 * 4096)
+        self.assertEqual(len(self._drain(spool)), 1)
+        spool.close()
+
+    def test_drained_active_segment_is_removed(self):
+        spool = LineProtocolSpool(self.dir)
+        spool.append(b"a", points=1)
+        first = spool._active_seq
+        spool.ack(spool.peek())
+        self.assertFalse(os.path.exists(spool._segment_path(first)))
+        self.assertEqual(spool.depth_bytes, 0)
+        spool.append(b"b", points=1)
+        self.assertGreater(spool._active_seq, first)
+        spool.close()
+        self.assertEqual(self._drain(LineProtocolSpool(self.dir)), [b"b"])
+
+
+if __name__ == "__main__":
+    unittest.main()